@@ -0,0 +1,56 @@
+"""Helpers shared by the benchmarks: sessions of the services on a benchmark database, synthetic data
+and pointing the application to a temporary database. The application creates its engine when it is imported,
+so it is imported here only by the helpers using it, after 'use_database'."""
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+import config
+
+
+SEED_CHUNK: int = 100000  # readers written in one statement while seeding
+
+
+def use_database(path: Path) -> None:
+    """Pointing the application to the database at the path. Must go before importing the application."""
+    config.DB_URL = f'sqlite+pysqlite:///{path}'
+
+
+def async_sessions(engine) -> async_sessionmaker:
+    """Factory of asynchronous sessions of the services on the database of the engine. Connections are not pooled,
+    so the sessions can be used by several event loops one after another."""
+    from src.database import async_url
+    return async_sessionmaker(create_async_engine(async_url(engine.url), poolclass=NullPool),
+                              expire_on_commit=False)
+
+
+def seed_urls(engine, stored: int) -> None:
+    """Filling the table 'newses' with synthetic URLs."""
+    connection = engine.raw_connection()
+    try:
+        connection.execute("INSERT INTO languages (code, name, is_active) VALUES ('EN', 'English', 1)")
+        connection.executemany(
+            "INSERT INTO newses (date, url, has_summary, has_summaries, lang_pk) "
+            "VALUES ('2024-01-01 00:00:00', ?, 1, 1, 1)",
+            ((f'https://example.com/news/{num}',) for num in range(stored)))
+        connection.commit()
+    finally:
+        connection.close()
+
+
+def seed_readers(engine, readers: int, news: int, languages: int) -> None:
+    """Languages, active readers spread over them and news with a summary in every language."""
+    from src.database import Language, News, Reader, Summary
+    with sessionmaker(engine)() as s:
+        s.execute(insert(Language), [{'code': f'L{num}'} for num in range(languages)])
+        for start in range(0, readers, SEED_CHUNK):
+            s.execute(insert(Reader), [{'tg_id': num, 'lang_pk': num % languages + 1, 'is_active': True}
+                                       for num in range(start, min(start + SEED_CHUNK, readers))])
+        s.execute(insert(News), [{'url': f'https://example.com/news/{num}', 'lang_pk': 1, 'has_summary': True,
+                                  'has_summaries': True} for num in range(news)])
+        s.execute(insert(Summary), [{'news_pk': news_pk, 'lang_pk': lang_pk, 'content': 'summary text ' * 60}
+                                    for news_pk in range(1, news + 1) for lang_pk in range(1, languages + 1)])
+        s.commit()
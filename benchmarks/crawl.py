@@ -0,0 +1,112 @@
+"""Wall-clock time of crawling sitemaps served by a local stub server:
+the former serial path (requests + sleep between sites) against the concurrent crawler.
+
+    python -m benchmarks.crawl --sites 60 --urls 10 --latency 0.05 --sleep 1
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import time
+
+import requests
+from aiohttp import web
+from bs4 import BeautifulSoup
+
+from benchmarks.stub import StubServer
+from src.news.app import get_data, parser
+from src.news.crawler import Crawler
+
+
+def sitemap_xml(base_url: str, site: int, urls: int) -> str:
+    """Creating the text of a news XML-file with fresh publication dates."""
+    day = datetime.datetime.now(datetime.timezone.utc).strftime('%Y-%m-%dT%H:%M:%S%z')
+    day = day[:-2] + ':' + day[-2:]
+    items = ''.join(f'<url><loc>{base_url}/news/{site}/{num}</loc><lastmod>{day}</lastmod></url>'
+                    for num in range(urls))
+    return f'<?xml version="1.0" encoding="UTF-8"?>' \
+           f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{items}</urlset>'
+
+
+def make_app(latency: float, urls: int) -> web.Application:
+    """Stub of news sites: XML-files and news pages answered with the given latency."""
+    page = '<html><body>' + '<p>news text</p>' * 1000 + '</body></html>'
+
+    async def sitemap(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        base_url = f'http://{request.host}'
+        return web.Response(text=sitemap_xml(base_url, int(request.match_info['site']), urls),
+                            content_type='application/xml')
+
+    async def news(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.Response(text=page, content_type='text/html')
+
+    app = web.Application()
+    app.router.add_get('/sitemap-{site}.xml', sitemap)
+    app.router.add_get('/news/{site}/{num}', news)
+    return app
+
+
+def serial_crawl(sites: list, pause: float) -> (int, int):
+    """The former way: one site after another through a blocking session with a pause before each site.
+    Returns the amount of news pages and received bytes."""
+    count = 0
+    received = 0
+    session = requests.Session()
+    for xml_url in sites:
+        time.sleep(pause)
+        response = session.get(xml_url, timeout=(10, 5))
+        received += len(response.content)
+        soup = BeautifulSoup(response.text, features='xml')
+        url_and_date = [(link.find('loc').text.lower(), link.find('lastmod').text) for link in soup.find_all('url')]
+        for url, day in url_and_date:
+            response = session.get(url, timeout=(10, 5))
+            received += len(response.content)
+            if response.status_code == 200:
+                count += 1
+    session.close()
+    return count, received
+
+
+async def concurrent_crawl(sites: list) -> (int, int):
+    """The crawler way: all sites and news pages in parallel through one pooled client."""
+    async def crawl_site(crawler: Crawler, xml_url: str) -> int:
+        url_data, _ = await parser(xml_url, 'EN', crawler)
+        new_data, old_data = await get_data(crawler, url_data, 'not-record')
+        return len(new_data) + len(old_data)
+
+    async with Crawler() as crawler:
+        counts = await asyncio.gather(*(crawl_site(crawler, xml_url) for xml_url in sites))
+    return sum(counts), crawler.bytes_received
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--sites', type=int, default=60, help='number of XML-files')
+    arg_parser.add_argument('--urls', type=int, default=10, help='news links in each XML-file')
+    arg_parser.add_argument('--hosts', type=int, default=10, help='number of stub sites (ports)')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='SECONDS - stub response latency')
+    arg_parser.add_argument('--sleep', type=float, default=1, help='SECONDS - pause between sites in the serial path')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with StubServer(make_app(args.latency, args.urls), ports=args.hosts) as server:
+        sites = [f'{server.urls[num % args.hosts]}/sitemap-{num}.xml' for num in range(args.sites)]
+
+        start = time.perf_counter()
+        serial_count, serial_bytes = serial_crawl(sites, args.sleep)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent_count, concurrent_bytes = asyncio.run(concurrent_crawl(sites))
+        concurrent_time = time.perf_counter() - start
+
+    print(f'{args.sites} XML-files x {args.urls} news, latency {args.latency}s, {args.hosts} hosts')
+    print(f'serial:     {serial_time:8.2f}s  ({serial_count} pages, {serial_bytes / 1024:.0f} KB received)')
+    print(f'concurrent: {concurrent_time:8.2f}s  ({concurrent_count} pages, {concurrent_bytes / 1024:.0f} KB received)')
+    print(f'speedup:    {serial_time / concurrent_time:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Finding the publication date in news pages: the former full lxml BeautifulSoup tree
+against the date extraction strategies.
+
+    python -m benchmarks.date_extract --pages ./saved_pages
+    python -m benchmarks.date_extract --synthetic 200
+"""
+import argparse
+import datetime
+import logging
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from src.news.dates import make_extractor
+
+
+STRATEGIES = {
+    'scan': {'strategy': 'scan', 'tag': 'span', 'class': 'page__meta-item-text',
+             'format': '%d.%m.%Y', 'tz': 'Europe/Moscow'},
+    'regex': {'strategy': 'regex', 'pattern': r'class="page__meta-item-text">\s*([\d.]+)',
+              'format': '%d.%m.%Y', 'tz': 'Europe/Moscow'},
+    'meta': {'strategy': 'meta'},
+    'jsonld': {'strategy': 'jsonld'},
+}
+
+
+def soup_date(text: str) -> datetime.datetime or bool:
+    """The former way of finding the date."""
+    soup = BeautifulSoup(text, 'lxml')
+    date = soup.find_all('span', class_='page__meta-item-text')
+    if not date:
+        return False
+    return datetime.datetime.strptime(f'{date[0].text} +0300', '%d.%m.%Y %z')
+
+
+def synthetic_page(num: int) -> str:
+    """A news page of about 150 KB with the date in meta, JSON-LD and the page header."""
+    day = datetime.datetime(2024, 1, 1) + datetime.timedelta(days=num % 300)
+    head = (f'<head><title>News {num}</title>'
+            + '<link rel="stylesheet" href="/style.css">' * 50
+            + f'<meta property="article:published_time" content="{day:%Y-%m-%d}T00:00:00+03:00">'
+            + f'<script type="application/ld+json">{{"@type": "NewsArticle", '
+              f'"datePublished": "{day:%Y-%m-%d}T00:00:00+03:00"}}</script></head>')
+    menu = '<nav>' + '<div class="menu"><a href="/section">Section</a></div>' * 300 + '</nav>'
+    header = f'<div class="page__meta"><span class="page__meta-item-text">{day:%d.%m.%Y}</span></div>'
+    body = '<article>' + '<p>Text of the news paragraph with <b>some</b> markup.</p>' * 2000 + '</article>'
+    return f'<!DOCTYPE html><html>{head}<body>{menu}{header}{body}</body></html>'
+
+
+def timing(func, pages: list) -> (float, list):
+    start = time.perf_counter()
+    results = [func(page) for page in pages]
+    return time.perf_counter() - start, results
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--pages', type=Path, help='directory with saved *.html news pages')
+    arg_parser.add_argument('--synthetic', type=int, default=200, help='amount of synthetic pages without --pages')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    if args.pages:
+        pages = [path.read_text(encoding='utf-8', errors='replace') for path in sorted(args.pages.glob('*.html'))]
+    else:
+        pages = [synthetic_page(num) for num in range(args.synthetic)]
+    size = sum(map(len, pages)) / 2**20
+    print(f'{len(pages)} pages, {size:.1f} MB')
+
+    soup_time, expected = timing(soup_date, pages)
+    print(f'{"soup (former)":16} {soup_time * 1000 / len(pages):8.2f} ms/page  found {sum(map(bool, expected))}')
+    for name, config in STRATEGIES.items():
+        elapsed, results = timing(lambda page: make_extractor(config).extract(page), pages)
+        same = sum(1 for result, day in zip(results, expected) if result and day and result == day)
+        print(f'{name:16} {elapsed * 1000 / len(pages):8.2f} ms/page  found {sum(map(bool, results))},'
+              f' same as former {same}  x{soup_time / elapsed:.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Selecting new URLs of one XML-file on a database with many stored URLs:
+loading all URLs into a set against batched probes of the 'url' index.
+
+    python -m benchmarks.dedupe --stored 1000000 --candidates 500
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from benchmarks.common import async_sessions, seed_urls
+from src.database.tables import Base
+from src.services import NewsService
+
+
+def measure(func, *args) -> (set, float, float):
+    """Calling the function and returning its result, time in seconds and peak of allocated memory in MB."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--stored', type=int, default=1000000, help='URLs already stored in the database')
+    arg_parser.add_argument('--candidates', type=int, default=500, help='URLs in the XML-file')
+    arg_parser.add_argument('--new', type=float, default=0.1, help='share of new URLs among candidates')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "dedupe.sqlite3")}')
+        Base.metadata.create_all(engine)
+        start = time.perf_counter()
+        seed_urls(engine, args.stored)
+        print(f'seeded {args.stored} URLs in {time.perf_counter() - start:.1f}s')
+
+        new_count = int(args.candidates * args.new)
+        known_count = args.candidates - new_count
+        candidates = {f'https://example.com/news/{args.stored - num}' for num in range(1, known_count + 1)}
+        candidates |= {f'https://example.com/fresh/{num}' for num in range(new_count)}
+        service = NewsService(async_sessions(engine))
+
+        def load_all(urls: set) -> set:
+            return urls.difference(set(asyncio.run(service.get_all_url())))
+
+        old, old_time, old_peak = measure(load_all, candidates)
+        new, new_time, new_peak = measure(lambda urls: asyncio.run(service.get_new_urls(urls)), candidates)
+        engine.dispose()
+
+    assert old == new, 'both ways must select the same URLs'
+    print(f'{args.candidates} candidates, {len(new)} new')
+    print(f'load all URLs:  {old_time * 1000:10.1f} ms  peak {old_peak:8.1f} MB')
+    print(f'batched probe:  {new_time * 1000:10.1f} ms  peak {new_peak:8.1f} MB')
+
+
+if __name__ == '__main__':
+    main()
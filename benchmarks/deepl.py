@@ -0,0 +1,96 @@
+"""Translation throughput against a local stand-in of DEEPL API:
+the former path (one blocking request per text and language with a pause) against batched concurrent requests.
+
+    python -m benchmarks.deepl --summaries 30 --languages 4 --latency 0.3 --sleep 0.1
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+import requests
+from aiohttp import web
+
+from benchmarks.stub import StubServer
+from config import DEEPL
+from src.deepl.app import Deepl, translate_language
+
+
+def make_app(latency: float, counter: Counter) -> web.Application:
+    """Stand-in of DEEPL translation: answers after the latency, accepts one text in the query
+    or many texts in the JSON body."""
+    async def translate(request: web.Request) -> web.Response:
+        counter['requests'] += 1
+        await asyncio.sleep(latency)
+        if request.method == 'POST':
+            body = await request.json()
+            texts, target = body['text'], body['target_lang']
+        else:
+            texts, target = request.query.getall('text'), request.query['target_lang']
+        return web.json_response({'translations': [{'detected_source_language': 'EN', 'text': f'[{target}] {text}'}
+                                                   for text in texts]})
+
+    app = web.Application()
+    app.router.add_route('*', DEEPL['transl_endpoint'], translate)
+    return app
+
+
+def serial_translate(url: str, data_list: list, languages: list, pause: float) -> int:
+    """The former way: every summary into every language with a separate blocking request after a pause."""
+    count = 0
+    for language in languages:
+        for data in data_list:
+            time.sleep(pause)
+            response = requests.get(url + DEEPL['transl_endpoint'],
+                                    params={'target_lang': language.code, 'text': data['content']})
+            count += len(response.json()['translations'])
+    return count
+
+
+async def batched_translate(url: str, data_list: list, languages: list) -> (int, Counter):
+    """The engine way: batches of summaries per language, all languages concurrently through one session."""
+    async with Deepl(url=url, dummy=False) as client:
+        results = await asyncio.gather(*(translate_language(client, language, data_list) for language in languages))
+    return sum(map(len, results)), client.stats
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--summaries', type=int, default=30, help='number of summaries to translate')
+    arg_parser.add_argument('--languages', type=int, default=4, help='number of readers languages')
+    arg_parser.add_argument('--length', type=int, default=800, help='CHARACTERS - length of one summary')
+    arg_parser.add_argument('--latency', type=float, default=0.3, help='SECONDS - stand-in response latency')
+    arg_parser.add_argument('--sleep', type=float, default=0.1, help='SECONDS - pause before each former request')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    text = ('Summary text of the news. ' * (args.length // 26 + 1))[:args.length]
+    data_list = [{'news_pk': num, 'summary_pk': num, 'summary_lang': 0, 'content': f'{num} {text}'}
+                 for num in range(args.summaries)]
+    languages = [SimpleNamespace(pk=num + 1, code=f'L{num}') for num in range(args.languages)]
+    characters = sum(len(data['content']) for data in data_list) * len(languages)
+
+    counter = Counter()
+    with StubServer(make_app(args.latency, counter)) as server:
+        start = time.perf_counter()
+        serial_count = serial_translate(server.urls[0], data_list, languages, args.sleep)
+        serial_time = time.perf_counter() - start
+        serial_requests = counter['requests']
+
+        start = time.perf_counter()
+        batched_count, stats = asyncio.run(batched_translate(server.urls[0], data_list, languages))
+        batched_time = time.perf_counter() - start
+
+    print(f'{args.summaries} summaries x {args.languages} languages, {characters} characters,'
+          f' latency {args.latency}s')
+    print(f'serial:  {serial_time:8.2f}s  {serial_count} translations in {serial_requests} requests,'
+          f' {characters / serial_time:10.0f} characters/s')
+    print(f'batched: {batched_time:8.2f}s  {batched_count} translations in {stats["requests"]} requests,'
+          f' {stats["characters"] / batched_time:10.0f} characters/s,'
+          f' {stats["texts"] - stats["requests"]} requests saved')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+"""Deletion of bot answers: the former way, a coroutine sleeping 'delay' seconds per answer, against the scheduler,
+one task deleting due answers from a heap in batches with the answers written to the database. Reports the memory
+and tasks held while the answers wait, the time and rate of deletions with the stub bot, the amount of answers waiting
+for deletion over time, and checks that the answers left on a stop are deleted by a new scheduler.
+
+    python -m benchmarks.deleter --messages 1000 --delay 2 --batch 30
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from benchmarks.common import async_sessions
+from src.bot.deleter import DeletionScheduler
+from src.database.tables import Base
+from src.services import DeletionService
+
+
+class StubBot:
+    """A bot deleting messages after the network latency, deleted messages are counted."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.deleted = set()
+
+    async def delete_message(self, chat_id: int, message_id: int) -> bool:
+        await asyncio.sleep(self.latency)
+        self.deleted.add((chat_id, message_id))
+        return True
+
+
+async def sleeping(bot: StubBot, messages: int, delay: float) -> (float, float, int):
+    """The former way: a coroutine per answer sleeps and deletes it. Returns the time in seconds,
+    peak of allocated memory in MB and tasks alive while the answers wait."""
+    async def delete_message(chat_id: int, message_id: int) -> None:
+        await asyncio.sleep(delay)
+        await bot.delete_message(chat_id, message_id)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(delete_message(num, num)) for num in range(messages)]
+    await asyncio.sleep(0)
+    alive = len(asyncio.all_tasks())
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return elapsed, peak, alive
+
+
+async def scheduled(bot: StubBot, scheduler: DeletionScheduler, messages: int, delay: float) -> (float, float, int, list):
+    """The scheduler: answers are scheduled and one task deletes them. Returns the time in seconds,
+    peak of allocated memory in MB, tasks alive while the answers wait and the waiting answers each second."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    task = asyncio.create_task(scheduler.run(bot))
+    for num in range(messages):
+        await scheduler.schedule(num, num, delay)
+    alive = len(asyncio.all_tasks())
+    pending = list()
+    while len(bot.deleted) < messages and time.perf_counter() - start < delay + messages:
+        pending.append(scheduler.pending)
+        await asyncio.sleep(1)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    task.cancel()
+    return elapsed, peak, alive, pending
+
+
+async def restart(sessions, latency: float) -> list:
+    """Stopping the scheduler with answers waiting and deleting them by a new one. Returns the errors found."""
+    errors = list()
+    first = DeletionScheduler(DeletionService(sessions))
+    for num in range(10):
+        await first.schedule(-1, num, 0 if num < 5 else 3600)
+    bot = StubBot(latency)
+    task = asyncio.create_task(first.run(bot))
+    while len(bot.deleted) < 5:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.sleep(0.1)
+
+    second = DeletionScheduler(DeletionService(sessions))
+    task = asyncio.create_task(second.run(bot))
+    await asyncio.sleep(0.1)
+    task.cancel()
+    print(f'restart: {second.pending} of 5 answers not due yet are read by a new scheduler')
+    if second.pending != 5:
+        errors.append(f'{second.pending} answers read after a restart instead of 5')
+    if len(await DeletionService(sessions).get_all()) != 5:
+        errors.append('deleted answers are left in the database')
+    return errors
+
+
+async def compare(args: argparse.Namespace, sessions) -> list:
+    errors = list()
+    bot = StubBot(args.latency)
+    elapsed, peak, alive = await sleeping(bot, args.messages, args.delay)
+    print(f'sleeping:  {elapsed:6.2f}s, {args.messages / elapsed:7.0f} deletions/s, peak memory {peak:6.1f} MB,'
+          f' {alive} tasks while waiting')
+
+    bot = StubBot(args.latency)
+    scheduler = DeletionScheduler(DeletionService(sessions), batch=args.batch)
+    elapsed, peak, alive, pending = await scheduled(bot, scheduler, args.messages, args.delay)
+    print(f'scheduler: {elapsed:6.2f}s, {len(bot.deleted) / elapsed:7.0f} deletions/s, peak memory {peak:6.1f} MB,'
+          f' {alive} tasks while waiting')
+    print(f'waiting for deletion each second: {pending[:10]}{" ..." if len(pending) > 10 else ""}')
+    if len(bot.deleted) != args.messages:
+        errors.append(f'{len(bot.deleted)} of {args.messages} answers deleted by the scheduler')
+    if await DeletionService(sessions).get_all():
+        errors.append('deleted answers are left in the database')
+
+    errors += await restart(sessions, args.latency)
+    await sessions.kw['bind'].dispose()
+    return errors
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--messages', type=int, default=1000, help='answers to delete')
+    arg_parser.add_argument('--delay', type=float, default=2, help='SECONDS - time before the deletion')
+    arg_parser.add_argument('--batch', type=int, default=30, help='answers deleted at one time by the scheduler')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='SECONDS - answer time of the stub bot')
+    args = arg_parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "deleter.sqlite3")}')
+        Base.metadata.create_all(engine)
+        errors = asyncio.run(compare(args, async_sessions(engine)))
+        engine.dispose()
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
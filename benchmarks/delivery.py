@@ -0,0 +1,143 @@
+"""Storage and query time of the delivery modes: a 'reader_summary' row for every reader and summary
+against the delivery queue with one cursor for every reader. The check fails if a message failed before
+a sent message of the same reader is not taken again.
+
+    python -m benchmarks.delivery --readers 20000 --news 50 --languages 8
+"""
+import argparse
+import asyncio
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select, update
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import SEED_CHUNK, async_sessions, seed_readers
+from src.database import DeliveryCursor, DeliveryQueue, Reader, ReaderSummary, Summary
+from src.database.tables import Base
+from src.services import DeliveryCursorService, ReaderSummaryService, SummaryService
+
+
+def prepare_rows(engine, news: int) -> None:
+    """Rows for all news, all of them sent except the last news."""
+    for news_pk in range(1, news + 1):
+        asyncio.run(SummaryService(async_sessions(engine)).fanout(news_pk))
+    with sessionmaker(engine)() as s:
+        last = select(Summary.pk).where(Summary.news_pk == news)
+        s.execute(update(ReaderSummary).where(ReaderSummary.summary_pk.not_in(last)).values(is_sent=True))
+        s.commit()
+
+
+def prepare_cursor(engine, news: int) -> None:
+    """Queue for all news, cursors of all readers after the news before the last one."""
+    service = DeliveryCursorService(async_sessions(engine))
+    for news_pk in range(1, news + 1):
+        asyncio.run(service.enqueue(news_pk))
+    with sessionmaker(engine)() as s:
+        position = s.scalar(select(DeliveryQueue.pk).where(DeliveryQueue.news_pk == news).
+                            order_by(DeliveryQueue.pk).limit(1)) - 1
+        readers = s.scalars(select(Reader.pk)).all()
+        for start in range(0, len(readers), SEED_CHUNK):
+            s.execute(insert(DeliveryCursor), [{'reader_pk': reader_pk, 'queue_pk': position}
+                                               for reader_pk in readers[start:start + SEED_CHUNK]])
+        s.commit()
+
+
+def measure(path: Path, service_class, amount: int) -> (float, float, int):
+    """Time of taking the pending messages and of marking them sent."""
+    engine = create_engine(f'sqlite+pysqlite:///{path}')
+    service = service_class(async_sessions(engine))
+    start = time.perf_counter()
+    rows = asyncio.run(service.claim(amount=amount, age=1, lease=60))
+    query_time = time.perf_counter() - start
+    start = time.perf_counter()
+    asyncio.run(service.mark_sent(rows))
+    mark_time = time.perf_counter() - start
+    engine.dispose()
+    return query_time, mark_time, len(rows)
+
+
+async def resend_failed(path: Path, service_class) -> str or None:
+    """Sending the second of two messages of a reader and failing the first one, the failed message must be
+    taken again when the lease expires. Returns the error found."""
+    engine = create_engine(f'sqlite+pysqlite:///{path}')
+    sessions = async_sessions(engine)
+    service = service_class(sessions)
+
+    async def pending() -> list:
+        return [row async for rows in service.iter_pending(chunk=10, age=1, lease=0) for row in rows]
+
+    rows = await pending()
+    await service.mark_sent(rows[1:], failed=rows[:1])
+    again = await pending()
+    await sessions.kw['bind'].dispose()
+    engine.dispose()
+    if len(rows) != 2 or rows[0].summary_pk not in {row.summary_pk for row in again}:
+        return f'{service_class.__name__}: the failed message is not taken again'
+
+
+def vacuumed_size(path: Path) -> int:
+    engine = create_engine(f'sqlite+pysqlite:///{path}')
+    with engine.connect() as connection:
+        connection.exec_driver_sql('VACUUM')
+    engine.dispose()
+    return path.stat().st_size
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, default=20000, help='active readers')
+    arg_parser.add_argument('--news', type=int, default=50, help='news with summaries in every language')
+    arg_parser.add_argument('--languages', type=int, default=8, help='readers languages')
+    arg_parser.add_argument('--amount', type=int, default=30000, help='messages pulled at one time for sending')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp, 'base.sqlite3')
+        engine = create_engine(f'sqlite+pysqlite:///{base}')
+        Base.metadata.create_all(engine)
+        seed_readers(engine, args.readers, args.news, args.languages)
+        engine.dispose()
+        base_size = vacuumed_size(base)
+        print(f'{args.readers} readers, {args.news} news x {args.languages} languages;'
+              f' database without delivery {base_size / 2**20:.1f} MB')
+        for mode, prepare, service_class in (('rows', prepare_rows, ReaderSummaryService),
+                                             ('cursor', prepare_cursor, DeliveryCursorService)):
+            path = Path(tmp, f'{mode}.sqlite3')
+            shutil.copy(base, path)
+            engine = create_engine(f'sqlite+pysqlite:///{path}')
+            prepare(engine, args.news)
+            engine.dispose()
+            size = vacuumed_size(path) - base_size
+            query_time, mark_time, count = measure(path, service_class, args.amount)
+            print(f'{mode:7} delivery data {size / 2**20:8.2f} MB, pending query {query_time * 1000:8.1f} ms'
+                  f' ({count} messages), marking sent {mark_time * 1000:8.1f} ms')
+
+        errors = list()
+        for mode, service_class in (('rows', ReaderSummaryService), ('cursor', DeliveryCursorService)):
+            path = Path(tmp, f'{mode}-failed.sqlite3')
+            engine = create_engine(f'sqlite+pysqlite:///{path}')
+            Base.metadata.create_all(engine)
+            seed_readers(engine, readers=1, news=2, languages=1)
+            for news_pk in (1, 2):
+                if mode == 'rows':
+                    asyncio.run(SummaryService(async_sessions(engine)).fanout(news_pk))
+                else:
+                    asyncio.run(DeliveryCursorService(async_sessions(engine)).enqueue(news_pk))
+            engine.dispose()
+            errors.append(asyncio.run(resend_failed(path, service_class)))
+    errors = [error for error in errors if error]
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+    print('a failed message is taken again in both modes')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Fan-out of the summaries of one news to readers: the former ORM relationship assignment,
+loaded reader keys with a bulk insert and one 'INSERT ... SELECT' statement.
+
+    python -m benchmarks.fanout --readers 10000 100000 1000000 --languages 8
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import async_sessions, seed_readers
+from src.database import Reader, ReaderSummary, Summary, insert_or_ignore
+from src.database.tables import Base
+from src.services import SummaryService
+
+
+def orm_fanout(session) -> None:
+    """The former way: active readers of the language are loaded as objects and assigned to each summary."""
+    with session as s:
+        for summary in s.scalars(select(Summary).where(Summary.news_pk == 1)).all():
+            summary.readers = s.scalars(select(Reader).where(Reader.is_active == True,
+                                                             Reader.lang_pk == summary.lang_pk)).all()
+        s.commit()
+
+
+def bulk_fanout(session) -> None:
+    """Reader keys are loaded and the rows are written by one bulk insert."""
+    with session as s:
+        rows = list()
+        for summary_pk, lang_pk in s.execute(select(Summary.pk, Summary.lang_pk).where(Summary.news_pk == 1)).all():
+            rows.extend({'summary_pk': summary_pk, 'reader_pk': reader_pk} for reader_pk in
+                        s.scalars(select(Reader.pk).where(Reader.is_active == True, Reader.lang_pk == lang_pk)))
+        s.execute(insert_or_ignore(ReaderSummary, s, ['summary_pk', 'reader_pk']), rows)
+        s.commit()
+
+
+def timing(engine, func) -> (float, int):
+    session = sessionmaker(engine)()
+    start = time.perf_counter()
+    func(session)
+    elapsed = time.perf_counter() - start
+    with session as s:
+        count = s.query(ReaderSummary).count()
+        s.execute(delete(ReaderSummary))
+        s.commit()
+    return elapsed, count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='amounts of active readers')
+    arg_parser.add_argument('--languages', type=int, default=8, help='readers languages and summaries of the news')
+    arg_parser.add_argument('--orm-limit', type=int, default=100000,
+                            help='do not time the former ORM way above this amount of readers')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f'{"readers":>9} {"orm (former)":>14} {"bulk insert":>14} {"insert-select":>14}')
+    for readers in args.readers:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "fanout.sqlite3")}')
+            Base.metadata.create_all(engine)
+            seed_readers(engine, readers, 1, args.languages)
+            times = list()
+            if readers <= args.orm_limit:
+                times.append(timing(engine, orm_fanout))
+            else:
+                times.append(None)
+            times.append(timing(engine, bulk_fanout))
+            times.append(timing(engine, lambda _: asyncio.run(SummaryService(async_sessions(engine)).fanout(1))))
+            engine.dispose()
+        cells = [f'{item[0]:13.2f}s' if item else f'{"-":>14}' for item in times]
+        counts = {item[1] for item in times if item}
+        print(f'{readers:9} {" ".join(cells)}  rows {", ".join(map(str, counts))}')
+
+
+if __name__ == '__main__':
+    main()
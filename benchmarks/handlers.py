@@ -0,0 +1,135 @@
+"""Stress of the bot handlers: hundreds of readers start the bot at once, start it again, then choose a language,
+ask for the keyboard, block and unblock the bot concurrently. Every database operation of the services opens its own
+session from the pool, known readers and languages are taken from the bot cache. The check fails on any handler
+error or on readers left in a wrong state, the hit ratio of the cache is printed.
+
+    python -m benchmarks.handlers --readers 500
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import config
+from benchmarks.common import use_database
+
+
+class StubMessage:
+    """A message of the chat with a reader, answers of the bot are counted instead of being sent."""
+    errors = 0
+
+    def __init__(self, tg_id: int, language_code: str = 'en'):
+        self.from_user = SimpleNamespace(id=tg_id, first_name=f'reader {tg_id}', language_code=language_code)
+        self.chat = SimpleNamespace(id=tg_id)
+        self.message_id = tg_id
+
+    async def answer(self, text: str, **kwargs) -> 'StubMessage':
+        await asyncio.sleep(0)
+        return self
+
+    async def edit_text(self, text: str, **kwargs) -> 'StubMessage':
+        if text == config.bot_text['error']:
+            StubMessage.errors += 1
+        return await self.answer(text)
+
+
+async def timed(latencies: list, coroutine) -> None:
+    start = time.perf_counter()
+    await coroutine
+    latencies.append(time.perf_counter() - start)
+
+
+async def stress(readers: int) -> list:
+    """Running the phases of concurrent handler invocations. Returns the errors found."""
+    from sqlalchemy import event, func, select
+
+    from src.bot import cache, handlers
+    from src.bot.deleter import deleter
+    from src.database import AsyncSession, Language, Reader, close_db, create_db
+    from src.database.db import async_engine
+    from src.services import LanguageService
+
+    create_db()
+    await LanguageService().create_many([{'language': 'EN', 'name': 'English'}, {'language': 'DE', 'name': 'German'}])
+    connections = {'open': 0, 'peak': 0}
+
+    def checkout(*args) -> None:
+        connections['open'] += 1
+        connections['peak'] = max(connections['peak'], connections['open'])
+
+    def checkin(*args) -> None:
+        connections['open'] -= 1
+
+    event.listen(async_engine.sync_engine, 'checkout', checkout)
+    event.listen(async_engine.sync_engine, 'checkin', checkin)
+
+    def callback(tg_id: int, data: str) -> SimpleNamespace:
+        return SimpleNamespace(from_user=SimpleNamespace(id=tg_id), data=data, message=StubMessage(tg_id))
+
+    phases = {
+        'start': [handlers.get_start(StubMessage(tg_id, 'de' if tg_id % 2 else 'en'), None)
+                  for tg_id in range(readers)],
+        'again': [handlers.get_start(StubMessage(tg_id), None) for tg_id in range(readers)],
+        'mixed': [handlers.select_languages(callback(tg_id, 'language_EN'), None) if tg_id % 3 == 0 else
+                  handlers.get_languages(StubMessage(tg_id), None) if tg_id % 3 == 1 else
+                  handlers.reader_blocked_bot(StubMessage(tg_id), None)
+                  for tg_id in range(readers)],
+        'unblock': [handlers.reader_anblocked_bot(StubMessage(tg_id), None)
+                    for tg_id in range(readers) if tg_id % 6 == 2],
+    }
+    for name, coroutines in phases.items():
+        latencies = list()
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(latencies, coroutine) for coroutine in coroutines))
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+        print(f'{name:8} {len(coroutines):5} handlers {elapsed:6.2f}s, {len(coroutines) / elapsed:6.0f} handlers/s,'
+              f' p50 {p50 * 1000:6.1f} ms, p99 {p99 * 1000:6.1f} ms, connections peak {connections["peak"]}')
+        connections['peak'] = 0
+
+    for name, part in (('readers', cache.readers), ('languages', cache.languages)):
+        print(f'{name} cache: {part.stats["hits"]} hits, {part.stats["misses"]} misses, hit ratio {part.hit_ratio:.1%}')
+    print(f'{deleter.pending} answers scheduled for deletion')
+    errors = list()
+    if StubMessage.errors:
+        errors.append(f'{StubMessage.errors} handlers answered with an error')
+    async with AsyncSession() as s:
+        count = await s.scalar(select(func.count(Reader.pk)))
+        rows = (await s.execute(select(Reader.tg_id, Reader.is_active, Language.code).outerjoin(Language))).all()
+    if count != readers:
+        errors.append(f'{count} readers written for {readers} readers')
+    for tg_id, is_active, code in rows:
+        expected_code = 'EN' if tg_id % 3 == 0 or tg_id % 2 == 0 else 'DE'
+        expected_active = not (tg_id % 3 == 2 and tg_id % 6 != 2)
+        if code != expected_code or is_active != expected_active:
+            errors.append(f'reader {tg_id}: language {code}, active {is_active}')
+    await close_db()
+    return errors
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, default=500, help='readers sending updates at once')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(Path(tmp, 'handlers.sqlite3'))
+        logging.getLogger().setLevel(logging.WARNING)
+        errors = asyncio.run(stress(args.readers))
+        from src.database.db import engine
+        engine.dispose()
+    for error in errors[:20]:
+        print(error)
+    if errors:
+        print(f'{len(errors)} errors.')
+        sys.exit(1)
+    print('ok')
+
+
+if __name__ == '__main__':
+    main()
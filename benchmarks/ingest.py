@@ -0,0 +1,87 @@
+"""Stages of the news ingest on a synthetic XML-file of configurable size:
+parse, dedupe against stored URLs, merge of new URLs with their dates and insert.
+
+    python -m benchmarks.ingest --entries 5000 --stored 100000 --new 1.0
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from benchmarks.common import async_sessions, seed_urls
+from benchmarks.sitemap_parse import write_sitemap
+from src.database.tables import Base
+from src.news.app import read_records
+from src.news.sitemap import iter_sitemap
+from src.services import NewsService
+
+
+def nested_merge(last_urls: set, url_and_date: list) -> set:
+    """The former merge: every new URL is searched in the whole list of links and dates."""
+    res = set()
+    for last_url in last_urls:
+        for u_d in url_and_date:
+            if u_d[0] == last_url:
+                res.add(u_d)
+    return res
+
+
+class Stages:
+    """Timing of named stages."""
+    def __init__(self):
+        self.times = dict()
+
+    def run(self, name: str, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        self.times[name] = time.perf_counter() - start
+        return result
+
+    def print(self) -> None:
+        for name, elapsed in self.times.items():
+            print(f'{name:16} {elapsed * 1000:10.1f} ms')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--entries', type=int, default=5000, help='records in the XML-file')
+    arg_parser.add_argument('--stored', type=int, default=100000, help='URLs already stored in the database')
+    arg_parser.add_argument('--new', type=float, default=1.0, help='share of new URLs in the XML-file')
+    arg_parser.add_argument('--skip-nested', action='store_true', help='do not time the former nested-loop merge')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sitemap = Path(tmp, 'sitemap.xml')
+        write_sitemap(sitemap, args.entries)
+        engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "ingest.sqlite3")}')
+        Base.metadata.create_all(engine)
+        seed_urls(engine, args.stored)
+        service = NewsService(async_sessions(engine))
+        known = int(args.entries * (1 - args.new))
+        asyncio.run(service.create_many([{'url': f'https://example.com/news/{num}-some-news-title/'}
+                                         for num in range(known)], 'EN', has_summary=True, has_summaries=True))
+
+        stages = Stages()
+        url_data, _ = stages.run('parse', lambda: read_records(list(iter_sitemap(sitemap))))
+        new_urls = stages.run('dedupe', lambda: asyncio.run(service.get_new_urls(url_data)))
+        last_url_data = stages.run('merge', lambda: {url: day for url, day in url_data.items() if url in new_urls})
+        if not args.skip_nested:
+            stages.run('merge (nested)', nested_merge, new_urls, list(url_data.items()))
+        rows = [{'url': url,
+                 'day': datetime.datetime.fromisoformat(day),
+                 'content': ''} for url, day in last_url_data.items()]
+        inserted, skipped = stages.run('insert', lambda: asyncio.run(service.create_many(rows, 'EN', False, False)))
+        engine.dispose()
+
+    print(f'{args.entries} records, {len(new_urls)} new, {args.stored} stored; {len(inserted)} inserted')
+    stages.print()
+
+
+if __name__ == '__main__':
+    main()
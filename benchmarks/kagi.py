@@ -0,0 +1,80 @@
+"""Summaries per minute against a local mock of KAGI API:
+the former serial path (blocking requests + pause before each news) against the pooled async client.
+
+    python -m benchmarks.kagi --items 40 --latency 2 --sleep 1 --concurrency 8 --rate 4 --errors 0.05
+"""
+import argparse
+import asyncio
+import logging
+import random
+import time
+
+import requests
+from aiohttp import web
+
+from benchmarks.stub import StubServer
+from config import KAGI
+from src.summary.app import Summary
+
+
+def make_app(latency: float, errors: float) -> web.Application:
+    """Mock of KAGI summarization: answers after the latency, a share of the answers is 503."""
+    async def summarize(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        if random.random() < errors:
+            return web.Response(status=503)
+        return web.json_response({'meta': {'api_balance': 100},
+                                  'data': {'output': f'Summary of {request.query["url"]}.'}})
+
+    app = web.Application()
+    app.router.add_get(KAGI['summary_endpoint'], summarize)
+    return app
+
+
+def serial_summaries(url: str, links: list, pause: float) -> int:
+    """The former way: one news after another, a new blocking request with a pause before each."""
+    count = 0
+    for link in links:
+        time.sleep(pause)
+        response = requests.get(url + KAGI['summary_endpoint'], params={'url': link, 'target_language': 'EN'})
+        if response.status_code == 200:
+            count += 1
+    return count
+
+
+async def pooled_summaries(url: str, links: list, concurrency: int, rate: float) -> int:
+    """The client way: all news concurrently through one keep-alive session."""
+    async with Summary(url=url, concurrency=concurrency, rate=rate, timeout=30, retries=3) as kagi:
+        results = await asyncio.gather(*(kagi.get_summary(link, 'EN') for link in links))
+    return sum(map(bool, results))
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--items', type=int, default=40, help='number of news to summarize')
+    arg_parser.add_argument('--latency', type=float, default=2, help='SECONDS - mock response latency')
+    arg_parser.add_argument('--sleep', type=float, default=1, help='SECONDS - pause before each news in the serial path')
+    arg_parser.add_argument('--concurrency', type=int, default=8, help='simultaneous requests of the client')
+    arg_parser.add_argument('--rate', type=float, default=4, help='REQUESTS PER SECOND - rate limit of the client')
+    arg_parser.add_argument('--errors', type=float, default=0.05, help='share of 503 answers of the mock')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    links = [f'https://example.com/news/{num}' for num in range(args.items)]
+    with StubServer(make_app(args.latency, args.errors)) as server:
+        start = time.perf_counter()
+        serial_count = serial_summaries(server.urls[0], links, args.sleep)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pooled_count = asyncio.run(pooled_summaries(server.urls[0], links, args.concurrency, args.rate))
+        pooled_time = time.perf_counter() - start
+
+    print(f'{args.items} news, latency {args.latency}s, {args.errors:.0%} of 503 answers')
+    print(f'serial: {serial_time:8.2f}s  {serial_count} summaries, {serial_count * 60 / serial_time:6.1f}/min')
+    print(f'pooled: {pooled_time:8.2f}s  {pooled_count} summaries, {pooled_count * 60 / pooled_time:6.1f}/min'
+          f'  (concurrency {args.concurrency}, rate {args.rate}/s)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Stall of the event loop during the fan-out of one news to readers: the former synchronous session
+run on the event loop against the asynchronous session. A ticker awaits 'sleep(TICK)' meanwhile and
+its lateness is the time other coroutines (polling, sending) could not run.
+
+    python -m benchmarks.loop_stall --readers 10000 100000 --languages 8
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, literal, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import async_sessions, seed_readers
+from src.database import Reader, ReaderSummary, Summary, insert_or_ignore
+from src.database.tables import Base
+from src.services import SummaryService
+
+
+TICK: float = 0.005  # SECONDS - period of the ticker
+
+
+async def sync_fanout(session, news_pk: int) -> int:
+    """The former way: the same statement executed by a synchronous session inside a coroutine."""
+    recipients = select(Summary.pk, Reader.pk, literal(False)).\
+        join(Reader, Reader.lang_pk == Summary.lang_pk).\
+        where(Summary.news_pk == news_pk, Reader.is_active == True)
+    with session as s:
+        stmt = insert_or_ignore(ReaderSummary, s, ['summary_pk', 'reader_pk']).\
+            from_select(['summary_pk', 'reader_pk', 'is_sent'], recipients)
+        count = s.execute(stmt).rowcount
+        s.commit()
+    return count
+
+
+async def ticker(stalls: list) -> None:
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        stalls.append(time.perf_counter() - start - TICK)
+
+
+async def measure(coroutine) -> (float, list):
+    """Time of the fan-out and the lateness of every tick while it runs."""
+    stalls = list()
+    task = asyncio.create_task(ticker(stalls))
+    await asyncio.sleep(TICK)
+    start = time.perf_counter()
+    await coroutine
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(2 * TICK)  # the tick held up by the fan-out is counted
+    task.cancel()
+    return elapsed, sorted(stalls) or [0]
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, nargs='+', default=[10000, 100000], help='amounts of active readers')
+    arg_parser.add_argument('--languages', type=int, default=8, help='readers languages')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f'{"readers":>8} {"session":8} {"fan-out":>9} {"ticks":>6} {"p99 stall":>10} {"max stall":>10}')
+    for readers in args.readers:
+        for name in ('sync', 'async'):
+            with tempfile.TemporaryDirectory() as tmp:
+                engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "stall.sqlite3")}')
+                Base.metadata.create_all(engine)
+                seed_readers(engine, readers, 1, args.languages)
+                if name == 'sync':
+                    coroutine = sync_fanout(sessionmaker(engine)(), 1)
+                else:
+                    coroutine = SummaryService(async_sessions(engine)).fanout(1)
+                elapsed, stalls = asyncio.run(measure(coroutine))
+                engine.dispose()
+            print(f'{readers:8} {name:8} {elapsed * 1000:7.0f}ms {len(stalls):6}'
+                  f' {stalls[int(len(stalls) * 0.99)] * 1000:8.1f}ms {stalls[-1] * 1000:8.1f}ms')
+
+
+if __name__ == '__main__':
+    main()
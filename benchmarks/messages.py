@@ -0,0 +1,91 @@
+"""Memory and time of preparing one portion of messages for sending: the former query with the summary text
+in every row and rendering for every message against summary keys in the rows and the rendered message cache.
+
+    python -m benchmarks.messages --readers 30000 --news 2 --languages 8
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import async_sessions, seed_readers
+from config import bot_text
+from src.bot.messages import MessageCache
+from src.database import News, Reader, ReaderSummary, Summary
+from src.database.tables import Base
+from src.services import NewsService, ReaderSummaryService, SummaryService
+
+
+def former(engine, amount: int) -> list:
+    """The former way: the summary text is read for every row and the message is rendered for every reader."""
+    stmt = select(ReaderSummary.pk, Summary.content, Summary.news_pk, Reader.tg_id).\
+        join(Summary).join(Reader).join(News).\
+        where(ReaderSummary.is_sent == False).\
+        order_by(Summary.news_pk).\
+        limit(amount)
+    with sessionmaker(engine)() as s:
+        rows = s.execute(stmt).fetchall()
+    newses = asyncio.run(NewsService(async_sessions(engine)).get_news_by_pks({row[2] for row in rows}))
+    messages = list()
+    for num, row in enumerate(rows):
+        news = newses[row[2]]
+        news_day = news.day.strftime('%Y-%m-%d %H:%M') if news.day else ''
+        messages.append((num, row[3], bot_text['sending_summary'].format(row[1], news_day, news.url)))
+    return [rows, messages]
+
+
+def cached(engine, amount: int) -> list:
+    """Keys of summaries in the rows, messages are taken from the cache."""
+    sessions = async_sessions(engine)
+    rows = asyncio.run(ReaderSummaryService(sessions).claim(amount=amount, age=1, lease=0))
+    cache = MessageCache(SummaryService(sessions))
+    summaries = asyncio.run(cache.get_many({row.summary_pk for row in rows}))
+    messages = [(num, row.tg_id, summaries[row.summary_pk][0]) for num, row in enumerate(rows)]
+    return [rows, messages, cache]
+
+
+def measure(engine, func, amount: int) -> (float, int, int):
+    """Time of preparing the portion, then memory held by the portion and the peak while preparing it."""
+    start = time.perf_counter()
+    func(engine, amount)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    data = func(engine, amount)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return elapsed, held, peak
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, default=30000, help='active readers')
+    arg_parser.add_argument('--news', type=int, default=2, help='news with summaries in every language')
+    arg_parser.add_argument('--languages', type=int, default=8, help='readers languages')
+    arg_parser.add_argument('--amount', type=int, default=30000, help='messages pulled at one time for sending')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "messages.sqlite3")}')
+        Base.metadata.create_all(engine)
+        seed_readers(engine, args.readers, args.news, args.languages)
+        for news_pk in range(1, args.news + 1):
+            asyncio.run(SummaryService(async_sessions(engine)).fanout(news_pk))
+        print(f'portion of {args.amount} messages, {args.readers} readers, {args.news} news x {args.languages}'
+              f' languages')
+        for name, func in (('former', former), ('cached', cached)):
+            elapsed, held, peak = measure(engine, func, args.amount)
+            print(f'{name:7} {elapsed * 1000:8.1f} ms, portion holds {held / 2**20:6.1f} MB,'
+                  f' peak {peak / 2**20:6.1f} MB')
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""Memory of reading the backlog of not-sent messages: the former portion of 'LIMIT 30000' read by 'fetchall()'
+against draining the whole backlog by leased chunks, marking each chunk sent before taking the next.
+
+    python -m benchmarks.pending --readers 10000 50000 --news 4 --chunk 1000
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import async_sessions, seed_readers
+from src.database import News, Reader, ReaderSummary, Summary
+from src.database.tables import Base
+from src.services import ReaderSummaryService, SummaryService
+
+
+FORMER_AMOUNT: int = 30000  # the former portion of sending
+
+
+def former(session) -> int:
+    """The former portion: the summary text in every row, all rows loaded at once."""
+    stmt = select(ReaderSummary.pk, Summary.content, Summary.news_pk, Reader.tg_id).\
+        join(Summary).join(Reader).join(News).\
+        where(ReaderSummary.is_sent == False).\
+        order_by(Summary.news_pk).\
+        limit(FORMER_AMOUNT)
+    with session as s:
+        return len(s.execute(stmt).fetchall())
+
+
+async def drain(sessions, chunk: int) -> int:
+    service = ReaderSummaryService(sessions)
+    count = 0
+    async for rows in service.iter_pending(chunk=chunk, age=1):
+        count += len(rows)
+        await service.mark_sent(rows)
+    return count
+
+
+def measure(func) -> (float, int, int):
+    """Time, peak memory and the amount of read rows."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, nargs='+', default=[10000, 50000], help='amounts of active readers')
+    arg_parser.add_argument('--news', type=int, default=4, help='news with summaries in every language')
+    arg_parser.add_argument('--languages', type=int, default=8, help='readers languages')
+    arg_parser.add_argument('--chunk', type=int, default=1000, help='rows of one chunk')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    print(f'{"backlog":>9} {"former portion":>28} {"streaming drain":>30}')
+    for readers in args.readers:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f'sqlite+pysqlite:///{Path(tmp, "pending.sqlite3")}')
+            Base.metadata.create_all(engine)
+            seed_readers(engine, readers, args.news, args.languages)
+            for news_pk in range(1, args.news + 1):
+                asyncio.run(SummaryService(async_sessions(engine)).fanout(news_pk))
+            cells = list()
+            for func in (lambda: former(sessionmaker(engine)()),
+                         lambda: asyncio.run(drain(async_sessions(engine), args.chunk))):
+                elapsed, peak, count = measure(func)
+                cells.append(f'{count:7} rows {elapsed:6.2f}s peak {peak / 2**20:6.1f} MB')
+            engine.dispose()
+        print(f'{readers * args.news:9} {"  ".join(cells)}')
+
+
+if __name__ == '__main__':
+    main()
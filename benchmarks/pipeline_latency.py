@@ -0,0 +1,84 @@
+"""Latency from writing news to the database to sending their summaries through the whole pipeline
+(summarize, translate, fanout, sending in debug mode): stages woken by timers only against the event bus.
+
+    python -m benchmarks.pipeline_latency --news 10 --interval 1 --poll 5 --sending 5
+"""
+import argparse
+import asyncio
+import datetime
+import logging
+import random
+import tempfile
+from pathlib import Path
+
+import config
+from benchmarks.common import use_database
+
+
+async def run(mode: str, args: argparse.Namespace, first_num: int) -> None:
+    from src.bot import app as bot_app
+    from src.events import bus
+    from src.jobs import jobs
+    from src.metrics import Histogram
+    from src.services import JobService, NewsService
+
+    bus.enabled = mode == 'events'
+    bot_app.delivery_latency = Histogram((0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120))
+    tasks = [asyncio.create_task(jobs(age=1)),
+             asyncio.create_task(bot_app.sending_msg(None, args.sending, amount=1000, age=1))]
+    for num in range(first_num, first_num + args.news):
+        await asyncio.sleep(random.uniform(0, 2 * args.interval))
+        pks, _ = await NewsService().create_many([{'url': f'https://example.com/news/{num}',
+                                                   'day': datetime.datetime.now(), 'content': ''}],
+                                                 'EN', has_summary=False, has_summaries=False)
+        if await JobService().enqueue_many('summarize', pks):
+            bus.publish('summarize')
+    expected = args.news * args.readers
+    # the sender sends one news per pass, so with timers a news also waits for the passes of the news before it
+    for _ in range(int(10 * (3 * args.poll + (args.news + 1) * args.sending))):
+        if bot_app.delivery_latency.count >= expected:
+            break
+        await asyncio.sleep(0.1)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    print(f'{mode:7} {bot_app.delivery_latency}')
+
+
+async def compare(args: argparse.Namespace) -> None:
+    from src.database import Reader, Session, close_db, create_db
+    from src.services import LanguageService
+
+    create_db()
+    await LanguageService().create_many([{'language': 'EN', 'name': 'English'}, {'language': 'DE', 'name': 'German'}])
+    with Session() as s:
+        s.add_all(Reader(tg_id=num, lang_pk=num % 2 + 1) for num in range(args.readers))
+        s.commit()
+    print(f'{args.news} news, {args.readers} readers, timers: jobs {args.poll}s, sending {args.sending}s;'
+          f' latency in seconds')
+    await run('timers', args, 0)
+    await run('events', args, args.news)
+    await close_db()
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--news', type=int, default=10, help='news written in each run')
+    arg_parser.add_argument('--interval', type=float, default=1, help='SECONDS - average break between news')
+    arg_parser.add_argument('--readers', type=int, default=4, help='active readers')
+    arg_parser.add_argument('--poll', type=float, default=5, help='SECONDS - timer of the job workers')
+    arg_parser.add_argument('--sending', type=float, default=5, help='SECONDS - timer of the sender')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(Path(tmp, 'pipeline.sqlite3'))
+        config.MY_DEBUG = True
+        config.JOBS.update(poll=args.poll, report=3600)
+        logging.getLogger().setLevel(logging.WARNING)
+        asyncio.run(compare(args))
+        from src.database.db import engine
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    main()
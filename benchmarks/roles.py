@@ -0,0 +1,129 @@
+"""Several sender processes on one database: the backlog of not-sent messages is drained by 1 and by several
+processes in both delivery modes, each process leasing its messages. Reports the time and messages per second,
+and the check fails if a message is sent twice or not sent. A sender stopped after taking a chunk leaves its
+messages leased, they are sent by the other senders when the lease expires.
+
+    python -m benchmarks.roles --readers 2000 --news 5 --senders 1 4 --latency 0.001
+"""
+import argparse
+import asyncio
+import logging
+import shutil
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+from sqlalchemy import create_engine
+
+from benchmarks.common import async_sessions, seed_readers
+from src.database.tables import Base
+from src.services import DeliveryCursorService, ReaderSummaryService, SummaryService
+
+
+SERVICES: dict = {'rows': ReaderSummaryService, 'cursor': DeliveryCursorService}  # delivery mode: its service
+
+
+async def drain(url: str, mode: str, chunk: int, latency: float, lease: float, stop_after: int) -> list:
+    """The loop of one sender: taking chunks of messages, 'sending' them for 'latency' seconds a message
+    and marking them sent until no messages are left for longer than the lease.
+    With 'stop_after' the sender stops after taking so many chunks without marking the last one sent.
+    Returns pairs (tg_id, summary_pk) of the sent messages."""
+    sessions = async_sessions(create_engine(url))
+    service = SERVICES[mode](sessions)
+    sent = list()
+    taken = 0
+    idle_since = time.perf_counter()
+    while time.perf_counter() - idle_since < lease + 0.5:
+        async for rows in service.iter_pending(chunk=chunk, age=1, lease=lease):
+            taken += 1
+            if taken == stop_after:
+                await sessions.kw['bind'].dispose()
+                return sent
+            await asyncio.sleep(latency * len(rows))
+            sent += [(row.tg_id, row.summary_pk) for row in rows]
+            await service.mark_sent(rows)
+            idle_since = time.perf_counter()
+        await asyncio.sleep(0.05)
+    await sessions.kw['bind'].dispose()
+    return sent
+
+
+def run_sender(*args) -> list:
+    logging.getLogger().setLevel(logging.WARNING)
+    return asyncio.run(drain(*args))
+
+
+def prepare(path: Path, mode: str, news: int) -> None:
+    """Messages of all news not sent to any reader."""
+    engine = create_engine(f'sqlite+pysqlite:///{path}')
+    with engine.connect() as connection:
+        connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+    sessions = async_sessions(engine)
+    for news_pk in range(1, news + 1):
+        if mode == 'rows':
+            asyncio.run(SummaryService(sessions).fanout(news_pk))
+        else:
+            asyncio.run(DeliveryCursorService(sessions).enqueue(news_pk))
+    engine.dispose()
+
+
+def run(path: Path, mode: str, senders: int, stopped: int, args: argparse.Namespace) -> (float, Counter):
+    """Draining the backlog by the sender processes, 'stopped' of them stop after the first chunk.
+    Returns the time and the count of sending of every message."""
+    url = f'sqlite+pysqlite:///{path}'
+    with ProcessPoolExecutor(senders, mp_context=get_context('spawn')) as pool:
+        start = time.perf_counter()
+        futures = [pool.submit(run_sender, url, mode, args.chunk, args.latency, args.lease, 1 if num < stopped else 0)
+                   for num in range(senders)]
+        sent = Counter(pair for future in futures for pair in future.result())
+        elapsed = time.perf_counter() - start - args.lease - 0.5
+    return elapsed, sent
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, default=2000, help='active readers')
+    arg_parser.add_argument('--news', type=int, default=5, help='news with summaries in every language')
+    arg_parser.add_argument('--languages', type=int, default=4, help='readers languages')
+    arg_parser.add_argument('--senders', type=int, nargs='+', default=[1, 4], help='amounts of sender processes')
+    arg_parser.add_argument('--chunk', type=int, default=500, help='messages or readers taken at one time')
+    arg_parser.add_argument('--latency', type=float, default=0.001, help='SECONDS - sending time of one message')
+    arg_parser.add_argument('--lease', type=float, default=5,
+                            help='SECONDS - lease of the taken messages, longer than sending a chunk')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    errors = list()
+    expected = args.readers * args.news
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp, 'base.sqlite3')
+        engine = create_engine(f'sqlite+pysqlite:///{base}')
+        Base.metadata.create_all(engine)
+        seed_readers(engine, args.readers, args.news, args.languages)
+        engine.dispose()
+        print(f'{expected} messages to {args.readers} readers')
+        for mode in SERVICES:
+            runs = [(senders, 0) for senders in args.senders] + [(max(args.senders), 1)]
+            for senders, stopped in runs:
+                path = Path(tmp, f'{mode}-{senders}-{stopped}.sqlite3')
+                shutil.copy(base, path)
+                prepare(path, mode, args.news)
+                elapsed, sent = run(path, mode, senders, stopped, args)
+                twice = sum(1 for count in sent.values() if count > 1)
+                print(f'{mode:7} {senders} senders{f", {stopped} stopped" if stopped else "":11} {elapsed:6.2f}s,'
+                      f' {sum(sent.values()) / elapsed:7.0f} messages/s, {len(sent)} sent, {twice} sent twice')
+                if twice or len(sent) != expected:
+                    errors.append(f'{mode} with {senders} senders: {len(sent)} of {expected} messages sent,'
+                                  f' {twice} sent twice')
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""Sending summaries of several news to readers through a stub of the Telegram API: the former sequential
+loop (one news per pass, 'sleep(1)' after 30 messages) against the pool of senders within the rate limits.
+
+    python -m benchmarks.sender --readers 200 --news 3 --latency 0.05
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter, deque
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from config import SENDER, WAIT_FOR
+from src.bot.sender import Sender
+
+
+class StubBot:
+    """Answers 'send_message' after the network latency and checks the Telegram limits like the API does:
+    above 'rate' messages in the last second or two messages to one chat within a second the answer
+    is 'retry_after'."""
+    def __init__(self, latency: float, rate: float, retry_after: int = 1):
+        self.latency = latency
+        self.rate = rate
+        self.retry_after = retry_after
+        self.sent = deque()
+        self.chats = dict()
+        self.stats = Counter()
+
+    async def send_message(self, chat_id: int, text: str, **kwargs) -> None:
+        await asyncio.sleep(self.latency)
+        now = time.monotonic()
+        while self.sent and self.sent[0] <= now - 1:
+            self.sent.popleft()
+        if len(self.sent) >= self.rate or now - self.chats.get(chat_id, -1) < 1:
+            self.stats['retry_after'] += 1
+            raise TelegramRetryAfter(SendMessage(chat_id=chat_id, text=text), 'Too Many Requests',
+                                     self.retry_after)
+        self.sent.append(now)
+        self.chats[chat_id] = now
+        self.stats['sent'] += 1
+
+
+async def former(bot: StubBot, messages: list) -> float:
+    """The former loop: messages are sent one by one with a pause of a second after every 30 messages."""
+    start = time.perf_counter()
+    count = 0
+    for _, tg_id, text in messages:
+        if count > 30:
+            await asyncio.sleep(1)
+            count = 0
+        try:
+            await bot.send_message(tg_id, text=text)
+        except TelegramRetryAfter:
+            pass
+        count += 1
+    return time.perf_counter() - start
+
+
+async def pool(bot: StubBot, messages: list) -> float:
+    sender = Sender(bot, dummy=False)
+    start = time.perf_counter()
+    await sender.send_all(messages)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--readers', type=int, default=200, help='active readers')
+    arg_parser.add_argument('--news', type=int, default=3, help='news with a summary for every reader')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='SECONDS - answer time of the stub API')
+    args = arg_parser.parse_args()
+    logging.getLogger().setLevel(logging.ERROR)
+
+    messages = [(num, tg_id, 'summary text') for num, (_, tg_id) in
+                enumerate((news, tg_id) for news in range(args.news) for tg_id in range(args.readers))]
+    print(f'{len(messages)} messages: {args.news} news x {args.readers} readers, API latency {args.latency}s,'
+          f' limit {SENDER["rate"]} messages/s')
+    for name, func in (('former', former), ('pool', pool)):
+        bot = StubBot(args.latency, SENDER['rate'])
+        elapsed = asyncio.run(func(bot, messages))
+        text = f'{name:7} {elapsed:7.1f}s sending, {bot.stats["sent"] / elapsed:5.1f} messages/s,' \
+               f' {bot.stats["sent"]} sent, {bot.stats["retry_after"]} answers retry_after'
+        if name == 'former':
+            # the former loop stopped at the next news and waited for the next pass of the sender
+            text += f'; with one news per pass {elapsed + (args.news - 1) * WAIT_FOR["sending"]:.0f}s'
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Parsing a large news XML-file: the whole-document BeautifulSoup way against the streaming reader.
+Each way runs in a separate process to measure its peak RSS.
+
+    python -m benchmarks.sitemap_parse --entries 50000
+"""
+import argparse
+import datetime
+import hashlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bs4 import BeautifulSoup
+
+from src.news.sitemap import iter_sitemap
+
+
+def write_sitemap(path: Path, entries: int) -> None:
+    """Writing a synthetic news XML-file with namespaces, images and publication dates."""
+    day = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+    with open(path, mode='w', encoding='utf-8') as file:
+        file.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                   '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+                   ' xmlns:news="http://www.google.com/schemas/sitemap-news/0.9"'
+                   ' xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">\n')
+        for num in range(entries):
+            date = (day + datetime.timedelta(minutes=num)).isoformat()
+            lastmod = f'<lastmod>{date}</lastmod>' if num % 2 else ''
+            file.write(f'<url><loc>https://Example.com/news/{num}-Some-News-Title/</loc>{lastmod}'
+                       f'<news:news><news:publication><news:name>Example</news:name>'
+                       f'<news:language>en</news:language></news:publication>'
+                       f'<news:publication_date>{date}</news:publication_date>'
+                       f'<news:title>Title of the news number {num}</news:title></news:news>'
+                       f'<image:image><image:loc>https://example.com/img/{num}.jpg</image:loc></image:image>'
+                       f'</url>\n')
+        file.write('</urlset>\n')
+
+
+def soup_parse(path: Path) -> list:
+    """The former way: the whole document in BeautifulSoup and searching each record in it."""
+    with open(path, encoding='utf-8') as file:
+        soup = BeautifulSoup(file.read(), features='xml')
+    data_list = list()
+    for link in soup.find_all('url'):
+        url = link.find('loc')
+        if url:
+            date = link.find('lastmod')
+            if not date:
+                date = link.find('news:publication_date')
+            if date:
+                date = date.text
+            else:
+                date = '1970-01-01T00:00:00+00:00'
+            data_list.append((url.text.lower(), date))
+    return data_list
+
+
+def stream_parse(path: Path) -> list:
+    """The streaming reader way."""
+    return [(url.lower(), date) for kind, url, date in iter_sitemap(path) if kind == 'url']
+
+
+def worker(way: str, path: Path) -> None:
+    """Parsing in this process and printing time, peak RSS and digest of the result."""
+    start = time.perf_counter()
+    data_list = {'soup': soup_parse, 'stream': stream_parse}[way](path)
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    digest = hashlib.sha1(repr(data_list).encode()).hexdigest()
+    print(f'{elapsed} {peak} {len(data_list)} {digest}')
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--entries', type=int, default=50000, help='records in the XML-file')
+    arg_parser.add_argument('--worker', nargs=2, metavar=('WAY', 'PATH'), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+    if args.worker:
+        worker(args.worker[0], Path(args.worker[1]))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp, 'news-sitemap.xml')
+        write_sitemap(path, args.entries)
+        size = path.stat().st_size / 2**20
+        print(f'{args.entries} records, {size:.1f} MB')
+        digests = set()
+        for way in ('soup', 'stream'):
+            output = subprocess.run([sys.executable, '-m', 'benchmarks.sitemap_parse', '--worker', way, str(path)],
+                                    capture_output=True, text=True, check=True).stdout.split()
+            elapsed, peak, count, digest = float(output[0]), float(output[1]), int(output[2]), output[3]
+            digests.add(digest)
+            print(f'{way:8} {elapsed:8.2f}s  peak RSS {peak:8.1f} MB  ({count} records)')
+    print('outputs are identical' if len(digests) == 1 else 'OUTPUTS DIFFER')
+
+
+if __name__ == '__main__':
+    main()
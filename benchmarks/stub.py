@@ -0,0 +1,40 @@
+"""Local stub HTTP server running in a background thread for benchmarks."""
+import asyncio
+import socket
+import threading
+
+from aiohttp import web
+
+
+def free_port() -> int:
+    """Finding a free local TCP port."""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Serving an aiohttp application on one or several local ports in a separate thread with its own loop.
+    Each port is seen by clients as a separate host."""
+    def __init__(self, app: web.Application, ports: int = 1):
+        self.app = app
+        self.ports = [free_port() for _ in range(ports)]
+        self.urls = [f'http://127.0.0.1:{port}' for port in self.ports]
+        self.loop = asyncio.new_event_loop()
+        self.runner = web.AppRunner(app, access_log=None)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+
+    async def _start(self) -> None:
+        await self.runner.setup()
+        for port in self.ports:
+            await web.TCPSite(self.runner, '127.0.0.1', port).start()
+
+    def __enter__(self):
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result()
+        return self
+
+    def __exit__(self, *args) -> None:
+        asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
@@ -0,0 +1,174 @@
+"""Load of the webhook server: synthetic updates (/start, plain messages, language selection) are posted
+to the local endpoint with the secret token, the Telegram API is a local stub. Reports the handler latency
+from receiving an update to the end of its handling, updates per second, rejected requests without the token
+and updates drained on shutdown.
+
+    python -m benchmarks.webhook --updates 2000 --readers 500 --concurrency 100
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import aiohttp
+from aiohttp import web
+
+import config
+from benchmarks.common import use_database
+from benchmarks.stub import StubServer, free_port
+
+
+SECRET: str = 'benchmark-secret'
+TOKEN: str = '123456:benchmark'
+
+
+def make_api(latency: float) -> web.Application:
+    """The stub of the Telegram Bot API answering every method after the network latency."""
+    async def method(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        data = await request.post()
+        name = request.match_info['method']
+        if name == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'stub', 'username': 'stub_bot'}
+        elif name in ('sendMessage', 'editMessageText'):
+            result = {'message_id': 1, 'date': 0, 'chat': {'id': int(data.get('chat_id', 1)), 'type': 'private'},
+                      'text': data.get('text', '')}
+        else:
+            result = True
+        return web.json_response({'ok': True, 'result': result})
+
+    app = web.Application()
+    app.router.add_post('/bot{token}/{method}', method)
+    return app
+
+
+def make_update(num: int, tg_id: int) -> dict:
+    """A message /start, a plain message or a choice of the language, by turns."""
+    user = {'id': tg_id, 'is_bot': False, 'first_name': f'reader {tg_id}', 'language_code': 'en'}
+    message = {'message_id': num, 'date': int(time.time()), 'chat': {'id': tg_id, 'type': 'private'}, 'from': user}
+    if num % 3 == 0:
+        return {'update_id': num, 'message': {**message, 'text': '/start',
+                                              'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}]}}
+    if num % 3 == 1:
+        return {'update_id': num, 'message': {**message, 'text': 'hello'}}
+    return {'update_id': num, 'callback_query': {'id': str(num), 'from': user, 'chat_instance': '1',
+                                                 'data': 'language_DE', 'message': {**message, 'text': 'choose'}}}
+
+
+async def post_all(url: str, updates: list, concurrency: int, secret: str) -> list:
+    """Posting the updates with the number of simultaneous requests. Returns the response statuses."""
+    statuses = list()
+    queue = asyncio.Queue()
+    for update in updates:
+        queue.put_nowait(update)
+
+    async def work(session: aiohttp.ClientSession) -> None:
+        while not queue.empty():
+            update = queue.get_nowait()
+            try:
+                async with session.post(url, data=json.dumps(update), headers={
+                        'Content-Type': 'application/json', 'X-Telegram-Bot-Api-Secret-Token': secret}) as response:
+                    statuses.append(response.status)
+            except aiohttp.ClientError:
+                statuses.append(0)
+
+    async with aiohttp.ClientSession() as session:
+        await asyncio.gather(*(work(session) for _ in range(concurrency)))
+    return statuses
+
+
+async def load(args: argparse.Namespace, api_url: str) -> list:
+    """Serving the webhook and posting the updates to it. Returns the errors found."""
+    from aiogram import Bot, Dispatcher
+    from aiogram.client.session.aiohttp import AiohttpSession
+    from aiogram.client.telegram import TelegramAPIServer
+
+    from src.bot.handlers import router
+    from src.bot.webhook import WebhookHandler, create_app
+    from src.database import close_db, create_db
+    from src.services import LanguageService
+
+    class TimedHandler(WebhookHandler):
+        def __init__(self, *a, **kw):
+            super().__init__(*a, **kw)
+            self.seconds = list()
+
+        def handled(self, seconds: float) -> None:
+            super().handled(seconds)
+            self.seconds.append(seconds)
+
+    create_db()
+    await LanguageService().create_many([{'language': 'EN', 'name': 'English'}, {'language': 'DE', 'name': 'German'}])
+    bot = Bot(TOKEN, session=AiohttpSession(api=TelegramAPIServer.from_base(api_url)), parse_mode='HTML')
+    dp = Dispatcher()
+    dp.include_router(router)
+    handler = TimedHandler(dp, bot, secret_token=SECRET)
+    runner = web.AppRunner(create_app(bot, dp, handler, path='/webhook'), access_log=None)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    url = f'http://127.0.0.1:{port}/webhook'
+    errors = list()
+
+    updates = [make_update(num, num % args.readers) for num in range(args.updates)]
+    start = time.perf_counter()
+    statuses = await post_all(url, updates, args.concurrency, SECRET)
+    posted = time.perf_counter() - start
+    while len(handler.seconds) < len(updates) and time.perf_counter() - start < 120:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    seconds = sorted(handler.seconds)
+    print(f'{len(updates)} updates from {args.readers} readers, {args.concurrency} simultaneous requests,'
+          f' Telegram API latency {args.latency}s')
+    print(f'posted in {posted:.2f}s ({len(updates) / posted:.0f} updates/s), handled in {elapsed:.2f}s'
+          f' ({len(seconds) / elapsed:.0f} updates/s); handler latency p50 {seconds[len(seconds) // 2] * 1000:.1f} ms,'
+          f' p99 {seconds[int(len(seconds) * 0.99)] * 1000:.1f} ms, max {seconds[-1] * 1000:.1f} ms')
+    if statuses.count(200) != len(updates) or len(seconds) != len(updates):
+        errors.append(f'{statuses.count(200)} updates accepted, {len(seconds)} handled of {len(updates)}')
+
+    rejected = await post_all(url, updates[:10], 10, 'wrong-secret')
+    print(f'{rejected.count(401)} of {len(rejected)} updates with a wrong secret token rejected')
+    if rejected.count(401) != len(rejected):
+        errors.append('updates with a wrong secret token are accepted')
+
+    handled = len(handler.seconds)
+    batch = updates[:args.concurrency]
+    await post_all(url, batch, args.concurrency, SECRET)
+    in_flight = len(handler.in_flight)
+    await runner.cleanup()
+    drained = len(handler.seconds) - handled
+    print(f'shutdown with {in_flight} updates in handling: {drained} of {len(batch)} updates handled')
+    if drained != len(batch):
+        errors.append(f'{len(batch) - drained} updates lost on shutdown')
+    await close_db()
+    return errors
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--updates', type=int, default=2000, help='updates posted to the webhook')
+    arg_parser.add_argument('--readers', type=int, default=500, help='readers sending the updates')
+    arg_parser.add_argument('--concurrency', type=int, default=100, help='simultaneous requests')
+    arg_parser.add_argument('--latency', type=float, default=0.05, help='SECONDS - answer time of the stub API')
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        use_database(Path(tmp, 'webhook.sqlite3'))
+        config.WAIT_FOR['delete_msg'] = 0
+        logging.getLogger().setLevel(logging.WARNING)
+        with StubServer(make_api(args.latency)) as api:
+            errors = asyncio.run(load(args, api.urls[0]))
+        from src.database.db import engine
+        engine.dispose()
+    for error in errors:
+        print(error)
+    if errors:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
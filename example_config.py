@@ -8,15 +8,42 @@ MY_DEBUG: bool = False
 WAIT_FOR = {
     'delete_msg': 30,  # SECONDS - timeout before deleting bot answers to reader questions
     'pull_url': 1,  # HOURS - break between searching for new newses URL in the site XML-file <ONLY FROM: 1, 2, 3, 4>
-    'searching': 300,  # SECONDS - break between searching for new newses in the database to create a first summary
-    'create': 10,  # SECONDS - break between creating the first summaries for new newses from the list
-    'translate': 5,  # SECONDS - break between translating summaries for newses from the list
-    'sending': 150,  # SECONDS - break between searching for new summaries in the database and sending them
+    'sending': 150,  # SECONDS - longest break between sending if the sender is not notified about new summaries
 }
 
-LEN_MAILING_LIST: int = 30000  # amount of objects pulled at one time from the database to the list for sending
+JOBS: dict = {
+    'summarize': {'workers': 4, 'batch': 1},  # worker pool of the stage and jobs taken by one worker at one time
+    'translate': {'workers': 2, 'batch': 50},
+    'fanout': {'workers': 2, 'batch': 10},
+    'lease': 600,  # SECONDS - a job not finished in this time is taken again by another worker
+    'attempts': 5,  # a job failed so many times is not repeated
+    'retry_delay': 30,  # SECONDS - base of the growing delay before repeating a failed job
+    'poll': 300,  # SECONDS - longest break of a worker without jobs if it is not notified about new jobs
+    'report': 600,  # SECONDS - break between logging the queue depth and latency of the stages
+}
+
+LEN_MAILING_LIST: int = 1000  # amount of objects read at one time from the database, one chunk of sending
+SENDER: dict = {'rate': 30,  # MESSAGES PER SECOND - limit of the bot for all chats (Telegram limit), kept by each sender
+                'chat_rate': 1,  # MESSAGES PER SECOND - limit for one chat (Telegram limit), kept by each sender
+                'workers': 16,  # simultaneous requests of sending messages
+                'retries': 3,  # repeats of a message answered with 'retry_after'
+                'lease': 900,  # SECONDS - messages taken by a sender are not taken by others, longer than one chunk
+                'cache_size': 1000}  # rendered messages of summaries kept in memory, least recently used are dropped
+BOT_CACHE: dict = {'readers': 100000,  # readers kept in memory for the bot answers, least recently used are dropped
+                   'languages_ttl': 600,  # SECONDS - age of the kept list of languages and the language keyboard
+                   'report': 600}  # SECONDS - break between logging the hit ratio of the cache
+DELETER: dict = {'batch': 30,  # bot answers deleted at one time, the next batch is after a second (Telegram limit)
+                 'retry': 60}  # SECONDS - delay before repeating a deletion failed by a network error
+BOT_MODE: str = 'polling'  # 'polling' - the bot requests updates, 'webhook' - Telegram posts updates to the server
+WEBHOOK: dict = {'url': 'https://example.com',  # public address of the server for Telegram, HTTPS
+                 'path': '/webhook',  # path of the endpoint receiving updates
+                 'host': '0.0.0.0',  # local address of the server
+                 'port': 8080,  # local port of the server, behind a proxy with HTTPS
+                 'handlers': 16,  # updates handled simultaneously, others wait; below the database pool size
+                 'drain': 10}  # SECONDS - longest wait for the updates in handling on shutdown
 NEWS_AGE: float = 1.5  # news older than this age in days will not be creating summary
 SUMMARY_AGE: float = 1  # summary older than this age in days will not be sent
+DELIVERY_MODE: str = 'rows'  # 'rows' - a row for every reader and summary, 'cursor' - one cursor for every reader
 
 bot_text: dict = {
     'hello': 'Привет, <b>{}</b>!\nТеперь вы будете получать от бота краткие новости.\n'
@@ -33,19 +60,46 @@ bot_text: dict = {
 
 NEWS_SITES_LIST = [
     # xml-url, sites language, checking publication date by html body, recording html body into db
+    # ('record' downloads every news page in full, the recorded body is not used to create summaries),
+    # [optional] publication date extraction for 'check' sites - one strategy or a list of them tried in order:
+    #   {'strategy': 'meta'} - <meta property="article:published_time" content="...">
+    #   {'strategy': 'jsonld'} - "datePublished" of the JSON-LD script
+    #   {'strategy': 'regex', 'pattern': r'...(group with date)...'}
+    #   {'strategy': 'scan', 'tag': 'span', 'class': 'class-name'} - text of the first tag with the class
+    #   each strategy may have 'format' (strptime, ISO 8601 if missing) and 'tz' (for dates without offset)
     ('https://cryptonews.com/news-sitemap.xml', 'EN', 'uncheck', 'not-record'),
     ('https://bits.media/bitrix-sitemap-iblock-7.xml', 'RU', 'uncheck', 'not-record'),
-    ('https://crypto.ru/xml/posts-sitemap-0.xml', 'RU', 'check', 'record'),
+    ('https://crypto.ru/xml/posts-sitemap-0.xml', 'RU', 'check', 'not-record',
+     {'strategy': 'scan', 'tag': 'span', 'class': 'page__meta-item-text', 'format': '%d.%m.%Y', 'tz': 'Europe/Moscow'}),
 ]
 
+CRAWLER: dict = {
+    'concurrency': 20,  # maximum of simultaneous requests to all sites
+    'per_host': 4,  # maximum of simultaneous requests to one site
+    'timeout': 15,  # SECONDS - total timeout for one request to the site
+    'page_budget': 256 * 1024,  # BYTES - maximum read from a news page while searching its publication date
+}
+
 BASE_DIR = Path(__file__).resolve().parent
 DEEPL: dict = {'url': 'https://api-free.deepl.com/v2',
                'transl_endpoint': '/translate',
-               'lang_endpoint': '/languages'}
+               'lang_endpoint': '/languages',
+               'concurrency': 4,  # maximum of simultaneous requests to DEEPL API
+               'timeout': 60,  # SECONDS - limit for one translation request
+               'retries': 3,  # repeats of a request after a timeout or answers 429 and 5xx
+               'batch_texts': 50,  # maximum of texts in one translation request (DEEPL API limit)
+               'batch_size': 128 * 1024}  # BYTES - maximum size of one translation request (DEEPL API limit)
 KAGI: dict = {'url': 'https://kagi.com/api/v0',
               'engine': 'cecil',
               'summary_type': 'summary',
-              'summary_endpoint': '/summarize'}
+              'summary_endpoint': '/summarize',
+              'concurrency': 4,  # maximum of simultaneous requests to KAGI API
+              'rate': 0.5,  # REQUESTS PER SECOND - average rate of requests to KAGI API
+              'timeout': 120,  # SECONDS - limit for one summarization request
+              'retries': 3,  # repeats of a request after a network error or answers 429 and 5xx
+              'cache_ttl': 30,  # DAYS - cached summaries older than this age are requested again and deleted
+              'cache_size': 50000,  # maximum of cached summaries, the least recently used are deleted
+              'summary_cost': 0.03}  # CREDITS (USD) - approximate price of one summary for the saved credits metric
 LOG_NAME: str = 'summarybot.log'
 DB_NAME: str = 'summarybot.sqlite3'
 
@@ -88,8 +142,6 @@ HEADERS = {
     'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.9',
     'accept-language': 'ru-RU,ru;q=0.9,en-US;q=0.8,en;q=0.7',
     'cache-control': 'max-age=0',
-    'if-modified-since': 'Thu, 07 Dec 2023 11:55:38 GMT',
-    'if-none-match': 'W/\'6571b2ba-2abed\'',
     'sec-ch-ua': '\'Opera\';v=\'95\', \'Chromium\';v=\'109\', \'Not;A=Brand\';v=\'24\'',
     'sec-ch-ua-mobile': '?0',
     'sec-ch-ua-platform': '\'Windows\'',
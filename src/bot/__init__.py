@@ -1 +1,2 @@
 from .app import main as bot
+from .app import sending
@@ -1,22 +1,33 @@
 import asyncio
+import datetime
 import logging
 import os
+import time
 
 from aiogram import Bot, Dispatcher
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.methods import DeleteWebhook
 from dotenv import load_dotenv
 
-from config import bot_text, MY_DEBUG
+from config import BOT_CACHE, BOT_MODE, DELIVERY_MODE, MY_DEBUG
+from src.bot import cache as bot_cache
+from src.bot.deleter import deleter
 from src.bot.handlers import router
-
-from src.services import ReaderSummaryService, NewsService
+from src.bot.messages import MessageCache
+from src.bot.sender import Sender
+from src.bot.webhook import run_webhook
+from src.database import close_db
+from src.events import bus
+from src.metrics import Histogram
+from src.services import DeliveryCursorService, ReaderSummaryService
 
 
 load_dotenv()
 BOT_ADMIN_ID = os.getenv('BOT_ADMIN_ID')
 logger = logging.getLogger(__name__)
 
+LATENCY_BOUNDS: tuple = (10, 30, 60, 120, 300, 600, 1800, 3600)  # SECONDS - buckets of the delivery latency
+delivery_latency = Histogram(LATENCY_BOUNDS)  # from writing the news to the database to sending its summary
+
 
 async def start_bot(bot: Bot) -> None:
     """Information for the administrator about launching the bot"""
@@ -28,89 +39,112 @@ async def stop_bot(bot: Bot) -> None:
     await bot.send_message(BOT_ADMIN_ID, text='Бот остановлен!')
 
 
+def delivery_service() -> ReaderSummaryService or DeliveryCursorService:
+    """The service of not-sent messages of the configured delivery mode."""
+    if DELIVERY_MODE == 'cursor':
+        return DeliveryCursorService()
+    return ReaderSummaryService()
+
+
 async def sending_msg(bot: Bot, wait_sending: int, amount: int, age: float) -> None:
-    """The loop of checking messages prepared for sending and sending them to readers."""
+    """The loop of checking messages prepared for sending and sending them to readers.
+    The loop is woken by the notification about prepared summaries or after 'wait_sending' seconds,
+    then messages of all news are read and sent in chunks of 'amount' until none are left.
+    Messages are rendered once for a summary and taken from the cache for its readers.
+    The latency from the discovery of the news to sending its summary is collected to the histogram."""
+    sender = Sender(bot)
+    cache = MessageCache()
     while True:
-        logger.debug('Searching not-sent objects <ReaderSummary>...')
-        await asyncio.sleep(wait_sending)
-        update_list: list = []
-        reader_summaries = await ReaderSummaryService().get_notsent_readersummary(amount=amount, age=age)
-        if not any(reader_summaries):
-            continue
-        logger.info(f'Detected {len(reader_summaries)} not-sent objects <ReaderSummary>.')
-        count: int = 0
-        previous_news_pk: int = reader_summaries[0][2]
-        news = await NewsService().get_news_data(previous_news_pk)
-        for reader_summary in reader_summaries:
-            if count > 30:
-                await asyncio.sleep(1)
-                count = 0
-            news_pk = reader_summary[2]
-            if previous_news_pk != news_pk:
-                logger.info(f'Stop sending <ReaderSummary> from <News> id {previous_news_pk}')
-                break
-            reader_summary_pk = reader_summary[0]
-            content = reader_summary[1]
-            tg_id = reader_summary[3]
-            news_url = news.url
-            if news.day:
-                news_day = news.day.strftime('%Y-%m-%d %H:%M')
-            else:
-                news_day = ''
-            text = bot_text['sending_summary'].format(content, news_day, news_url)
+        logger.debug('Searching not-sent messages...')
+        await bus.wait('sending', wait_sending)
+        service = delivery_service()
+        async for reader_summaries in service.iter_pending(chunk=amount, age=age):
+            logger.info(f'Read a chunk of {len(reader_summaries)} not-sent messages.')
+            summaries = await cache.get_many({row.summary_pk for row in reader_summaries})
+            messages = [(num, row.tg_id, summaries[row.summary_pk][0]) for num, row in enumerate(reader_summaries)
+                        if row.summary_pk in summaries]
+            start = time.perf_counter()
+            done = await sender.send_all(messages)
+            elapsed = time.perf_counter() - start
+            update_list = [reader_summaries[num] for num, _ in done]
+            resolved = {num for num, _ in done}
+            failed = [row for num, row in enumerate(reader_summaries) if num not in resolved]
+            for num, sent in done:
+                if sent:
+                    news_date = summaries[reader_summaries[num].summary_pk][1]
+                    delivery_latency.record((sent - news_date).total_seconds())
             try:
-                if MY_DEBUG:
-                    logger.debug(f'This is dummy send <ReaderSummary> {reader_summary_pk} to <Reader> tg_id {tg_id}.')
-                else:
-                    await bot.send_message(tg_id, text=text, disable_web_page_preview=True)
-            except TelegramBadRequest as e:
-                await asyncio.sleep(2)
-                logger.warning(f'TelegramBadRequest at sending object <ReaderSummary> id {reader_summary_pk}:\n{e}')
-                update_list.append({'pk': reader_summary_pk, 'is_sent': True})
+                await service.mark_sent(update_list, failed)
             except Exception:
-                logger.exception(f'at sending object <ReaderSummary> id {reader_summary_pk}:')
-                continue
-            else:
-                logger.debug(f'Sending object <ReaderSummary> id {reader_summary_pk} successfully')
-                update_list.append({'pk': reader_summary_pk, 'is_sent': True})
-            count += 1
-            previous_news_pk = news_pk
-        try:
-            await ReaderSummaryService().update_many(update_list)
-        except Exception:
-            logger.exception(f'at update objects <ReaderSummary> for <News> id {previous_news_pk}:')
-        else:
-            logger.info(f'Objects <ReaderSummary> for <News> id {previous_news_pk} were sent and updated successfully.')
+                logger.exception(f'at update {len(update_list)} sent messages:')
+                break
+            logger.info(f'{len(update_list)} of {len(reader_summaries)} messages of {len(summaries)} summaries'
+                        f' were sent in {elapsed:.1f}s ({len(update_list) / max(elapsed, 1e-9):.1f} per second),'
+                        f' totals {dict(sender.stats)}, message cache {dict(cache.stats)}.')
+            logger.info(f'Delivery latency, seconds: {delivery_latency}.')
 
 
-async def main(tasks: list, wait_sending: int, amount: int, age: float) -> None:
-    """Creating a bot, assigning tasks to it, and starting it."""
+async def sending(wait_sending: int, amount: int, age: float) -> None:
+    """Sending messages to readers without receiving updates of the bot, in a separate process of the sender.
+    Messages are leased by the sender, so several senders may run at the same time."""
+    bot = Bot(token=os.getenv('BOT_TOKEN'), parse_mode='HTML')
+    logger.info('Sender starting.')
+    try:
+        await sending_msg(bot, wait_sending, amount, age)
+    finally:
+        await bot.session.close()
+
+
+async def report(period: float = BOT_CACHE['report']) -> None:
+    """Logging the hit ratio of the cache of readers and languages and the messages waiting for deletion regularly."""
+    while True:
+        await asyncio.sleep(period)
+        bot_cache.log_stats()
+        logger.info(f'Messages waiting for deletion: {deleter.pending}, totals {dict(deleter.stats)}.')
+
+
+async def main(tasks: list, wait_sending: int, amount: int, age: float, mode: str = BOT_MODE,
+               with_sending: bool = True) -> None:
+    """Creating a bot, assigning tasks to it, and starting it. Updates are received by long polling
+    or, in the mode 'webhook', posted by Telegram to the webhook server. Without 'with_sending'
+    messages are sent to readers by separate processes of the sender.
+    The mode 'webhook' requires 'WEBHOOK_SECRET', without it the webhook server would accept any request."""
     logging.basicConfig(level=os.getenv('LOG_LEVEL'), )
+    secret_token = os.getenv('WEBHOOK_SECRET')
+    if mode == 'webhook' and not secret_token:
+        raise ValueError('WEBHOOK_SECRET is not set in .env, it is required in the mode webhook.')
     bot = Bot(token=os.getenv('BOT_TOKEN'), parse_mode='HTML')
     if len(tasks):
         for task in tasks:
             asyncio.create_task(task)
-    asyncio.create_task(sending_msg(bot, wait_sending, amount, age))
+    if with_sending:
+        asyncio.create_task(sending_msg(bot, wait_sending, amount, age))
+    asyncio.create_task(deleter.run(bot))
+    asyncio.create_task(report())
     loop = asyncio.get_event_loop()
     dp = Dispatcher(loop=loop)
     dp.include_router(router)
     # dp.startup.register(start_bot)
     # dp.shutdown.register(stop_bot)
-    await bot(DeleteWebhook(drop_pending_updates=True))
     try:
-        logger.info(f'Bot starting with {len(tasks)+1} tasks.')
-        await dp.start_polling(bot)
+        logger.info(f'Bot starting with {len(tasks) + with_sending} tasks in the mode {mode}.')
+        if mode == 'webhook':
+            await run_webhook(bot, dp, secret_token)
+        else:
+            await bot(DeleteWebhook(drop_pending_updates=True))
+            await dp.start_polling(bot)
     except Exception:
-        logger.exception(f'on <start_polling(bot)>:')
+        logger.exception(f'on <start_bot({mode})>:')
     finally:
         await bot.session.close()
+        await close_db()
 
 
 if __name__ == '__main__':
-    # from src.summary import summary
+    # from src.jobs import jobs
     # asyncio.run(
     #     main(
-    #         [summary(age=10, wait_searching=10, wait_create=2, wait_translate=1), ],
+    #         [jobs(age=10), ],
     #         wait_sending=15, amount=100, age=10),
     #     debug=MY_DEBUG
     # )
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import time
+from collections import Counter, OrderedDict
+
+from aiogram.types import InlineKeyboardMarkup
+
+from config import BOT_CACHE
+from src.services import LanguageService, ReaderService
+from . import keyboards as kb
+
+
+logger = logging.getLogger(__name__)
+
+
+class ReaderCache:
+    """Readers known to the bot - tuples (pk, lang_code, is_active) by 'tg_id', the least recently used
+    are dropped above 'size'. Changes of readers are written to the database first and then to the cache,
+    a reader whose change failed is dropped from the cache. Only the bot changes readers.
+    A reader read from the database while its change was written is not kept, it may be read before the change."""
+    def __init__(self, service: ReaderService = None, size: int = BOT_CACHE['readers']):
+        self.service = service or ReaderService()
+        self.size = size
+        self.readers = OrderedDict()
+        self.reading = Counter()
+        self.changed = set()
+        self.stats = Counter(hits=0, misses=0)
+
+    def _put(self, tg_user_id: int, reader: tuple) -> None:
+        self.readers[tg_user_id] = reader
+        self.readers.move_to_end(tg_user_id)
+        while len(self.readers) > self.size:
+            self.readers.popitem(last=False)
+
+    async def get(self, tg_user_id: int) -> tuple:
+        """Getting the reader 'pk', 'lang_code', 'is_active' or three None for an unknown reader."""
+        if tg_user_id in self.readers:
+            self.readers.move_to_end(tg_user_id)
+            self.stats['hits'] += 1
+            return self.readers[tg_user_id]
+        self.stats['misses'] += 1
+        self.reading[tg_user_id] += 1
+        try:
+            reader = await self.service.is_exists(tg_user_id)
+        finally:
+            self.reading[tg_user_id] -= 1
+            is_changed = tg_user_id in self.changed
+            if not self.reading[tg_user_id]:
+                del self.reading[tg_user_id]
+                self.changed.discard(tg_user_id)
+        if reader[0] and not is_changed:
+            self._put(tg_user_id, reader)
+        return reader
+
+    def _change(self, tg_user_id: int) -> None:
+        if tg_user_id in self.reading:
+            self.changed.add(tg_user_id)
+
+    async def create(self, tg_user_id: int, lang_code: str = None) -> (int, str):
+        """Writing the reader to the database and to the cache as it is stored in the database."""
+        try:
+            reader = await self.service.create(tg_user_id, lang_code)
+        except Exception as e:
+            self.readers.pop(tg_user_id, None)
+            raise e
+        self._change(tg_user_id)
+        self._put(tg_user_id, reader)
+        return reader[:2]
+
+    async def update(self, tg_user_id: int, is_active: bool) -> bool:
+        """Updating the activity of the reader in the database and in the cache."""
+        try:
+            await self.service.update(tg_user_id, is_active=is_active)
+        except Exception as e:
+            self.readers.pop(tg_user_id, None)
+            raise e
+        self._change(tg_user_id)
+        if tg_user_id in self.readers:
+            pk, lang_code, _ = self.readers[tg_user_id]
+            self.readers[tg_user_id] = (pk, lang_code, is_active)
+        return True
+
+    async def set_language(self, tg_user_id: int, lang_code: str) -> bool:
+        """Assigning the language to the reader in the database and in the cache."""
+        try:
+            await self.service.set_language(tg_user_id, lang_code)
+        except Exception as e:
+            self.readers.pop(tg_user_id, None)
+            raise e
+        self._change(tg_user_id)
+        if tg_user_id in self.readers:
+            pk, _, is_active = self.readers[tg_user_id]
+            self.readers[tg_user_id] = (pk, lang_code.upper(), is_active)
+        return True
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / requests if requests else 0
+
+
+class LanguageCache:
+    """Active languages and the language keyboard built from them, both are read again from the database
+    after 'ttl' seconds."""
+    def __init__(self, service: LanguageService = None, ttl: float = BOT_CACHE['languages_ttl']):
+        self.service = service or LanguageService()
+        self.ttl = ttl
+        self.languages = dict()
+        self.markup = None
+        self.expires = 0
+        self.lock = asyncio.Lock()
+        self.stats = Counter(hits=0, misses=0)
+
+    async def _load(self) -> None:
+        """Reading the languages if they are expired. Concurrent loads wait for the one reading them."""
+        if time.monotonic() < self.expires:
+            self.stats['hits'] += 1
+            return
+        async with self.lock:
+            if time.monotonic() < self.expires:
+                self.stats['hits'] += 1
+                return
+            self.stats['misses'] += 1
+            languages = await self.service.get_all()
+            self.languages = {language.code: language for language in languages}
+            self.markup = kb.lang_keyboard(list(self.languages))
+            self.expires = time.monotonic() + self.ttl
+        logger.debug(f'{len(self.languages)} languages are read to the cache.')
+
+    async def get_all_code(self) -> list:
+        """Getting codes of all active languages."""
+        await self._load()
+        return list(self.languages)
+
+    async def get_lang(self, lang_code: str):
+        """Getting fields 'pk', 'code', 'name' of the language by its code."""
+        await self._load()
+        language = self.languages.get(lang_code.upper())
+        return language or await self.service.get_lang(lang_code)
+
+    async def keyboard(self) -> InlineKeyboardMarkup:
+        """Getting the keyboard for language selection."""
+        await self._load()
+        return self.markup
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / requests if requests else 0
+
+
+readers = ReaderCache()
+languages = LanguageCache()
+
+
+def log_stats() -> None:
+    logger.info(f'Bot cache: readers {readers.stats["hits"]} hits, {readers.stats["misses"]} misses,'
+                f' hit ratio {readers.hit_ratio:.0%}, {len(readers.readers)} kept; languages'
+                f' {languages.stats["hits"]} hits, {languages.stats["misses"]} misses,'
+                f' hit ratio {languages.hit_ratio:.0%}.')
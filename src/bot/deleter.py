@@ -0,0 +1,103 @@
+import asyncio
+import datetime
+import heapq
+import logging
+import time
+from collections import Counter
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
+
+from config import DELETER, WAIT_FOR
+from src.services import DeletionService
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionScheduler:
+    """Bot answers waiting for deletion - a heap of (due time, chat_id, message_id) handled by one task.
+    Messages are written to the database when scheduled and read back at the start, so deletions
+    survive a restart. Due messages are deleted in batches of 'batch' not more often than once a second.
+    A message Telegram can no longer delete is dropped, a deletion failed by a network error is repeated
+    after 'retry' seconds."""
+    def __init__(self, service: DeletionService = None, batch: int = DELETER['batch'], retry: float = DELETER['retry']):
+        self.service = service or DeletionService()
+        self.batch = batch
+        self.retry = retry
+        self.heap = list()
+        self.wakeup = asyncio.Event()
+        self.stats = Counter(deleted=0, dropped=0, retried=0)
+
+    @property
+    def pending(self) -> int:
+        """The amount of messages waiting for deletion."""
+        return len(self.heap)
+
+    async def schedule(self, chat_id: int, message_id: int, delay: float = WAIT_FOR['delete_msg']) -> None:
+        """Deleting the message after 'delay' seconds."""
+        due = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+        await self.service.add(chat_id, message_id, due)
+        self._push(due, chat_id, message_id)
+
+    def _push(self, due: datetime.datetime, chat_id: int, message_id: int) -> None:
+        heapq.heappush(self.heap, (due, chat_id, message_id))
+        if self.heap[0] == (due, chat_id, message_id):
+            self.wakeup.set()
+
+    async def _wait(self) -> None:
+        """Waiting until the first message is due or an earlier message is scheduled."""
+        self.wakeup.clear()
+        timeout = (self.heap[0][0] - datetime.datetime.now()).total_seconds() if self.heap else None
+        if timeout is not None and timeout <= 0:
+            return
+        try:
+            await asyncio.wait_for(self.wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _delete(self, bot: Bot, chat_id: int, message_id: int) -> bool:
+        """Deleting one message. Returns False if the deletion is to be repeated."""
+        try:
+            await bot.delete_message(chat_id, message_id)
+        except (TelegramBadRequest, TelegramForbiddenError) as e:
+            self.stats['dropped'] += 1
+            logger.debug(f'Message {message_id} in chat {chat_id} is not deleted: {e}')
+        except Exception as e:
+            self.stats['retried'] += 1
+            logger.warning(f'Deletion of message {message_id} in chat {chat_id} failed: {e!r}')
+            return False
+        else:
+            self.stats['deleted'] += 1
+        return True
+
+    async def run(self, bot: Bot) -> None:
+        """Reading the messages waiting for deletion from the database and deleting them when they are due."""
+        scheduled = {(chat_id, message_id) for _, chat_id, message_id in self.heap}
+        for chat_id, message_id, due in await self.service.get_all():
+            if (chat_id, message_id) not in scheduled:
+                heapq.heappush(self.heap, (due, chat_id, message_id))
+        logger.info(f'{self.pending} messages are waiting for deletion.')
+        while True:
+            await self._wait()
+            now = datetime.datetime.now()
+            started = time.monotonic()
+            batch = list()
+            while self.heap and self.heap[0][0] <= now and len(batch) < self.batch:
+                batch.append(heapq.heappop(self.heap))
+            if not batch:
+                continue
+            results = await asyncio.gather(*(self._delete(bot, chat_id, message_id) for _, chat_id, message_id in batch))
+            retry = now + datetime.timedelta(seconds=self.retry)
+            for (_, chat_id, message_id), done in zip(batch, results):
+                if not done:
+                    heapq.heappush(self.heap, (retry, chat_id, message_id))
+            try:
+                await self.service.remove_many([(chat_id, message_id) for (_, chat_id, message_id), done
+                                                in zip(batch, results) if done])
+            except Exception:
+                logger.exception(f'Unable to remove {len(batch)} deleted messages from the database.')
+            await asyncio.sleep(max(0.0, started + 1 - time.monotonic()))
+
+
+deleter = DeletionScheduler()
@@ -1,30 +1,26 @@
-import asyncio
 import logging
 
 from aiogram import Bot, Router, F
-from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command, ChatMemberUpdatedFilter, KICKED, MEMBER
 from aiogram.types import Message, ChatMemberUpdated, CallbackQuery
 
 from config import bot_text, WAIT_FOR
-from . import keyboards as kb
-from ..services import ReaderService, LanguageService
+from .cache import languages, readers
+from .deleter import deleter
 
 
 router = Router()
-rs = ReaderService()
 logger = logging.getLogger(__name__)
 
 
 async def delete_message(message: Message, sleep_time: int = WAIT_FOR['delete_msg']) -> None:
-    """Deleting a message after the timeout expires."""
-    await asyncio.sleep(sleep_time)
+    """Deleting a message after the timeout expires. The deletion is given to the scheduler,
+    so the handler does not wait for it."""
     if message:
         try:
-            await message.delete()
-        except TelegramBadRequest as e:
-            if 'message to delete not found' in str(e):
-                logger.debug('The message has already been deleted:', e)
+            await deleter.schedule(message.chat.id, message.message_id, sleep_time)
+        except Exception:
+            logger.exception(f'in <delete_message({message.message_id})>:')
 
 
 async def error_msg(message: Message) -> None:
@@ -34,14 +30,15 @@ async def error_msg(message: Message) -> None:
 
 
 async def check_exist_and_activate(tg_user_id: int) -> (str, str):
-    """Checking for the existence of a reader and creating or activating him. Returns the reader <pk> and <lang_code>"""
-    pk, lang_code, is_active = await rs.is_exists(tg_user_id)
+    """Checking for the existence of a reader and creating or activating them. Returns the reader <pk> and <lang_code>.
+    Known readers are taken from the cache."""
+    pk, lang_code, is_active = await readers.get(tg_user_id)
     if pk and not is_active:
-        await rs.update(tg_user_id, is_active=True)
+        await readers.update(tg_user_id, is_active=True)
     elif pk and is_active:
         pass
     else:
-        pk, lang_code = await rs.create(tg_user_id)
+        pk, lang_code = await readers.create(tg_user_id)
     return pk, lang_code
 
 
@@ -59,8 +56,8 @@ async def select_languages(callback: CallbackQuery, bot: Bot) -> None:
     message = callback.message
     try:
         await check_exist_and_activate(callback.from_user.id)
-        await rs.set_language(callback.from_user.id, lang_code)
-        language = await LanguageService().get_lang(lang_code)
+        await readers.set_language(callback.from_user.id, lang_code)
+        language = await languages.get_lang(lang_code)
         lang_name = language.name
     except Exception:
         logger.exception(f'in <select_languages()> for reader {callback.from_user.id}, lang_code {lang_code}:')
@@ -74,20 +71,20 @@ async def select_languages(callback: CallbackQuery, bot: Bot) -> None:
 async def get_languages(message: Message, bot: Bot) -> None:
     """Sending a response message with the keyboard to a reader command <language>."""
     try:
-        keyboard = await kb.lang_keyboard()
+        keyboard = await languages.keyboard()
     except Exception:
-        logger.exception(f'on <get_languages()> in <lang_keyboard()>:')
+        logger.exception(f'on <get_languages()> in <keyboard()>:')
         await error_msg(message)
     else:
         msg = await message.answer(text=bot_text['language_selection'], reply_markup=keyboard)
-        asyncio.create_task(delete_message(msg))
+        await delete_message(msg)
 
 
 @router.my_chat_member(ChatMemberUpdatedFilter(member_status_changed=KICKED))
 async def reader_blocked_bot(event: ChatMemberUpdated, bot: Bot) -> None:
     """Deactivating the reader after blocking the bot."""
     try:
-        await rs.update(event.from_user.id, is_active=False)
+        await readers.update(event.from_user.id, is_active=False)
     except Exception:
         logger.exception(f'on <reader_blocked_bot()> in <update({event.from_user.id})>:')
 
@@ -96,7 +93,7 @@ async def reader_blocked_bot(event: ChatMemberUpdated, bot: Bot) -> None:
 async def reader_anblocked_bot(event: ChatMemberUpdated, bot: Bot) -> None:
     """Activating the reader after unlocking the bot."""
     try:
-        await rs.update(event.from_user.id, is_active=True)
+        await readers.update(event.from_user.id, is_active=True)
     except Exception:
         logger.exception(f'on <reader_anblocked_bot()> in <update({event.from_user.id})>:')
 
@@ -110,15 +107,15 @@ async def get_start(message: Message, bot: Bot) -> None:
     msg_lang_code = message.from_user.language_code.upper()
     try:
         pk, lang_code = await check_exist_and_activate(reader_tg_id)
-        languages = await rs.language_service.get_all_code()
-        if lang_code and (lang_code.upper() in languages):
+        codes = await languages.get_all_code()
+        if lang_code and (lang_code.upper() in codes):
             msg = await message.answer(bot_text['hello'].format(reader_name, lang_code.upper()))
-        elif (not lang_code) and (msg_lang_code in languages):
-            await ReaderService().set_language(reader_tg_id, msg_lang_code)
+        elif (not lang_code) and (msg_lang_code in codes):
+            await readers.set_language(reader_tg_id, msg_lang_code)
             msg = await message.answer(bot_text['hello'].format(reader_name, msg_lang_code))
         else:
             msg = await message.answer(bot_text['hello_and_select'].format(reader_name))
-        asyncio.create_task(delete_message(msg))
+        await delete_message(msg)
     except Exception:
         logger.exception(f'in <get_start({reader_tg_id})>:')
         await error_msg(message)
@@ -0,0 +1,43 @@
+import logging
+from collections import Counter, OrderedDict
+
+from config import bot_text, SENDER
+from src.services import SummaryService
+
+
+logger = logging.getLogger(__name__)
+
+
+def render(content: str, url: str, day) -> str:
+    """The text of the message with the summary for the reader."""
+    news_day = day.strftime('%Y-%m-%d %H:%M') if day else ''
+    return bot_text['sending_summary'].format(content, news_day, url)
+
+
+class MessageCache:
+    """Rendered messages of summaries, the least recently used are dropped above 'size'.
+    A message is rendered once for a summary and shared by all its readers."""
+    def __init__(self, service: SummaryService = None, size: int = SENDER['cache_size']):
+        self.service = service or SummaryService()
+        self.size = size
+        self.messages = OrderedDict()
+        self.stats = Counter(hits=0, misses=0)
+
+    async def get_many(self, summary_pks: set) -> dict:
+        """Getting the messages of summaries - tuples (text, date of the news) by the summary 'pk'.
+        Missing messages are rendered from one query to the database."""
+        res = dict()
+        for summary_pk in summary_pks:
+            if summary_pk in self.messages:
+                self.messages.move_to_end(summary_pk)
+                res[summary_pk] = self.messages[summary_pk]
+        missing = [summary_pk for summary_pk in summary_pks if summary_pk not in res]
+        self.stats['hits'] += len(res)
+        self.stats['misses'] += len(missing)
+        if missing:
+            for row in (await self.service.get_for_sending(missing)).values():
+                res[row.pk] = self.messages[row.pk] = (render(row.content, row.url, row.day), row.date)
+            while len(self.messages) > self.size:
+                self.messages.popitem(last=False)
+            logger.debug(f'Rendered {len(missing)} messages, {len(self.messages)} in the cache.')
+        return res
@@ -0,0 +1,79 @@
+import asyncio
+import datetime
+import logging
+from collections import Counter
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from config import MY_DEBUG, SENDER
+from src.ratelimit import KeyRateLimit, TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+
+class Sender:
+    """Sending messages to readers by a pool of simultaneous workers within the Telegram limits:
+    the rate of the bot for all chats and the rate of one chat. The answer 'retry_after' pauses
+    all sending for the given time, then the message is repeated."""
+    def __init__(self,
+                 bot: Bot or None,
+                 rate: float = SENDER['rate'],
+                 chat_rate: float = SENDER['chat_rate'],
+                 workers: int = SENDER['workers'],
+                 retries: int = SENDER['retries'],
+                 dummy: bool = MY_DEBUG):
+        self.bot = bot
+        self.bucket = TokenBucket(rate)
+        self.chats = KeyRateLimit(chat_rate)
+        self.workers = workers
+        self.retries = retries
+        self.dummy = dummy
+        self.stats = Counter()
+
+    async def send(self, tg_id: int, text: str) -> None:
+        """Sending one message, repeating it after the answer 'retry_after'."""
+        for attempt in range(self.retries + 1):
+            await self.chats.acquire(tg_id)
+            await self.bucket.acquire()
+            try:
+                if self.dummy:
+                    logger.debug(f'This is dummy send message to <Reader> tg_id {tg_id}.')
+                else:
+                    await self.bot.send_message(tg_id, text=text, disable_web_page_preview=True)
+                return
+            except TelegramRetryAfter as e:
+                self.stats['retry_after'] += 1
+                logger.warning(f'Telegram asks to wait {e.retry_after}s at sending to <Reader> tg_id {tg_id}.')
+                self.bucket.pause(e.retry_after)
+                if attempt == self.retries:
+                    raise e
+
+    async def send_all(self, messages: list) -> list:
+        """Sending messages - tuples (key, tg_id, text). Returns tuples (key, sending time) for finished messages,
+        the time is None for messages that can not be delivered to the chat and will not be repeated.
+        Messages failed by other errors are not returned."""
+        queue = asyncio.Queue()
+        for message in messages:
+            queue.put_nowait(message)
+        done = list()
+
+        async def work() -> None:
+            while not queue.empty():
+                key, tg_id, text = queue.get_nowait()
+                try:
+                    await self.send(tg_id, text)
+                except (TelegramBadRequest, TelegramForbiddenError) as e:
+                    self.stats['undeliverable'] += 1
+                    logger.warning(f'{e.__class__.__name__} at sending message {key} to <Reader> tg_id {tg_id}:\n{e}')
+                    done.append((key, None))
+                except Exception:
+                    self.stats['failed'] += 1
+                    logger.exception(f'at sending message {key} to <Reader> tg_id {tg_id}:')
+                else:
+                    self.stats['sent'] += 1
+                    done.append((key, datetime.datetime.now()))
+
+        await asyncio.gather(*(work() for _ in range(min(self.workers, len(messages)))))
+        return done
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import signal
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
+
+from config import WEBHOOK
+from src.metrics import Histogram
+
+
+logger = logging.getLogger(__name__)
+
+HANDLER_BOUNDS: tuple = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)  # SECONDS - buckets of the handler latency
+
+
+class WebhookHandler(SimpleRequestHandler):
+    """Updates posted by Telegram to the webhook. Requests without the secret token are rejected,
+    an update is answered at once and handled in a task, up to 'handlers' updates at the same time.
+    On shutdown new updates are refused and the updates in handling are awaited for up to 'drain' seconds."""
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, secret_token: str = None,
+                 handlers: int = WEBHOOK['handlers'], drain: float = WEBHOOK['drain']):
+        super().__init__(dispatcher, bot, handle_in_background=True, secret_token=secret_token)
+        self.semaphore = asyncio.Semaphore(handlers)
+        self.drain = drain
+        self.in_flight = set()
+        self.is_closing = False
+        self.latency = Histogram(HANDLER_BOUNDS)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.is_closing:
+            return web.Response(body='Shutting down', status=503)
+        return await super().handle(request)
+
+    async def _handle_request_background(self, bot: Bot, request: web.Request) -> web.Response:
+        start = time.perf_counter()
+        update = await request.json(loads=bot.session.json_loads)
+        task = asyncio.create_task(self._feed(bot, update, start))
+        self.in_flight.add(task)
+        task.add_done_callback(self.in_flight.discard)
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+    async def _feed(self, bot: Bot, update: dict, start: float) -> None:
+        try:
+            async with self.semaphore:
+                await self._background_feed_update(bot, update)
+        except Exception:
+            logger.exception(f'in handling update {update.get("update_id")}:')
+        finally:
+            self.handled(time.perf_counter() - start)
+
+    def handled(self, seconds: float) -> None:
+        """Collecting the time from receiving the update to the end of its handling."""
+        self.latency.record(seconds)
+
+    async def close(self) -> None:
+        """Waiting for the updates in handling and closing the bot session."""
+        self.is_closing = True
+        if self.in_flight:
+            logger.info(f'Waiting up to {self.drain}s for {len(self.in_flight)} updates in handling.')
+            _, pending = await asyncio.wait(self.in_flight, timeout=self.drain)
+            if pending:
+                logger.warning(f'{len(pending)} updates were not handled before shutdown.')
+        logger.info(f'Webhook handler latency, seconds: {self.latency}.')
+        await super().close()
+
+
+def create_app(bot: Bot, dp: Dispatcher, handler: WebhookHandler, path: str = WEBHOOK['path']) -> web.Application:
+    """The aiohttp application receiving updates at the path. The startup and shutdown of the dispatcher
+    are bound to the application."""
+    app = web.Application()
+    handler.register(app, path=path)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher, secret_token: str) -> None:
+    """Registering the webhook in Telegram and serving updates until the process gets SIGINT or SIGTERM
+    or the task is cancelled. The server stops accepting connections first, then the updates in handling
+    are drained."""
+    handler = WebhookHandler(dp, bot, secret_token=secret_token)
+    runner = web.AppRunner(create_app(bot, dp, handler), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, WEBHOOK['host'], WEBHOOK['port']).start()
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await bot.set_webhook(WEBHOOK['url'] + WEBHOOK['path'], secret_token=secret_token,
+                              allowed_updates=dp.resolve_used_update_types(), drop_pending_updates=True)
+        logger.info(f'Webhook {WEBHOOK["url"]}{WEBHOOK["path"]} is served on {WEBHOOK["host"]}:{WEBHOOK["port"]}.')
+        await stop.wait()
+    finally:
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.remove_signal_handler(signum)
+        await runner.cleanup()
@@ -1,2 +1,3 @@
-from .db import Session, create_db, get_session
-from .tables import Language, News, ReaderSummary, Summary, Reader
+from .db import AsyncSession, Session, async_url, close_db, create_db, insert_or_ignore, insert_or_update
+from .tables import Language, News, ReaderSummary, Summary, Reader, Sitemap, SummaryCache, Job, \
+    DeliveryQueue, DeliveryCursor, Deletion
@@ -1,13 +1,27 @@
 import logging
 
-from sqlalchemy import create_engine
+from sqlalchemy import URL, create_engine, inspect, make_url
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.schema import CreateColumn
+from sqlalchemy.sql.dml import Insert
 
 from config import DB_URL
 
 
 logger = logging.getLogger(__name__)
 
+ASYNC_DRIVERS: dict = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}  # by database dialect
+
+
+def async_url(url: str or URL) -> URL:
+    """The URL of the database with the asynchronous driver of its dialect."""
+    url = make_url(url)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
 engine = create_engine(
     DB_URL,
     connect_args={'check_same_thread': False},
@@ -20,21 +34,64 @@ engine = create_engine(
 
 Session = sessionmaker(engine, autocommit=False, autoflush=False)
 
+async_engine = create_async_engine(
+    async_url(DB_URL),
+    poolclass=AsyncAdaptedQueuePool,
+    max_overflow=10,
+    pool_size=20,
+    pool_recycle=3600,
+    pool_timeout=5,
+    echo=False
+)
+
+# the factory of sessions of the services: every operation opens its own session and returns its connection
+# to the pool when the operation ends, so concurrent coroutines never share a session
+AsyncSession = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 
 def create_db() -> None:
-    """Database creation."""
+    """Database creation. Tables, indexes and nullable columns missing in an existing database are also created.
+    A SQLite database is switched to the write-ahead log, so processes reading it are not blocked by a writing one."""
     from src.database.tables import Base
     Base.metadata.create_all(engine)
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing = {column['name'] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing and column.nullable:
+                    connection.exec_driver_sql(f'ALTER TABLE {table.name} '
+                                               f'ADD COLUMN {CreateColumn(column).compile(dialect=engine.dialect)}')
+                    logger.info(f'Column {column.name} added to the table {table.name}.')
+        if engine.dialect.name == 'sqlite':
+            connection.exec_driver_sql('PRAGMA journal_mode=WAL')
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
     logger.info('Database created!')
 
 
-def get_session() -> Session:
-    """Obtaining a session to work with the database."""
-    session = Session()
-    try:
-        yield session
-    finally:
-        session.close()
+def insert_or_ignore(model, session: Session, index_elements: list) -> Insert:
+    """Creating the statement 'INSERT ... ON CONFLICT DO NOTHING' in the dialect of the session database.
+    Rows that conflict on the given unique columns are skipped instead of failing the whole statement."""
+    if session.get_bind().dialect.name == 'postgresql':
+        return postgresql.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+    return sqlite.insert(model).on_conflict_do_nothing(index_elements=index_elements)
+
+
+def insert_or_update(model, session: Session, index_elements: list, columns: list) -> Insert:
+    """Creating the statement 'INSERT ... ON CONFLICT DO UPDATE' in the dialect of the session database.
+    Rows that conflict on the given unique columns update the given columns of the existing rows."""
+    dialect = postgresql if session.get_bind().dialect.name == 'postgresql' else sqlite
+    stmt = dialect.insert(model)
+    return stmt.on_conflict_do_update(index_elements=index_elements,
+                                      set_={column: stmt.excluded[column] for column in columns})
+
+
+async def close_db() -> None:
+    """Closing the connections of the asynchronous engine. The threads of 'aiosqlite' connections
+    keep the process running, so it is awaited before the application exits."""
+    await async_engine.dispose()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,36 @@
+"""Moving the delivery of summaries from rows of 'reader_summary' to reader cursors.
+Stop the application, run from the directory with summarybot.py:
+
+    python3 -m src.database.migrate --drop-rows
+
+and set DELIVERY_MODE = 'cursor' in config.py before starting the application again.
+"""
+import argparse
+import asyncio
+import logging
+
+from config import SUMMARY_AGE
+from src.database import close_db, create_db
+from src.database.db import engine
+from src.services import DeliveryCursorService
+
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    arg_parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arg_parser.add_argument('--drop-rows', action='store_true', help='delete the rows of reader_summary after moving')
+    args = arg_parser.parse_args()
+    create_db()
+    queued, cursors = asyncio.run(DeliveryCursorService().migrate_from_rows(SUMMARY_AGE, drop_rows=args.drop_rows))
+    asyncio.run(close_db())
+    logger.info(f'Delivery moved to cursors: {queued} summaries queued, {cursors} reader cursors written.')
+    if args.drop_rows and engine.dialect.name == 'sqlite':
+        with engine.connect() as connection:
+            connection.exec_driver_sql('VACUUM')
+        logger.info('Rows of reader_summary deleted, the database file is compacted.')
+
+
+if __name__ == '__main__':
+    main()
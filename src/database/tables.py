@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List
 
-from sqlalchemy import ForeignKey, BigInteger, String, Text, UniqueConstraint
+from sqlalchemy import ForeignKey, BigInteger, Index, String, Text, UniqueConstraint, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 
@@ -31,6 +31,8 @@ class Reader(Base):
     summaries: Mapped[List['Summary']] = relationship(secondary='reader_summary',
                                                       back_populates='readers',
                                                       viewonly=True, )
+    __table_args__ = (Index('ix_readers_active_lang_pk', 'lang_pk',
+                            sqlite_where=text('is_active = 1'), postgresql_where=text('is_active = true')), )
 
 
 class News(Base):
@@ -45,6 +47,7 @@ class News(Base):
     lang_pk: Mapped[int] = mapped_column(ForeignKey('languages.pk'))
     language: Mapped['Language'] = relationship(back_populates='newses')
     summaries: Mapped[List['Summary']] = relationship(back_populates='news')
+    __table_args__ = (Index('ix_newses_state_date', 'has_summary', 'has_summaries', 'date'), )
 
 
 class Summary(Base):
@@ -58,7 +61,8 @@ class Summary(Base):
     language: Mapped['Language'] = relationship(back_populates='summaries')
     news: Mapped['News'] = relationship(back_populates='summaries')
     readers: Mapped[List['Reader']] = relationship(secondary='reader_summary', back_populates='summaries')
-    __table_args__ = (UniqueConstraint('lang_pk', 'news_pk', name='uc_language_summary'), )
+    __table_args__ = (UniqueConstraint('lang_pk', 'news_pk', name='uc_language_summary'),
+                      Index('ix_summaries_news_pk', 'news_pk'), )
 
 
 class ReaderSummary(Base):
@@ -67,5 +71,79 @@ class ReaderSummary(Base):
     is_sent: Mapped[bool] = mapped_column(default=False)
     summary_pk: Mapped[int] = mapped_column(ForeignKey('summaries.pk'), nullable=False)
     reader_pk: Mapped[int] = mapped_column(ForeignKey('readers.pk'), nullable=False)
-    __table_args__ = (UniqueConstraint('summary_pk', 'reader_pk', name='uc_reader_summary'), )
+    lease_until: Mapped[datetime] = mapped_column(nullable=True)
+    __table_args__ = (UniqueConstraint('summary_pk', 'reader_pk', name='uc_reader_summary'),
+                      Index('ix_reader_summary_not_sent', 'summary_pk', 'pk',
+                            sqlite_where=text('is_sent = 0'), postgresql_where=text('is_sent = false')), )
 
+
+class Sitemap(Base):
+    __tablename__ = 'sitemaps'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
+    url: Mapped[str] = mapped_column(unique=True)
+    etag: Mapped[str] = mapped_column(nullable=True)
+    last_modified: Mapped[str] = mapped_column(String(64), nullable=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=True)
+    is_index: Mapped[bool] = mapped_column(default=False)
+
+
+class SummaryCache(Base):
+    __tablename__ = 'summary_cache'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime] = mapped_column(default=datetime.now)
+    used: Mapped[datetime] = mapped_column(default=datetime.now)
+    url: Mapped[str] = mapped_column()
+    language: Mapped[str] = mapped_column(String(8))
+    engine: Mapped[str] = mapped_column(String(32))
+    summary_type: Mapped[str] = mapped_column(String(32))
+    content: Mapped[str] = mapped_column(Text)
+    hits: Mapped[int] = mapped_column(default=0)
+    __table_args__ = (UniqueConstraint('url', 'language', 'engine', 'summary_type', name='uc_summary_cache'), )
+
+
+class Job(Base):
+    __tablename__ = 'jobs'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime] = mapped_column(default=datetime.now)
+    updated: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
+    stage: Mapped[str] = mapped_column(String(16))
+    state: Mapped[str] = mapped_column(String(16), default='pending')
+    news_pk: Mapped[int] = mapped_column(ForeignKey('newses.pk'))
+    lease_until: Mapped[datetime] = mapped_column(nullable=True)
+    attempts: Mapped[int] = mapped_column(default=0)
+    payload: Mapped[str] = mapped_column(Text, nullable=True)
+    error: Mapped[str] = mapped_column(Text, nullable=True)
+    __table_args__ = (UniqueConstraint('stage', 'news_pk', name='uc_job_stage_news'),
+                      Index('ix_jobs_active_stage_pk', 'stage', 'pk',
+                            sqlite_where=text("state IN ('pending', 'running')"),
+                            postgresql_where=text("state IN ('pending', 'running')")), )
+
+
+class DeliveryQueue(Base):
+    __tablename__ = 'delivery_queue'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime] = mapped_column(default=datetime.now)
+    summary_pk: Mapped[int] = mapped_column(ForeignKey('summaries.pk'), unique=True)
+    news_pk: Mapped[int] = mapped_column(ForeignKey('newses.pk'))
+    lang_pk: Mapped[int] = mapped_column(ForeignKey('languages.pk'))
+    __table_args__ = (Index('ix_delivery_queue_lang_pk', 'lang_pk', 'pk'), )
+
+
+class DeliveryCursor(Base):
+    __tablename__ = 'delivery_cursors'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    date: Mapped[datetime] = mapped_column(default=datetime.now, onupdate=datetime.now)
+    reader_pk: Mapped[int] = mapped_column(ForeignKey('readers.pk'), unique=True)
+    queue_pk: Mapped[int] = mapped_column()
+    lease_until: Mapped[datetime] = mapped_column(nullable=True)
+    __table_args__ = (Index('ix_delivery_cursors_queue_pk', 'queue_pk'), )
+
+
+class Deletion(Base):
+    __tablename__ = 'deletions'
+    pk: Mapped[int] = mapped_column(primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    message_id: Mapped[int] = mapped_column(BigInteger)
+    due: Mapped[datetime] = mapped_column()
+    __table_args__ = (UniqueConstraint('chat_id', 'message_id', name='uc_deletion_message'), )
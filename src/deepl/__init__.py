@@ -1,2 +1 @@
-from .app import main as deepl
-from .app import Deepl
+from .app import Deepl, translate
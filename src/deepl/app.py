@@ -1,80 +1,179 @@
 import asyncio
+import json
 import logging
 import os
+import time
+from collections import Counter
 from typing import Any
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 
 from config import DEEPL, MY_DEBUG
+from src.database import close_db
+from src.ratelimit import backoff
 from src.services import LanguageService, NewsService, SummaryService
 
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES: tuple = (429, 500, 502, 503, 504)  # DEEPL API responses after which the request is repeated
+REQUEST_OVERHEAD: int = 1024  # BYTES - reserved in the request size for the fields other than texts
+
+
+def text_size(text: str) -> int:
+    """Size of the text in the JSON request body."""
+    return len(json.dumps(text, ensure_ascii=False).encode()) + 1
+
+
+def batches(texts: list, max_texts: int = DEEPL['batch_texts'], max_size: int = DEEPL['batch_size']) -> list:
+    """Splitting the texts in order into batches within the limits of one DEEPL API request
+    on the amount of texts and the request size. A text larger than the limit gets a batch of its own."""
+    res = list()
+    batch = list()
+    size = REQUEST_OVERHEAD
+    for text in texts:
+        length = text_size(text)
+        if batch and (len(batch) == max_texts or size + length > max_size):
+            res.append(batch)
+            batch = list()
+            size = REQUEST_OVERHEAD
+        batch.append(text)
+        size += length
+    if batch:
+        res.append(batch)
+    return res
+
 
 class Deepl:
-    def __init__(self):
+    """DEEPL API client. Translations are requested through one session with a keep-alive connection pool,
+    many texts in one request, the number of simultaneous requests is limited."""
+    def __init__(self,
+                 url: str = DEEPL['url'],
+                 concurrency: int = DEEPL['concurrency'],
+                 timeout: int = DEEPL['timeout'],
+                 retries: int = DEEPL['retries'],
+                 dummy: bool = MY_DEBUG):
         self.auth_key = os.getenv('DEEPL_TOKEN')
-        self.url = DEEPL['url']
+        self.url = url
+        self.headers = {'Authorization': f'DeepL-Auth-Key {self.auth_key}'}
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.dummy = dummy
+        self.session = None
+        self.stats = Counter(requests=0, texts=0, characters=0)
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.session.close()
 
-    def get_languages(self) -> Any:
+    async def get_languages(self) -> Any:
         """Receiving from the DEEPL API a list of possible languages for translation."""
-        params = {'auth_key': self.auth_key}
         url = self.url + DEEPL['lang_endpoint']
-        response = requests.get(url, params=params)
-        return response.json()
+        async with self.session.get(url) as response:
+            response.raise_for_status()
+            return await response.json()
 
-    def create_languages(self) -> None:
+    async def create_languages(self) -> None:
         """Entry into a database of possible languages for translation."""
         try:
-            LanguageService().create_many(self.get_languages())
+            await LanguageService().create_many(await self.get_languages())
         except Exception as e:
             logger.exception('in getting and recording languages to db:')
             raise e
         else:
             logger.info('Languages were received and recorded in the database!')
 
-    async def translate(self, lang_code: str, text: str) -> str:
-        """Translating text using DEEPL API."""
-        await asyncio.sleep(5)
-        params = {'auth_key': self.auth_key,
-                  'target_lang': lang_code,
-                  'text': text}
+    async def translate(self, lang_code: str, texts: list) -> list:
+        """Translating the texts of one batch with one DEEPL API request. The translations keep the order of texts."""
+        if self.dummy:
+            return [f'This is dummy translate to {lang_code}: {text}...' for text in texts]
         url = self.url + DEEPL['transl_endpoint']
-        response = requests.get(url, params=params)
-        return response.json()['translations'][0]['text']
-
-
-async def main(wait_translate: int, data: dict) -> None:
-    """Identifying the languages used by readers and translating summary into these languages."""
-    readers_languages = await LanguageService().get_readers_languages()
-    if readers_languages:
-        logger.debug('Trying to translate a summaries for newses...')
-        await asyncio.sleep(wait_translate)
-        news_pk = data['news_pk']
-        summary_pk = data['summary_pk']
-        summary_lang_pk = data['summary_lang']
-        text = data['content']
-        logger.debug(f'Trying to translate the summary with id {summary_pk}...')
-        for language in readers_languages:
-            lang_pk = language.pk
-            lang_code = language.code
-            if lang_pk == summary_lang_pk:
-                continue
+        body = json.dumps({'target_lang': lang_code, 'text': texts}, ensure_ascii=False).encode()
+        headers = {'Content-Type': 'application/json'}
+        for attempt in range(self.retries + 1):
             try:
-                if MY_DEBUG:
-                    content = f'This is dummy translate to {lang_code}: {text}...'
-                else:
-                    content = await Deepl().translate(lang_code, text)
-            except Exception:
-                logger.exception(f'on translating <Summary> id {summary_pk} to {lang_code}:')
+                async with self.semaphore:
+                    self.stats['requests'] += 1
+                    async with self.session.post(url, data=body, headers=headers) as response:
+                        if response.status == 200:
+                            res = await response.json()
+                            self.stats['texts'] += len(texts)
+                            self.stats['characters'] += sum(map(len, texts))
+                            return [translation['text'] for translation in res['translations']]
+                        if response.status not in RETRY_STATUSES or attempt == self.retries:
+                            raise aiohttp.ClientResponseError(response.request_info, response.history,
+                                                              status=response.status, message=response.reason)
+                        logger.warning(f'DEEPL API answered {response.status} to {lang_code}, attempt {attempt + 1}.')
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    raise e
+                logger.warning(f'Error of translating to {lang_code}, attempt {attempt + 1}: {e!r}')
+            await asyncio.sleep(backoff(attempt))
+
+
+async def translate_language(client: Deepl, language: Any, data_list: list) -> list:
+    """Translating into one language all summaries in another language. The batches go concurrently.
+    Returns pairs of the summary data and its translation or the error of its batch."""
+    data_list = [data for data in data_list if data['summary_lang'] != language.pk]
+    texts = [data['content'] for data in data_list]
+    res = list()
+    start = 0
+    tasks = list()
+    for batch in batches(texts):
+        tasks.append((data_list[start:start + len(batch)], client.translate(language.code, batch)))
+        start += len(batch)
+    results = await asyncio.gather(*(task for _, task in tasks), return_exceptions=True)
+    for (batch_data, _), result in zip(tasks, results):
+        if isinstance(result, BaseException):
+            logger.error(f'on translating {len(batch_data)} summaries to {language.code}: {result!r}')
+            res.extend((data, result) for data in batch_data)
+        else:
+            res.extend(zip(batch_data, result))
+    return res
+
+
+async def translate(client: Deepl, jobs: list) -> list:
+    """Handler of the translate stage: translating the summaries of the jobs into the languages used by readers.
+    Summaries are translated in batches, the languages go concurrently. Translations of a failed job saved
+    by the previous attempts are kept, only the languages without them are translated again.
+    Returns for each job nothing for the fanout job or the first error of its translations."""
+    data_list = [job.payload for job in jobs]
+    readers_languages = list(await LanguageService().get_readers_languages() or list())
+    translated = await SummaryService().get_news_languages([data['news_pk'] for data in data_list])
+    errors = dict()
+    start = time.perf_counter()
+    before = client.stats.copy()
+    results = await asyncio.gather(*(translate_language(client, language, [
+        data for data in data_list if (data['news_pk'], language.pk) not in translated])
+        for language in readers_languages))
+    elapsed = time.perf_counter() - start
+    for language, translations in zip(readers_languages, results):
+        for data, content in translations:
+            if isinstance(content, BaseException):
+                errors.setdefault(data['news_pk'], content)
                 continue
-            else:
-                await SummaryService().create(news_pk, lang_pk, content)
-        await NewsService().update_news(news_pk, content=None, has_summary=True, has_summaries=True)
-        logger.info(f'Translate of summaries completed for <News> id {news_pk}.')
+            try:
+                await SummaryService().create(data['news_pk'], language.pk, content)
+            except Exception as e:
+                logger.exception(f'on saving translate of <Summary> id {data["summary_pk"]} to {language.code}:')
+                errors.setdefault(data['news_pk'], e)
+    for data in data_list:
+        if data['news_pk'] not in errors:
+            logger.info(f'Translate of summaries completed for <News> id {data["news_pk"]}.')
+    stats = client.stats - before
+    if stats['requests']:
+        logger.info(f'Translated {stats["texts"]} texts ({stats["characters"]} characters) in {stats["requests"]}'
+                    f' requests, {stats["characters"] / elapsed:.0f} characters/s,'
+                    f' {stats["texts"] - stats["requests"]} requests saved by batching.')
+    return [errors.get(job.news_pk) for job in jobs]
 
 
 if __name__ == '__main__':
@@ -85,6 +184,7 @@ if __name__ == '__main__':
         {'language': 'TR', 'name': 'Turkish'}, {'language': 'UK', 'name': 'Ukrainian'}
     ]
     d = Deepl()
-    # res = asyncio.run(d.translate('RU', 'book'))
+    # res = asyncio.run(d.translate('RU', ['book']))
     # print(res)
-    LanguageService().create_many(LANGUAGES)
+    asyncio.run(LanguageService().create_many(LANGUAGES))
+    asyncio.run(close_db())
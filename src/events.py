@@ -0,0 +1,33 @@
+import asyncio
+import logging
+from collections import defaultdict
+
+
+logger = logging.getLogger(__name__)
+
+
+class EventBus:
+    """In-process notifications between the stages of the application. A stage waiting for its topic
+    is woken at once when another stage publishes it, the timer of waiting remains only as a fallback.
+    A notification published while nobody waits is kept until the next waiting."""
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.events = defaultdict(asyncio.Event)
+
+    def publish(self, topic: str) -> None:
+        """Waking the stages waiting for the topic."""
+        if self.enabled:
+            self.events[topic].set()
+
+    async def wait(self, topic: str, timeout: float) -> bool:
+        """Waiting for the topic no longer than 'timeout' seconds. Returns whether it was published."""
+        event = self.events[topic]
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        event.clear()
+        return True
+
+
+bus = EventBus()
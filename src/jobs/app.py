@@ -0,0 +1,118 @@
+import asyncio
+import datetime
+import logging
+from functools import partial
+
+from config import DELIVERY_MODE, JOBS
+from src.deepl import Deepl, translate
+from src.events import bus
+from src.ratelimit import backoff
+from src.services import DeliveryCursorService, JobService, NewsService, SummaryService
+from src.summary import Summary, SummaryCache, summarize
+
+
+logger = logging.getLogger(__name__)
+
+PIPELINE: dict = {'summarize': 'translate', 'translate': 'fanout', 'fanout': None}  # stage: its next stage
+ROLES: dict = {'summarizer': ('summarize', ), 'translator': ('translate', 'fanout')}  # process role: its stages
+
+
+async def fanout(jobs: list) -> list:
+    """Handler of the fanout stage: preparing the summaries of the news of the jobs for sending to readers,
+    as rows for every reader or as positions of the delivery queue depending on the delivery mode."""
+    res = list()
+    for job in jobs:
+        try:
+            if DELIVERY_MODE == 'cursor':
+                count = await DeliveryCursorService().enqueue(job.news_pk)
+            else:
+                count = await SummaryService().fanout(job.news_pk)
+            await NewsService().update_news(job.news_pk, content=None, has_summary=True, has_summaries=True)
+        except Exception as e:
+            res.append(e)
+        else:
+            logger.info(f'{count} summaries of <News> id {job.news_pk} are prepared for sending.')
+            res.append(None)
+    if None in res:
+        bus.publish('sending')
+    return res
+
+
+async def worker(stage: str, handler, batch: int) -> None:
+    """The loop of one worker of the stage: taking up to 'batch' jobs, handling them together
+    and finishing each job by its result. A job that failed is repeated after a growing delay.
+    Without jobs, the worker waits for the notification about new jobs of the stage."""
+    service = JobService()
+    while True:
+        try:
+            jobs = await service.claim(stage, batch, JOBS['lease'])
+        except Exception:
+            logger.exception(f'Unable to take jobs of the stage {stage}.')
+            jobs = list()
+        if not jobs:
+            await bus.wait(stage, JOBS['poll'])
+            continue
+        try:
+            results = await handler(jobs)
+        except Exception as e:
+            logger.exception(f'in handling {len(jobs)} jobs of the stage {stage}:')
+            results = [e] * len(jobs)
+        for job, result in zip(jobs, results):
+            try:
+                if isinstance(result, BaseException):
+                    delay = backoff(job.attempts, base=JOBS['retry_delay'], cap=JOBS['lease'])
+                    state = await service.fail(job.pk, repr(result), delay, JOBS['attempts'])
+                    logger.warning(f'Job {stage} for <News> id {job.news_pk} failed ({state},'
+                                   f' attempt {job.attempts}): {result!r}')
+                else:
+                    await service.complete(job.pk, PIPELINE[stage], result)
+                    if PIPELINE[stage]:
+                        bus.publish(PIPELINE[stage])
+            except Exception:
+                logger.exception(f'Unable to finish job {stage} id {job.pk}.')
+
+
+async def report(service: JobService, since: datetime.datetime) -> None:
+    """Logging the queue depth of the stages and the latency of the jobs done since the time."""
+    depth = await service.depth()
+    latency = await service.latency(since)
+    for stage in PIPELINE:
+        states = depth.get(stage, dict())
+        seconds = sorted(latency.get(stage, list()))
+        text = f'Jobs {stage}: {states.get("pending", 0)} pending, {states.get("running", 0)} running,' \
+               f' {states.get("failed", 0)} failed; {len(seconds)} done'
+        if seconds:
+            text += f', latency avg {sum(seconds) / len(seconds):.1f}s,' \
+                    f' p95 {seconds[int(len(seconds) * 0.95)]:.1f}s, max {seconds[-1]:.1f}s'
+        logger.info(text + '.')
+
+
+async def main(age: float, stages: tuple = tuple(PIPELINE)) -> None:
+    """Recovering the jobs of the news left unfinished and running the worker pools of the stages.
+    Jobs are leased, so the workers of the same stage may run in several processes.
+    Queue depth and latency of the stages are logged regularly, expired summaries are evicted from the cache."""
+    service = JobService()
+    summarize_count, translate_count = await service.recover(age)
+    if summarize_count or translate_count:
+        logger.info(f'Recovered jobs for unfinished news: {summarize_count} summarize, {translate_count} translate.')
+    async with Summary() as kagi_client, Deepl() as deepl_client:
+        kagi = SummaryCache(kagi_client)
+        handlers = {'summarize': partial(summarize, kagi),
+                    'translate': partial(translate, deepl_client),
+                    'fanout': fanout}
+        workers = [asyncio.create_task(worker(stage, handlers[stage], JOBS[stage]['batch']))
+                   for stage in stages for _ in range(JOBS[stage]['workers'])]
+        logger.info(f'Started {len(workers)} job workers of the stages {", ".join(stages)}.')
+        try:
+            while True:
+                since = datetime.datetime.now()
+                await asyncio.sleep(JOBS['report'])
+                try:
+                    await report(service, since)
+                    kagi.log_stats()
+                    await kagi.evict()
+                except Exception:
+                    logger.exception('Unable to report the jobs state.')
+        finally:
+            for task in workers:
+                task.cancel()
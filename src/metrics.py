@@ -0,0 +1,39 @@
+import bisect
+
+
+class Histogram:
+    """Distribution of values over buckets with the given upper bounds, the last bucket is unbounded."""
+    def __init__(self, bounds: tuple):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def record(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+    def percentile(self, share: float) -> float:
+        """Upper bound of the bucket containing the share of values, infinity for the last bucket."""
+        rank = share * self.count
+        passed = 0
+        for bound, count in zip(self.bounds + (float('inf'), ), self.counts):
+            passed += count
+            if passed >= rank:
+                return bound
+        return float('inf')
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0
+        self.count = 0
+
+    def __str__(self) -> str:
+        if not self.count:
+            return 'no values'
+        buckets = ', '.join(f'<={bound:g}: {count}' for bound, count in zip(self.bounds, self.counts) if count)
+        if self.counts[-1]:
+            buckets += f', >{self.bounds[-1]:g}: {self.counts[-1]}'
+        return f'{self.count} values, avg {self.total / self.count:.1f}, p50 <={self.percentile(0.5):g},' \
+               f' p95 <={self.percentile(0.95):g} ({buckets.lstrip(", ")})'
@@ -1,211 +1,244 @@
 import asyncio
 import datetime
+import hashlib
 import logging
+from pathlib import Path
 
+import aiohttp
 import pytz
-from time import sleep
 
-import requests
-
-from bs4 import BeautifulSoup
-
-from config import NEWS_AGE, HEADERS
-from src.database import Session
-from src.services import NewsService
+from config import BASE_DIR, NEWS_AGE
+from src.events import bus
+from src.news.cache import SitemapCache
+from src.news.crawler import Crawler
+from src.news.dates import make_extractor
+from src.news.sitemap import CHUNK_SIZE, SitemapReader, iter_sitemap
+from src.services import JobService, NewsService
 
 
 logger = logging.getLogger(__name__)
 
+MAX_SITEMAP_DEPTH: int = 2  # nesting levels of sitemap indexes that are followed
 
-def connect_day_to_url(last_urls: set, url_and_date: list) -> set:
-    """Attaching a date to those URLs that were selected because they were not in the database.
-    This action is performed for those URLs for which the correct date is recorded in the XML-file."""
-    res = set()
-    for last_url in last_urls:
-        for u_d in url_and_date:
-            if u_d[0] == last_url:
-                res.add(u_d)
-    return res
 
+def read_records(records: list) -> (dict, list):
+    """Forming from the records of XML-file the mapping of news links to their dates and the list of nested XML-files.
+    Links are lowercased, the first date of a repeated link is kept."""
+    url_data = dict()
+    children = list()
+    for kind, url, date in records:
+        if kind == 'url':
+            url_data.setdefault(url.lower(), date)
+        else:
+            children.append(url)
+    return url_data, children
+
+
+async def get_news(crawler: Crawler, url: str, day: str or None,
+                   recording: str = 'not-recording', date_config: dict or list = None) -> (bool, dict) or None:
+    """Receiving data of one news from the URL and checking its date for the age.
+    The page body is received in full only for recording. If the date is not known, the page is read
+    until the date is found or the byte budget is spent, otherwise only the page availability is checked.
+    Returns the flag of the new news and the news data or None if the news page is not available."""
+    extractor = None if day else make_extractor(date_config)
+    text = None
+    try:
+        if recording == 'record':
+            status, text = await crawler.get(url)
+            if extractor and status == 200:
+                extractor.extract(text)
+        elif extractor:
+            status = await crawler.read_until(url, extractor.feed)
+        else:
+            status = await crawler.head(url)
+    except Exception:
+        logger.exception(f'on get response from <{url}> in <def get_news()>:')
+        return None
+    if status != 200:
+        return None
+    try:
+        if extractor:
+            day = extractor.day
+        else:
+            try:
+                day = datetime.datetime.strptime(day, '%Y-%m-%dT%H:%M:%S%z')
+            except:
+                day = None
+        if day and 24*60*60*NEWS_AGE >= (datetime.datetime.now(pytz.UTC) - day).total_seconds():
+            return True, {'url': url, 'day': day, 'content': text}
+        else:
+            return False, {'url': url, 'day': day, 'content': None}
+    except Exception:
+        logger.exception(f'on extracting date for <{url}> in <def get_news()>:')
+        return None
 
-def get_data(session: Session, urls_data: set, recording: str = 'not-recording') -> (list, list):
+
+async def get_data(crawler: Crawler, url_data: dict, recording: str = 'not-recording',
+                   date_config: dict or list = None) -> (list, list):
     """Receiving and Splitting data depending on the date of news from the URL
     and recording the news HTML into the database if this is enabled.
-    If the input data does not contain a date, then it is extracted from the content."""
+    If the input data does not contain a date for the URL, then it is extracted from the content
+    by the date extraction strategy of the site.
+    News pages are requested in parallel."""
     new_url_data = list()
     old_url_data = list()
-    for data in urls_data:
-        if isinstance(data, tuple):
-            url = data[0]
-            day = data[1]
-        else:
-            url = data
-            day = None
-        try:
-            response = session.get(url, timeout=(10, 5))
-        except Exception:
-            logger.exception(f'on get response from <{url}> in <def get_data()>:')
+    results = await asyncio.gather(*(get_news(crawler, url, day, recording, date_config)
+                                     for url, day in url_data.items()))
+    for result in results:
+        if not result:
             continue
+        is_new, news_data = result
+        if is_new:
+            new_url_data.append(news_data)
         else:
-            if response.status_code == 200:
-                try:
-                    text = response.text
-                    if not day:
-                        day = parse_date(text)
-                    else:
-                        try:
-                            day = datetime.datetime.strptime(day, '%Y-%m-%dT%H:%M:%S%z')
-                        except:
-                            day = None
-                    if recording == 'not-record':
-                        text = ''
-                    if day and 24*60*60*NEWS_AGE >= (datetime.datetime.now(pytz.UTC) - day).total_seconds():
-                        new_url_data.append({'url': url, 'day': day, 'content': text})
-                    else:
-                        old_url_data.append({'url': url, 'day': day, 'content': ''})
-                except Exception:
-                    logger.exception(f'on <def parse_date()> for <{url}> in <def get_data()>:')
-                    continue
+            old_url_data.append(news_data)
     new_url_data.sort(key=lambda x: x.get('day') if x.get('day') else datetime.datetime.strptime('1970', '%Y'))
     return new_url_data, old_url_data
 
 
-def get_requests_session() -> requests.sessions:
-    """Receiving and updating a session for requests"""
-    session = requests.Session()
-    session.headers.update(HEADERS)
-    return session
-
-
-def parser(xml_url: str, language: str, session: requests.sessions) -> (list, str):
-    """Finding news link and news date from network XML-file. Forming a list from this data. If applications are blocked
-    from accessing network XML-file, then news data is retrieved from a local file with the same name."""
+async def parser(xml_url: str, language: str, crawler: Crawler,
+                 cache: SitemapCache = None, depth: int = 0) -> (dict, str):
+    """Finding news link and news date from network XML-file. Forming a mapping of links to dates from this data. If applications are blocked
+    from accessing network XML-file, then news data is retrieved from a local file with the same name.
+    The XML-file is parsed in parts while it is being received. XML-files listed in a sitemap index
+    are parsed concurrently and their data is joined.
+    With the cache, the XML-file is requested conditionally, and its links are skipped if it has not changed.
+    Sitemap indexes are always received in full, so that the XML-files listed in them are checked."""
+    url_data = dict()
+    reader = SitemapReader()
+    records = list()
+    headers = await cache.request_headers(xml_url) if cache else dict()
+    content_hash = hashlib.sha1()
     try:
-        response = session.get(xml_url, timeout=(10, 1))
-        if response.status_code == 200:
-            data_list = list()
-            soup = BeautifulSoup(response.text, features='xml')
-            if 'robots' in str(soup.find('meta')):
-                logger.warning(f'File {xml_url} is not available for URL robot extraction.')
-                from_file = soup_from_file(xml_url)
-                if from_file:
-                    soup = from_file
-            for link in soup.find_all('url'):
-                url = link.find('loc')
-                if url:
-                    date = link.find('lastmod')
-                    if not date:
-                        date = link.find('news:publication_date')
-                    if date:
-                        date = date.text
-                    else:
-                        date = '1970-01-01T00:00:00+00:00'
-                    data_list.append((url.text.lower(), date))
-            return data_list, language
-    except requests.exceptions.ConnectionError as e:
+        async with crawler.request(xml_url, headers=headers) as response:
+            if response.status == 304 and cache:
+                cache.not_modified(xml_url)
+                return url_data, language
+            if response.status != 200:
+                logger.warning(f'File {xml_url} is not available, response status {response.status}.')
+                return url_data, language
+            async for chunk in crawler.iter_chunks(response, CHUNK_SIZE):
+                content_hash.update(chunk)
+                records.extend(reader.feed(chunk))
+            response_headers = response.headers
+    except aiohttp.ClientError as e:
         logger.exception(f'in <def parser({xml_url}, {language})>:')
         raise e
+    records.extend(reader.close())
+    is_unchanged = False
+    if reader.is_blocked:
+        logger.warning(f'File {xml_url} is not available for URL robot extraction.')
+        from_file = sitemap_from_file(xml_url)
+        if from_file:
+            records = list(iter_sitemap(from_file))
+    elif cache:
+        is_index = any(kind == 'sitemap' for kind, _, _ in records)
+        is_unchanged = cache.is_unchanged(xml_url, response_headers, content_hash.hexdigest(), is_index)
+    url_data, children = read_records(records)
+    if is_unchanged:
+        url_data.clear()
+    if children and depth < MAX_SITEMAP_DEPTH:
+        results = await asyncio.gather(*(parser(child, language, crawler, cache, depth + 1) for child in children),
+                                       return_exceptions=True)
+        for child, result in zip(children, results):
+            if isinstance(result, Exception):
+                logger.error(f'in <def parser({child}, {language})> of sitemap index {xml_url}:', exc_info=result)
+                continue
+            for url, date in result[0].items():
+                url_data.setdefault(url, date)
+    return url_data, language
 
 
-def parse_date(text: str) -> datetime:
-    """Finding the publication news date in news text."""
-    soup = BeautifulSoup(text, 'lxml')
-    date = soup.find_all('span', class_='page__meta-item-text')
-    if not date:
-        return False
-    date_time = datetime.datetime.strptime(f'{date[0].text} +0300', '%d.%m.%Y %z')
-    return date_time
-
-
-def pull_url(site_info: tuple, session: requests.sessions, check_date: bool) -> bool:
+async def pull_url(site_info: tuple, crawler: Crawler, check_date: bool) -> bool:
     """Retrieving news links from one XML-file and writing them to the database.
     Links that are not in the database are selected.
     The date of the news is compared with the configured age and,
     depending on the result, the news data is written to the data database in different ways.
     If the link is received from XML-file labeled "check", then for comparison with age, the date is taken,
     which is extracted from the text of the news.
-    Comparison of news date with age is not performed when the application is launched for the first time."""
-    if not session:
-        session = get_requests_session()
+    Comparison of news date with age is not performed when the application is launched for the first time.
+    A summarize job is queued for every new news.
+    Unchanged XML-files are skipped. Their validators are saved if all new links are written to the database."""
     xml_url = site_info[0].lower()
     lang_code = site_info[1].upper()
-    url_and_date, language = parser(xml_url, lang_code, session)
-    urls = set(map(lambda x: x[0], url_and_date))
-    all_url = set(NewsService().get_all_url())
-    last_urls = urls.difference(all_url)
-    logger.info(f'Detected {len(last_urls)} new in {len(urls)} url from {xml_url}.')
-    if not any(last_urls):
+    cache = SitemapCache()
+    url_data, language = await parser(xml_url, lang_code, crawler, cache)
+    logger.info(f'Sitemap cache for {xml_url}: {cache.stats["not_modified"]} not modified,'
+                f' {cache.stats["unchanged"]} unchanged, {cache.stats["changed"]} changed.')
+    new_urls = await NewsService().get_new_urls(url_data)
+    last_url_data = {url: date for url, date in url_data.items() if url in new_urls}
+    logger.info(f'Detected {len(last_url_data)} new in {len(url_data)} url from {xml_url}.')
+    if not any(last_url_data):
+        await cache.save()
         return False
     if site_info[2] == 'check' and check_date:
-        new_data, old_data = get_data(session, last_urls, site_info[3])
-        logger.info(f'Check date successful for {len(new_data)} new in {len(last_urls)} url from {xml_url}.')
+        date_config = site_info[4] if len(site_info) > 4 else None
+        new_data, old_data = await get_data(crawler, dict.fromkeys(last_url_data), site_info[3], date_config)
+        logger.info(f'Check date successful for {len(new_data)} new in {len(last_url_data)} url from {xml_url}.')
     elif site_info[2] != 'check' and check_date:
-        new_data, old_data = get_data(session, connect_day_to_url(last_urls, url_and_date), site_info[3])
-        session.close()
-        logger.info(f'Check date successful for {len(new_data)} new in {len(last_urls)} url from {xml_url}.')
+        new_data, old_data = await get_data(crawler, last_url_data, site_info[3])
+        logger.info(f'Check date successful for {len(new_data)} new in {len(last_url_data)} url from {xml_url}.')
     else:
-        new_data, old_data = list(), list(map(lambda x: {'url': x}, last_urls))
+        new_data, old_data = list(), list(map(lambda x: {'url': x}, last_url_data))
     try:
-        if any(new_data):
-            NewsService().create_many(new_data, lang_code, has_summary=False, has_summaries=False)
-        if any(old_data):
-            NewsService().create_many(old_data, lang_code, has_summary=True, has_summaries=True)
+        new_pks, new_skipped = await NewsService().create_many(new_data, lang_code,
+                                                               has_summary=False, has_summaries=False)
+        old_pks, old_skipped = await NewsService().create_many(old_data, lang_code,
+                                                               has_summary=True, has_summaries=True)
+        if await JobService().enqueue_many('summarize', new_pks):
+            bus.publish('summarize')
     except Exception as e:
         raise e
     else:
-        logger.info(f'News url from {xml_url} added to database')
-        return True
-
-
-def pull_urls(sites_info: list, check_date: bool = True) -> None:
-    """Sequentially obtaining links to news from list of XML-file and writing them to the database.
-    For XML files marked CHECK, the session is used several times to receive links."""
-    session = get_requests_session()
-    for site_info in sites_info:
-        logger.debug(f'Pull URLs from {site_info[0]} has started')
-        sleep(1)
-        if site_info[2] == 'check':
-            sess = session
-        else:
-            sess = False
-        try:
-            pull_url(site_info, sess, check_date)
-        except Exception:
-            logger.exception(f'in <def pull_url()>. News url from {site_info[0]} not added to database:')
-            continue
-    session.close()
+        logger.info(f'News url from {xml_url} added to database: {len(new_pks) + len(old_pks)} inserted,'
+                    f' {new_skipped + old_skipped} skipped.')
+    failed = len(last_url_data) - len(new_data) - len(old_data)
+    if failed:
+        logger.warning(f'{failed} news pages from {xml_url} were not received, the sitemap cache is not updated.')
+    else:
+        await cache.save()
+    return True
+
+
+async def pull_urls(sites_info: list, check_date: bool = True) -> None:
+    """Concurrent obtaining links to news from list of XML-file and writing them to the database.
+    All XML-files and news pages are requested through one crawler with a shared connection pool."""
+    async with Crawler() as crawler:
+        results = await asyncio.gather(*(pull_url(site_info, crawler, check_date) for site_info in sites_info),
+                                       return_exceptions=True)
+    logger.info(f'Crawl of {len(sites_info)} XML-files received {crawler.bytes_received / 1024:.1f} KB.')
+    for site_info, result in zip(sites_info, results):
+        if isinstance(result, Exception):
+            logger.error(f'in <def pull_url()>. News url from {site_info[0]} not added to database:',
+                         exc_info=result)
 
 
-def soup_from_file(url: str) -> BeautifulSoup or bool:
-    """Getting BS-instance from a local XML-file to extract news data."""
-    from pathlib import Path
-    from config import BASE_DIR
+def sitemap_from_file(url: str) -> Path or bool:
+    """Getting the path of a local XML-file with the same name to extract news data."""
     file_name = url.split('/')[-1]
-    try:
-        with open(Path(BASE_DIR, 'xml', file_name), encoding='utf-8', mode='r') as p:
-            response_text = p.read()
-        return BeautifulSoup(response_text, features='xml')
-    except Exception:
-        return False
+    path = Path(BASE_DIR, 'xml', file_name)
+    if path.is_file():
+        return path
+    return False
+
+
+def next_pull_time(now: datetime.datetime, wait_pull_url: int) -> datetime.datetime:
+    """The next time of getting data from files: the 57th minute of the hour divisible by 'wait_pull_url'."""
+    moment = now.replace(minute=57, second=0, microsecond=0)
+    while moment <= now or moment.hour % wait_pull_url:
+        moment += datetime.timedelta(hours=1)
+    return moment
 
 
 async def main(sites_list, wait_pull_url) -> None:
-    """Main loop for getting data from files.
+    """Main loop for getting data from files. The loop sleeps right until the next selected time.
     At the selected time, there is the lowest probability of blocking access of applications to a network XML-file."""
     while True:
-        await asyncio.sleep(11*60)
-        if datetime.datetime.now().minute < 45:
-            continue
-        while True:
-            await asyncio.sleep(111)
-            if datetime.datetime.now().minute < 57:
-                continue
-            if (datetime.datetime.now().hour % wait_pull_url) != 0:
-                break
-            pull_urls(sites_list)
-            break
+        now = datetime.datetime.now()
+        await asyncio.sleep((next_pull_time(now, wait_pull_url) - now).total_seconds())
+        await pull_urls(sites_list)
 
 
 if __name__ == '__main__':
     from config import NEWS_SITES_LIST
-    pull_urls(NEWS_SITES_LIST, check_date=True)
+    asyncio.run(pull_urls(NEWS_SITES_LIST, check_date=True))
@@ -0,0 +1,60 @@
+import logging
+from collections import Counter
+
+from multidict import CIMultiDictProxy
+
+from src.services import SitemapService
+
+
+logger = logging.getLogger(__name__)
+
+
+class SitemapCache:
+    """Validators of the XML-files of one site from their last polling, stored in the database.
+    'ETag' and 'Last-Modified' of the last response are sent with the next request, so an unchanged XML-file
+    is answered with status 304. The hash of the body detects unchanged XML-files of servers ignoring validators.
+    Sitemap indexes are requested without validators. New validators are saved only after the data of the XML-files is written to the database."""
+    def __init__(self, service: SitemapService = None):
+        self.service = service or SitemapService()
+        self.stored = dict()
+        self.pending = dict()
+        self.stats = Counter(not_modified=0, unchanged=0, changed=0)
+
+    async def request_headers(self, url: str) -> dict:
+        """Getting the conditional request headers for the XML-file."""
+        data = await self.service.get(url)
+        self.stored[url] = data
+        headers = dict()
+        if data and data.is_index:
+            return headers
+        if data and data.etag:
+            headers['If-None-Match'] = data.etag
+        if data and data.last_modified:
+            headers['If-Modified-Since'] = data.last_modified
+        return headers
+
+    def not_modified(self, url: str) -> None:
+        """Counting the XML-file answered with status 304."""
+        self.stats['not_modified'] += 1
+        logger.debug(f'File {url} is not modified.')
+
+    def is_unchanged(self, url: str, headers: CIMultiDictProxy, content_hash: str, is_index: bool) -> bool:
+        """Keeping the validators of the received XML-file and checking if its body is the same as last time."""
+        self.pending[url] = {'url': url,
+                             'etag': headers.get('ETag'),
+                             'last_modified': headers.get('Last-Modified'),
+                             'content_hash': content_hash,
+                             'is_index': is_index}
+        data = self.stored.get(url)
+        if data and data.content_hash == content_hash:
+            self.stats['unchanged'] += 1
+            logger.debug(f'File {url} has the same body as last time.')
+            return True
+        self.stats['changed'] += 1
+        return False
+
+    async def save(self) -> None:
+        """Writing the validators of the received XML-files to the database."""
+        if len(self.pending):
+            await self.service.save_many(list(self.pending.values()))
+            self.pending.clear()
@@ -0,0 +1,95 @@
+import asyncio
+import codecs
+import logging
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from config import CRAWLER, HEADERS
+
+
+logger = logging.getLogger(__name__)
+
+CONDITIONAL_HEADERS: tuple = ('if-modified-since', 'if-none-match')  # sent only with the validators of the URL
+CHUNK_SIZE: int = 16 * 1024  # BYTES - part of the response body read at one time
+
+
+class Crawler:
+    """Asynchronous HTTP client with a pooled session for sitemaps and news pages.
+    The number of simultaneous requests is limited both for all sites and for each site separately.
+    The amount of received body bytes is counted."""
+    def __init__(self,
+                 concurrency: int = CRAWLER['concurrency'],
+                 per_host: int = CRAWLER['per_host'],
+                 timeout: int = CRAWLER['timeout'],
+                 page_budget: int = CRAWLER['page_budget']):
+        self.concurrency = concurrency
+        self.page_budget = page_budget
+        self.per_host = per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.host_semaphores = defaultdict(lambda: asyncio.Semaphore(per_host))
+        self.session = None
+        self.bytes_received = 0
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        headers = {key: value for key, value in HEADERS.items() if key.lower() not in CONDITIONAL_HEADERS}
+        self.session = aiohttp.ClientSession(connector=connector, headers=headers, timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.session.close()
+
+    @asynccontextmanager
+    async def request(self, url: str, method: str = 'GET', **kwargs) -> aiohttp.ClientResponse:
+        """Sending the request by URL within the concurrency limits. The response body is read by the caller."""
+        host = urlsplit(url).netloc
+        async with self.semaphore, self.host_semaphores[host]:
+            async with self.session.request(method, url, **kwargs) as response:
+                logger.debug(f'Received {response.status} from <{url}>.')
+                yield response
+
+    async def iter_chunks(self, response: aiohttp.ClientResponse, chunk_size: int = CHUNK_SIZE) -> bytes:
+        """Reading the response body in parts."""
+        async for chunk in response.content.iter_chunked(chunk_size):
+            self.bytes_received += len(chunk)
+            yield chunk
+
+    async def get(self, url: str) -> (int, str):
+        """Receiving the status and the text of the response by URL."""
+        async with self.request(url) as response:
+            body = await response.read()
+            self.bytes_received += len(body)
+            return response.status, body.decode(response.charset or 'utf-8', errors='replace')
+
+    async def head(self, url: str) -> int:
+        """Receiving the status of the response by URL without its body.
+        If the site does not allow HEAD requests, the GET response is closed right after its headers."""
+        async with self.request(url, method='HEAD') as response:
+            status = response.status
+        if status in (405, 501):
+            async with self.request(url) as response:
+                status = response.status
+                response.close()
+        return status
+
+    async def read_until(self, url: str, feed, budget: int = None) -> int:
+        """Receiving the response text by URL in parts and passing them to the 'feed' function.
+        Reading stops when the function returns a true value or the byte budget is spent. Returns the status."""
+        budget = budget or self.page_budget
+        async with self.request(url) as response:
+            if response.status != 200:
+                return response.status
+            decoder = codecs.getincrementaldecoder(response.charset or 'utf-8')(errors='replace')
+            received = 0
+            async for chunk in self.iter_chunks(response):
+                received += len(chunk)
+                if feed(decoder.decode(chunk)) or received >= budget:
+                    response.close()
+                    break
+            else:
+                feed(decoder.decode(b'', final=True))
+            return response.status
@@ -0,0 +1,162 @@
+import datetime
+import re
+from abc import ABC, abstractmethod
+from html.parser import HTMLParser
+
+import pytz
+
+
+DEFAULT_DATE_EXTRACTOR: dict = {'strategy': 'scan',
+                                'tag': 'span',
+                                'class': 'page__meta-item-text',
+                                'format': '%d.%m.%Y',
+                                'tz': 'Europe/Moscow'}
+PART_SIZE: int = 16 * 1024  # CHARACTERS - part of the whole HTML fed to the extractor at one time
+OVERLAP: int = 1024  # CHARACTERS - tail of the fed text searched again together with the next part
+
+
+def to_datetime(value: str, date_format: str = None, tz: str = 'UTC') -> datetime.datetime or None:
+    """Converting the found date text to an aware datetime. Without the format, the text is read as ISO 8601.
+    A date without offset is assigned the time zone."""
+    value = value.strip()
+    try:
+        if date_format:
+            day = datetime.datetime.strptime(value, date_format)
+        else:
+            day = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if day.tzinfo is None:
+        day = pytz.timezone(tz).localize(day)
+    return day
+
+
+class DateExtractor(ABC):
+    """Base of the strategies finding the publication date in the HTML of the news page.
+    The HTML can be fed in parts, the search stops at the first match."""
+    def __init__(self, date_format: str = None, tz: str = 'UTC'):
+        self.date_format = date_format
+        self.tz = tz
+        self.day = None
+
+    def feed(self, text: str) -> datetime.datetime or None:
+        """Feeding the next part of the HTML. Returns the date once it is found."""
+        if self.day is None:
+            value = self._search(text)
+            if value:
+                self.day = to_datetime(value, self.date_format, self.tz)
+        return self.day
+
+    def extract(self, text: str) -> datetime.datetime or None:
+        """Finding the date in the whole HTML. The HTML is fed in parts until the date is found."""
+        for start in range(0, len(text), PART_SIZE):
+            if self.feed(text[start:start + PART_SIZE]):
+                break
+        return self.day
+
+    @abstractmethod
+    def _search(self, text: str) -> str or None:
+        """Searching the date text in the next part of the HTML."""
+
+
+class RegexExtractor(DateExtractor):
+    """Finding the date by the first group of the regular expression."""
+    def __init__(self, pattern: str, date_format: str = None, tz: str = 'UTC'):
+        super().__init__(date_format, tz)
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.tail = ''
+
+    def _search(self, text: str) -> str or None:
+        text = self.tail + text
+        match = self.pattern.search(text)
+        self.tail = text[-OVERLAP:]
+        if match:
+            return match.group(1)
+
+
+class MetaExtractor(RegexExtractor):
+    """Finding the date in the tag <meta property="article:published_time" content="...">."""
+    TAG = r'<meta\b[^>]*?(?:property|name)=["\']article:published_time["\'][^>]*>'
+    CONTENT = re.compile(r'content=["\']([^"\']+)["\']', re.IGNORECASE)
+
+    def __init__(self, date_format: str = None, tz: str = 'UTC'):
+        super().__init__(f'({self.TAG})', date_format, tz)
+
+    def _search(self, text: str) -> str or None:
+        tag = super()._search(text)
+        if tag:
+            match = self.CONTENT.search(tag)
+            if match:
+                return match.group(1)
+
+
+class JsonLdExtractor(RegexExtractor):
+    """Finding the date in the field 'datePublished' of the JSON-LD script."""
+    def __init__(self, date_format: str = None, tz: str = 'UTC'):
+        super().__init__(r'"datePublished"\s*:\s*"([^"]+)"', date_format, tz)
+
+
+class ScanExtractor(DateExtractor, HTMLParser):
+    """Finding the date as the text of the first tag with the class. The HTML is scanned as a stream of tags
+    without building the document tree, the scan stops at the first match."""
+    def __init__(self, tag: str, class_name: str, date_format: str = None, tz: str = 'UTC'):
+        DateExtractor.__init__(self, date_format, tz)
+        HTMLParser.__init__(self)
+        self.tag = tag
+        self.class_name = class_name
+        self.captured = None
+        self.found = None
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if self.found is None and self.captured is None and tag == self.tag:
+            classes = dict(attrs).get('class') or ''
+            if self.class_name in classes.split():
+                self.captured = list()
+
+    def handle_data(self, data: str) -> None:
+        if self.captured is not None:
+            self.captured.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if self.captured is not None and tag == self.tag:
+            self.found = ''.join(self.captured)
+            self.captured = None
+
+    def _search(self, text: str) -> str or None:
+        HTMLParser.feed(self, text)
+        return self.found
+
+
+class ChainExtractor(DateExtractor):
+    """Trying several strategies, the date of the first strategy that finds it is taken."""
+    def __init__(self, extractors: list):
+        super().__init__()
+        self.extractors = extractors
+
+    def _search(self, text: str) -> str or None:
+        """The date of the first strategy finding it, as the text in ISO 8601 with the offset."""
+        for extractor in self.extractors:
+            day = extractor.feed(text)
+            if day:
+                return day.isoformat()
+
+
+def make_extractor(config: dict or list = None) -> DateExtractor:
+    """Creating a date extractor for one news page by the site configuration.
+    The configuration is a dictionary with the 'strategy' key or a list of them tried in order."""
+    if config is None:
+        config = DEFAULT_DATE_EXTRACTOR
+    if isinstance(config, (list, tuple)):
+        return ChainExtractor([make_extractor(item) for item in config])
+    strategy = config['strategy']
+    date_format = config.get('format')
+    tz = config.get('tz', 'UTC')
+    if strategy == 'meta':
+        return MetaExtractor(date_format, tz)
+    if strategy == 'jsonld':
+        return JsonLdExtractor(date_format, tz)
+    if strategy == 'regex':
+        return RegexExtractor(config['pattern'], date_format, tz)
+    if strategy == 'scan':
+        return ScanExtractor(config['tag'], config['class'], date_format, tz)
+    raise ValueError(f'Unknown date extraction strategy {strategy}.')
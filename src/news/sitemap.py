@@ -0,0 +1,88 @@
+from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from lxml import etree
+
+
+CHUNK_SIZE: int = 64 * 1024  # BYTES - size of the XML-file part fed to the reader at one time
+DEFAULT_DATE: str = '1970-01-01T00:00:00+00:00'  # date of records without 'lastmod' and 'publication_date'
+
+
+def local_name(element: etree.ElementBase) -> str:
+    """Getting the element tag name without namespace."""
+    return etree.QName(element).localname
+
+
+class SitemapReader:
+    """Streaming reader of XML-files 'urlset' and 'sitemapindex' with any namespaces.
+    The file is fed in parts, records are returned as soon as their elements are closed
+    and then the elements are cleared, so the whole document tree is never kept in memory.
+    Each record is a tuple of the element name ('url' or 'sitemap'), its link and its date."""
+    def __init__(self):
+        self.parser = etree.XMLPullParser(events=('end',),
+                                          tag=('{*}url', '{*}sitemap', '{*}meta'),
+                                          recover=True,
+                                          huge_tree=True)
+        self.is_blocked = False
+
+    def feed(self, data: bytes) -> list:
+        """Feeding the next part of the XML-file. Returns records closed in this part."""
+        self.parser.feed(data)
+        return self._read_events()
+
+    def close(self) -> list:
+        """Finishing the XML-file. Returns the remaining records."""
+        try:
+            self.parser.close()
+        except etree.XMLSyntaxError:
+            pass
+        return self._read_events()
+
+    def _read_events(self) -> list:
+        records = list()
+        for _, element in self.parser.read_events():
+            name = local_name(element)
+            if name == 'meta':
+                if 'robots' in ' '.join(element.attrib.values()):
+                    self.is_blocked = True
+                continue
+            parent = element.getparent()
+            if parent is None or local_name(parent) not in ('urlset', 'sitemapindex'):
+                continue
+            record = self._read_record(name, element)
+            if record:
+                records.append(record)
+            element.clear()
+            while element.getprevious() is not None:
+                del parent[0]
+        return records
+
+    @staticmethod
+    def _read_record(name: str, element: etree.ElementBase) -> tuple or None:
+        fields = dict()
+        for child in element.iter():
+            if not isinstance(child.tag, str):
+                continue
+            child_name = local_name(child)
+            if child_name in ('loc', 'lastmod', 'publication_date') and child_name not in fields:
+                fields[child_name] = (child.text or '').strip()
+        if not fields.get('loc'):
+            return None
+        date = fields.get('lastmod') or fields.get('publication_date') or DEFAULT_DATE
+        return name, fields['loc'], date
+
+
+def iter_sitemap(source: Path or str or BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """Reading records from the local XML-file or binary file object in parts."""
+    reader = SitemapReader()
+    if isinstance(source, (str, Path)):
+        file = open(source, mode='rb')
+    else:
+        file = source
+    try:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            yield from reader.feed(chunk)
+        yield from reader.close()
+    finally:
+        if file is not source:
+            file.close()
@@ -0,0 +1,57 @@
+import asyncio
+import random
+import time
+
+
+class TokenBucket:
+    """Rate limiter: tokens are added at 'rate' per second up to 'capacity',
+    each call takes a token and waits for it when the bucket is empty."""
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1) -> None:
+        """Taking tokens from the bucket, waiting until there are enough of them."""
+        async with self.lock:
+            self._refill()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= tokens
+
+    def pause(self, seconds: float) -> None:
+        """Emptying the bucket so that the next token is given not earlier than in 'seconds'."""
+        self._refill()
+        self.tokens = min(self.tokens, 1) - seconds * self.rate
+
+
+class KeyRateLimit:
+    """Rate limiter for each key separately: calls with the same key are spaced by 1 / 'rate' seconds,
+    calls with different keys do not wait for each other."""
+    def __init__(self, rate: float, prune: int = 10000):
+        self.interval = 1 / rate
+        self.prune = prune
+        self.next_time = dict()
+
+    async def acquire(self, key) -> None:
+        """Reserving the next free time of the key and waiting for it."""
+        now = time.monotonic()
+        if len(self.next_time) > self.prune:
+            self.next_time = {k: t for k, t in self.next_time.items() if t > now}
+        start = max(now, self.next_time.get(key, now))
+        self.next_time[key] = start + self.interval
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+def backoff(attempt: int, base: float = 1, cap: float = 60) -> float:
+    """Delay in seconds before the retry: random up to the exponentially growing limit ('full jitter')."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
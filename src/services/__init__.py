@@ -1,5 +1,10 @@
+from .deletion import DeletionService
+from .delivery import DeliveryCursorService
+from .job import JobService
 from .language import LanguageService
 from .news import NewsService
 from .reader import ReaderService
 from .readersummary import ReaderSummaryService
+from .sitemap import SitemapService
 from .summary import SummaryService
+from .summarycache import SummaryCacheService
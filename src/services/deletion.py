@@ -0,0 +1,50 @@
+import datetime
+import logging
+
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import AsyncSession, Deletion, insert_or_ignore
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeletionService:
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def add(self, chat_id: int, message_id: int, due: datetime.datetime) -> None:
+        """Writing a 'Deletion' instance to the database. A message already waiting for deletion is kept."""
+        async with self.sessions() as s:
+            stmt = insert_or_ignore(Deletion, s, ['chat_id', 'message_id'])
+            try:
+                await s.execute(stmt.values(chat_id=chat_id, message_id=message_id, due=due))
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def add({chat_id}, {message_id})>:')
+                raise e
+
+    async def get_all(self) -> list:
+        """Getting fields 'chat_id', 'message_id', 'due' of all 'Deletion' instances."""
+        stmt = select(Deletion.chat_id, Deletion.message_id, Deletion.due)
+        async with self.sessions() as s:
+            return (await s.execute(stmt)).all()
+
+    async def remove_many(self, messages: list) -> int:
+        """Deleting 'Deletion' instances of the messages - pairs (chat_id, message_id).
+        Returns the amount of deleted instances."""
+        if not messages:
+            return 0
+        stmt = delete(Deletion).where(tuple_(Deletion.chat_id, Deletion.message_id).in_(messages))
+        async with self.sessions() as s:
+            try:
+                count = (await s.execute(stmt)).rowcount
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def remove_many()> for {len(messages)} objects <Deletion>:')
+                raise e
+        return count
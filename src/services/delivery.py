@@ -0,0 +1,175 @@
+import datetime
+import logging
+from typing import AsyncIterator
+
+from sqlalchemy import delete, exists, func, literal, or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from config import SENDER
+from src.database import AsyncSession, DeliveryCursor, DeliveryQueue, News, Reader, ReaderSummary, Summary, \
+    insert_or_ignore, insert_or_update
+
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryCursorService:
+    """Delivery without a row for every reader and summary. Summaries ready for sending are put in order
+    into the delivery queue, each reader keeps a cursor - the last queue position sent to the reader.
+    Recipients are found at the time of sending by the language of readers and their cursors.
+    The cursor of a new reader is opened at the queue position of the reader registration.
+    A sender leases the cursors of the readers it sends to, so several senders never send to the same reader."""
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def enqueue(self, news_pk: int) -> int:
+        """Writing 'DeliveryQueue' instances for all summaries of the news. Returns the amount of written instances."""
+        summaries = select(Summary.pk, Summary.news_pk, Summary.lang_pk).where(Summary.news_pk == news_pk)
+        async with self.sessions() as s:
+            stmt = insert_or_ignore(DeliveryQueue, s, ['summary_pk']).\
+                from_select(['summary_pk', 'news_pk', 'lang_pk'], summaries)
+            try:
+                count = (await s.execute(stmt)).rowcount
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def enqueue({news_pk})> for objects <DeliveryQueue>:')
+                raise e
+        logger.debug(f'{count} objects <DeliveryQueue> for <News> id {news_pk} created successfully.')
+        return count
+
+    async def claim(self, amount: int, age: float, lease: float) -> list:
+        """Taking for sending the cursors of up to 'amount' active readers with summaries queued after them,
+        the readers furthest behind first, skipping the cursors leased by another sender. The taken cursors are
+        leased for 'lease' seconds. Returns all not-sent messages of the readers: fields 'pk', 'summary_pk'
+        of the 'DeliveryQueue' instance and fields 'tg_id', 'pk' as 'reader_pk' of the 'Reader' instance
+        in the language of the summary, ordered by 'pk' and 'reader_pk'."""
+        now = datetime.datetime.now()
+        target_date = now - datetime.timedelta(days=age)
+        queued = exists().where(DeliveryQueue.lang_pk == Reader.lang_pk,
+                                DeliveryQueue.pk > DeliveryCursor.queue_pk,
+                                DeliveryQueue.date >= target_date)
+        pks = select(DeliveryCursor.pk).\
+            join(Reader, Reader.pk == DeliveryCursor.reader_pk).\
+            where(Reader.is_active == True, queued).\
+            where(or_(DeliveryCursor.lease_until.is_(None), DeliveryCursor.lease_until < now)).\
+            order_by(DeliveryCursor.queue_pk).\
+            limit(amount).\
+            with_for_update(skip_locked=True, of=DeliveryCursor).\
+            scalar_subquery()
+        stmt = update(DeliveryCursor).where(DeliveryCursor.pk.in_(pks)).\
+            values(lease_until=now + datetime.timedelta(seconds=lease), date=DeliveryCursor.date).\
+            returning(DeliveryCursor.reader_pk).\
+            execution_options(synchronize_session=False)
+        async with self.sessions() as s:
+            try:
+                await self._open_cursors(s)
+                readers = (await s.scalars(stmt)).all()
+                rows = (await s.execute(
+                    select(DeliveryQueue.pk, DeliveryQueue.summary_pk, Reader.tg_id, Reader.pk.label('reader_pk')).
+                    join(Reader, Reader.lang_pk == DeliveryQueue.lang_pk).
+                    join(DeliveryCursor, DeliveryCursor.reader_pk == Reader.pk).
+                    where(Reader.pk.in_(readers), DeliveryQueue.date >= target_date).
+                    where(DeliveryQueue.pk > DeliveryCursor.queue_pk).
+                    order_by(DeliveryQueue.pk, Reader.pk))).fetchall() if readers else list()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <claim({amount})> for objects <DeliveryCursor>:')
+                raise e
+        return rows
+
+    async def iter_pending(self, chunk: int, age: float, lease: float = SENDER['lease']) -> AsyncIterator[list]:
+        """Not-sent messages of up to 'chunk' readers at a time, each chunk is taken after the previous one
+        is handled. Cursors of taken readers are leased, so the readers already handled and the readers of other
+        senders are not read again. Readers without sent messages are taken again when their lease expires."""
+        while True:
+            rows = await self.claim(chunk, age, lease)
+            if rows:
+                yield rows
+            if len({row.reader_pk for row in rows}) < chunk:
+                return
+
+    @staticmethod
+    async def _open_cursors(s: AsyncSession) -> None:
+        """Writing cursors for readers without them at the last queue position before the reader registration.
+        All earlier readers have cursors, so only readers after the last reader with a cursor are read.
+        A cursor opened at the same time by another sender is kept."""
+        last_reader = select(func.coalesce(func.max(DeliveryCursor.reader_pk), 0)).scalar_subquery()
+        registration = select(func.coalesce(func.max(DeliveryQueue.pk), 0)).\
+            where(DeliveryQueue.date < Reader.date).\
+            scalar_subquery()
+        new_readers = select(Reader.pk, registration, literal(datetime.datetime.now())).\
+            outerjoin(DeliveryCursor, DeliveryCursor.reader_pk == Reader.pk).\
+            where(Reader.pk > last_reader, DeliveryCursor.pk.is_(None))
+        await s.execute(insert_or_ignore(DeliveryCursor, s, ['reader_pk']).
+                        from_select(['reader_pk', 'queue_pk', 'date'], new_readers))
+
+    async def mark_sent(self, rows: list, failed: list = ()) -> bool:
+        """Moving the cursors of readers over the sent queue positions and releasing their lease.
+        A cursor is moved only over the positions before the first 'failed' message of the reader,
+        the reader keeps the lease and the failed message is taken again when the lease expires."""
+        first_failed = dict()
+        for row in failed:
+            first_failed[row.reader_pk] = min(row.pk, first_failed.get(row.reader_pk, row.pk))
+        cursors = dict()
+        for row in rows:
+            if row.pk < first_failed.get(row.reader_pk, row.pk + 1):
+                cursors[row.reader_pk] = max(row.pk, cursors.get(row.reader_pk, 0))
+        if not cursors:
+            return True
+        now = datetime.datetime.now()
+        released = [{'reader_pk': reader_pk, 'queue_pk': queue_pk, 'date': now, 'lease_until': None}
+                    for reader_pk, queue_pk in cursors.items() if reader_pk not in first_failed]
+        leased = [{'reader_pk': reader_pk, 'queue_pk': queue_pk, 'date': now}
+                  for reader_pk, queue_pk in cursors.items() if reader_pk in first_failed]
+        async with self.sessions() as s:
+            try:
+                if released:
+                    await s.execute(insert_or_update(DeliveryCursor, s, ['reader_pk'],
+                                                     ['queue_pk', 'date', 'lease_until']), released)
+                if leased:
+                    await s.execute(insert_or_update(DeliveryCursor, s, ['reader_pk'], ['queue_pk', 'date']), leased)
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <mark_sent()> for {len(cursors)} objects <DeliveryCursor>:')
+                raise e
+        return True
+
+    async def migrate_from_rows(self, age: float, drop_rows: bool = False) -> (int, int):
+        """Moving delivery from 'ReaderSummary' rows to cursors. Summaries of prepared news not older than
+        'age' days are queued in order, the cursor of each reader is set before the first not-sent summary
+        or at the end of the queue. Existing cursors are kept, so moving can be repeated.
+        The rows are deleted with 'drop_rows'.
+        Returns the amounts of queued summaries and written cursors."""
+        target_date = datetime.datetime.now() - datetime.timedelta(days=age)
+        summaries = select(Summary.pk, Summary.news_pk, Summary.lang_pk).\
+            join(News).\
+            where(News.has_summaries == True, Summary.date >= target_date).\
+            order_by(Summary.news_pk, Summary.pk)
+        first_unsent = select(ReaderSummary.reader_pk, func.min(DeliveryQueue.pk) - 1).\
+            join(DeliveryQueue, DeliveryQueue.summary_pk == ReaderSummary.summary_pk).\
+            where(ReaderSummary.is_sent == False).\
+            group_by(ReaderSummary.reader_pk)
+        async with self.sessions() as s:
+            try:
+                queued = (await s.execute(insert_or_ignore(DeliveryQueue, s, ['summary_pk']).
+                                          from_select(['summary_pk', 'news_pk', 'lang_pk'], summaries))).rowcount
+                last = await s.scalar(select(func.max(DeliveryQueue.pk))) or 0
+                cursors = dict((await s.execute(first_unsent)).all())
+                cursors.update({reader_pk: last for reader_pk in await s.scalars(select(Reader.pk))
+                                if reader_pk not in cursors})
+                if cursors:
+                    await s.execute(insert_or_ignore(DeliveryCursor, s, ['reader_pk']),
+                                    [{'reader_pk': reader_pk, 'queue_pk': queue_pk}
+                                     for reader_pk, queue_pk in cursors.items()])
+                if drop_rows:
+                    await s.execute(delete(ReaderSummary))
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception('in <migrate_from_rows()>:')
+                raise e
+        return queued, len(cursors)
@@ -0,0 +1,140 @@
+import datetime
+import json
+import logging
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import and_, func, or_, select, text, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import AsyncSession, Job, News, Summary, insert_or_ignore
+
+
+logger = logging.getLogger(__name__)
+
+ClaimedJob = namedtuple('ClaimedJob', ['pk', 'news_pk', 'attempts', 'date', 'payload'])  # a job taken by a worker
+
+
+class JobService:
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def enqueue_many(self, stage: str, news_pks: list, payloads: list = None) -> int:
+        """Writing 'Job' instances of the stage for the news to the database.
+        A job of the same stage for the same news is kept. Returns the amount of written instances."""
+        if not news_pks:
+            return 0
+        payloads = payloads or [None] * len(news_pks)
+        rows = [{'stage': stage, 'news_pk': news_pk, 'payload': json.dumps(payload) if payload else None}
+                for news_pk, payload in zip(news_pks, payloads)]
+        async with self.sessions() as s:
+            stmt = insert_or_ignore(Job, s, ['stage', 'news_pk']).returning(Job.pk)
+            try:
+                inserted = (await s.scalars(stmt, rows)).all()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <enqueue_many({stage})> for {len(rows)} objects <Job>:')
+                raise e
+        return len(inserted)
+
+    async def claim(self, stage: str, limit: int, lease: int) -> list:
+        """Taking for work up to 'limit' 'Job' instances of the stage: pending ones whose retry time has come
+        and running ones whose lease has expired. The taken instances are leased for 'lease' seconds.
+        Returns fields 'pk', 'news_pk', 'attempts', 'date' and the decoded 'payload'."""
+        now = datetime.datetime.now()
+        available = or_(and_(Job.state == 'pending', or_(Job.lease_until.is_(None), Job.lease_until <= now)),
+                        and_(Job.state == 'running', Job.lease_until < now))
+        # the literal condition of the partial index 'ix_jobs_active_stage_pk', done and failed jobs are not read
+        pks = select(Job.pk).where(Job.stage == stage, text("jobs.state IN ('pending', 'running')"), available).\
+            order_by(Job.pk).limit(limit).\
+            with_for_update(skip_locked=True).scalar_subquery()
+        stmt = update(Job).where(Job.pk.in_(pks)).\
+            values(state='running', lease_until=now + datetime.timedelta(seconds=lease), attempts=Job.attempts + 1).\
+            returning(Job.pk, Job.news_pk, Job.attempts, Job.date, Job.payload).\
+            execution_options(synchronize_session=False)
+        async with self.sessions() as s:
+            try:
+                rows = (await s.execute(stmt)).all()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <claim({stage})> for objects <Job>:')
+                raise e
+        return [ClaimedJob(row.pk, row.news_pk, row.attempts, row.date, json.loads(row.payload or 'null'))
+                for row in sorted(rows, key=lambda row: row.pk)]
+
+    async def complete(self, pk: int, next_stage: str = None, payload: dict = None) -> None:
+        """Marking the 'Job' instance done and, in the same transaction, writing the job of the next stage."""
+        async with self.sessions() as s:
+            try:
+                job = await s.get(Job, pk)
+                job.state = 'done'
+                job.lease_until = None
+                job.error = None
+                if next_stage:
+                    await s.execute(insert_or_ignore(Job, s, ['stage', 'news_pk']).
+                              values(stage=next_stage, news_pk=job.news_pk,
+                                     payload=json.dumps(payload) if payload else None))
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <complete({pk})> for object <Job>:')
+                raise e
+
+    async def fail(self, pk: int, error: str, delay: float, max_attempts: int) -> str:
+        """Returning the failed 'Job' instance to the queue after 'delay' seconds,
+        or marking it failed when its attempts are over. Returns the new state."""
+        async with self.sessions() as s:
+            try:
+                job = await s.get(Job, pk)
+                job.error = error
+                if job.attempts >= max_attempts:
+                    job.state = 'failed'
+                    job.lease_until = None
+                else:
+                    job.state = 'pending'
+                    job.lease_until = datetime.datetime.now() + datetime.timedelta(seconds=delay)
+                state = job.state
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <fail({pk})> for object <Job>:')
+                raise e
+        return state
+
+    async def depth(self) -> dict:
+        """Getting the amount of 'Job' instances of every stage in every state."""
+        stmt = select(Job.stage, Job.state, func.count(Job.pk)).group_by(Job.stage, Job.state)
+        res = defaultdict(dict)
+        async with self.sessions() as s:
+            for stage, state, count in await s.execute(stmt):
+                res[stage][state] = count
+        return res
+
+    async def latency(self, since: datetime.datetime) -> dict:
+        """Getting the seconds from writing to finishing of 'Job' instances done since the time, by stages."""
+        stmt = select(Job.stage, Job.date, Job.updated).where(Job.state == 'done', Job.updated >= since)
+        res = defaultdict(list)
+        async with self.sessions() as s:
+            for stage, date, updated in await s.execute(stmt):
+                res[stage].append((updated - date).total_seconds())
+        return res
+
+    async def recover(self, age: float) -> (int, int):
+        """Writing jobs for the news not older than 'age' days which were left unfinished without them:
+        the summarize job for news without the first summary and the translate job for news with it.
+        Returns the amounts of written jobs of both stages."""
+        target_date = datetime.datetime.now() - datetime.timedelta(days=age)
+        summarize_stmt = select(News.pk).where(News.date >= target_date, News.has_summary == False)
+        translate_stmt = select(News.pk, Summary.pk, Summary.lang_pk, Summary.content).\
+            join(Summary, and_(Summary.news_pk == News.pk, Summary.lang_pk == News.lang_pk)).\
+            where(News.date >= target_date, News.has_summary == True, News.has_summaries == False)
+        async with self.sessions() as s:
+            summarize_pks = (await s.scalars(summarize_stmt)).all()
+            translate_rows = (await s.execute(translate_stmt)).all()
+        payloads = [{'news_pk': news_pk, 'summary_pk': summary_pk, 'summary_lang': lang_pk, 'content': content}
+                    for news_pk, summary_pk, lang_pk, content in translate_rows]
+        return (await self.enqueue_many('summarize', summarize_pks),
+                await self.enqueue_many('translate', [row[0] for row in translate_rows], payloads))
+
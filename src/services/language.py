@@ -3,44 +3,43 @@ from typing import Any
 
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.database import get_session, Language, Session, Reader
+from src.database import AsyncSession, close_db, insert_or_ignore, Language, Reader
 
 
 logger = logging.getLogger(__name__)
 
 
 class LanguageService:
-    def __init__(self, session: Session = get_session().__next__()):
-        self.session = session
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
 
-    def create_many(self, languages_list: list) -> None:
-        """Writing multiple 'Language' instances to the database."""
-        if len(languages_list):
-            with self.session as s:
-                for count in range(len(languages_list)):
-                    lang_code = languages_list[count]['language']
-                    lang_name = languages_list[count]['name']
-                    language = Language(code=lang_code.upper(), name=lang_name)
-                    try:
-                        s.add(language)
-                        s.flush()
-                    except SQLAlchemyError as e:
-                        s.rollback()
-                        languages_list.pop(count)
-                        logger.debug(f'Language {lang_code} not added to database. Error:\n{e.args[0]}')
-                        self.create_many(languages_list)
-                        break
-                    except Exception as e:
-                        self.session.rollback()
-                        raise e
-                s.commit()
+    async def create_many(self, languages_list: list) -> (list, int):
+        """Writing multiple 'Language' instances to the database with one statement.
+        Languages that are already in the database are skipped.
+        Returns the 'pk' fields of the inserted instances and the amount of skipped ones."""
+        if not len(languages_list):
+            return list(), 0
+        rows = [{'code': language['language'].upper(), 'name': language['name']} for language in languages_list]
+        async with self.sessions() as s:
+            try:
+                insert_stmt = insert_or_ignore(Language, s, ['code']).returning(Language.pk)
+                inserted = (await s.scalars(insert_stmt, rows)).all()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <create_many()> for {len(languages_list)} objects <Language>:')
+                raise e
+        skipped = len(rows) - len(inserted)
+        logger.debug(f'Objects <Language>: {len(inserted)} inserted, {skipped} skipped as existing.')
+        return inserted, skipped
 
-    def exist_lang(self, lang_code: str) -> bool:
+    async def exist_lang(self, lang_code: str) -> bool:
         """Checking if an 'Language' instance exists in the database."""
         stmt = select(Language).where(Language.code == lang_code.upper())
-        with self.session as s:
-            data = s.scalar(stmt)
+        async with self.sessions() as s:
+            data = await s.scalar(stmt)
         if data:
             return True
         else:
@@ -51,30 +50,37 @@ class LanguageService:
         stmt = select(Language.pk.label('pk'),
                       Language.code.label('code'),
                       Language.name.label('name'), ).where(Language.code == lang_code.upper())
-        with self.session as s:
-            data = s.execute(stmt).first()
+        async with self.sessions() as s:
+            data = (await s.execute(stmt)).first()
             if data:
                 return data
 
     async def get_all_code(self) -> list:
         """Getting field 'code' from the database for all 'Language' instance."""
         stmt = select(Language.code).where(Language.is_active == True).order_by(Language.code)
-        with self.session as s:
-            data = s.scalars(stmt).all()
+        async with self.sessions() as s:
+            data = (await s.scalars(stmt)).all()
         if data:
             return data
 
-    async def get_readers_languages(self) -> Any:
+    async def get_all(self) -> list:
+        """Getting fields 'pk', 'code', 'name' from the database for all active 'Language' instances."""
+        stmt = select(Language.pk.label('pk'),
+                      Language.code.label('code'),
+                      Language.name.label('name'), ).where(Language.is_active == True).order_by(Language.code)
+        async with self.sessions() as s:
+            return (await s.execute(stmt)).all()
+
+    async def get_readers_languages(self) -> list:
         """Getting fields 'language.pk', 'language.code' from the database
-        for 'Readers' instance with the status 'active=True'."""
+        for 'Readers' instance with the status 'active=True'. Each language is checked by the index
+        of active readers instead of reading all readers."""
+        active_readers = select(Reader.pk).where(Reader.lang_pk == Language.pk, Reader.is_active == True)
         stmt = select(Language.pk.label('pk'), Language.code.label('code')).\
-                join(Reader).where(Reader.is_active == True).\
-                order_by(Language.pk).\
-                distinct()
-        with self.session as s:
-            data = s.execute(stmt)
-        if data:
-            return data
+                where(active_readers.exists()).\
+                order_by(Language.pk)
+        async with self.sessions() as s:
+            return (await s.execute(stmt)).all()
 
 
 if __name__ == '__main__':
@@ -86,3 +92,4 @@ if __name__ == '__main__':
     print(res.code, res.name)
     res = asyncio.run(ls.get_all_code())
     print(res)
+    asyncio.run(close_db())
@@ -1,73 +1,94 @@
 import datetime
 import logging
-from typing import Any
+from typing import Any, Iterable
 
-from sqlalchemy import select, update
+from sqlalchemy import Select, select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.database import Session, get_session, News, Language
+from src.database import AsyncSession, close_db, insert_or_ignore, News, Language
 from src.services import LanguageService
 
 
 logger = logging.getLogger(__name__)
 
+PROBE_SIZE: int = 500  # amount of URLs in one 'IN (...)' query, below the SQLite limit of query variables
+
 
 class NewsService:
-    def __init__(self, session: Session = get_session().__next__()):
-        self.session = session
-        self.language_service = LanguageService(self.session)
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+        self.language_service = LanguageService(self.sessions)
 
-    def get_all_url(self) -> list:
+    async def get_all_url(self) -> list:
         """Getting field 'url' from the database for all instance 'News'."""
         stmt = select(News.url)
-        with self.session as s:
-            data = s.scalars(stmt).all()
+        async with self.sessions() as s:
+            data = (await s.scalars(stmt)).all()
         if data:
             return data
         else:
             return list()
 
-    def create_many(self, data_list: list, lang_code: str, has_summary: bool, has_summaries: bool) -> None:
-        """Writing multiple 'News' instances to the database."""
+    async def get_new_urls(self, urls: Iterable[str]) -> set:
+        """Selecting URLs that are not in the database. The candidates are checked in batches
+        by the index of the 'url' field, so the stored URLs are not loaded entirely."""
+        new_urls = set(urls)
+        candidates = list(new_urls)
+        async with self.sessions() as s:
+            for start in range(0, len(candidates), PROBE_SIZE):
+                stmt = select(News.url).where(News.url.in_(candidates[start:start + PROBE_SIZE]))
+                new_urls.difference_update(await s.scalars(stmt))
+        return new_urls
+
+    async def has_any(self) -> bool:
+        """Checking if at least one 'News' instance exists in the database."""
+        stmt = select(News.pk).limit(1)
+        async with self.sessions() as s:
+            data = await s.scalar(stmt)
+        return data is not None
+
+    async def create_many(self, data_list: list, lang_code: str, has_summary: bool, has_summaries: bool) -> (list, int):
+        """Writing multiple 'News' instances to the database with one statement.
+        URLs that are already in the database are skipped.
+        Returns the 'pk' fields of the inserted instances and the amount of skipped ones."""
+        if not len(data_list):
+            return list(), 0
         select_stmt = select(Language.pk).where(Language.code == lang_code.upper())
-        with self.session as s:
-            lang_pk = s.execute(select_stmt).scalar_one_or_none()
-            for count in range(len(data_list)):
-                url = data_list[count].get('url')
-                day = data_list[count].get('day', None)
-                content = data_list[count].get('content', '')
-                news = News(url=url.lower(),
-                            content=content,
-                            lang_pk=lang_pk,
-                            has_summary=has_summary,
-                            has_summaries=has_summaries)
-                try:
-                    s.add(news)
-                    if isinstance(day, datetime.datetime):
-                        news.day = day
-                    s.flush()
-                except SQLAlchemyError as e:
-                    s.rollback()
-                    data_list.pop(count)
-                    logger.debug(f'News url {url} not added to database. Error:\n{e.args[0]}')
-                    self.create_many(data_list, lang_code, has_summary, has_summaries)
-                    break
-                except Exception as e:
-                    s.rollback()
-                    raise e
-            s.commit()
+        async with self.sessions() as s:
+            try:
+                lang_pk = (await s.execute(select_stmt)).scalar_one_or_none()
+                rows = list()
+                for data in data_list:
+                    day = data.get('day', None)
+                    rows.append({'url': data.get('url').lower(),
+                                 'day': day if isinstance(day, datetime.datetime) else None,
+                                 'content': data.get('content'),
+                                 'lang_pk': lang_pk,
+                                 'has_summary': has_summary,
+                                 'has_summaries': has_summaries})
+                insert_stmt = insert_or_ignore(News, s, ['url']).returning(News.pk)
+                inserted = (await s.scalars(insert_stmt, rows)).all()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <create_many()> for {len(data_list)} objects <News>:')
+                raise e
+        skipped = len(rows) - len(inserted)
+        logger.debug(f'Objects <News>: {len(inserted)} inserted, {skipped} skipped as existing.')
+        return inserted, skipped
 
     async def update_news(self, news_pk: int, content: str or None, has_summary: bool, has_summaries: bool):
         """Updating 'News' instances in the database."""
         upd_stmt = update(News).where(News.pk == news_pk).values(content=content,
                                                                  has_summary=has_summary,
                                                                  has_summaries=has_summaries)
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                s.execute(upd_stmt)
-                s.commit()
+                await s.execute(upd_stmt)
+                await s.commit()
             except SQLAlchemyError as e:
-                s.rollback()
+                await s.rollback()
                 logger.exception(f'in <update_news(news id {news_pk})>:')
                 raise e
             else:
@@ -77,29 +98,39 @@ class NewsService:
     async def get_news_data(self, pk: int) -> Any:
         """Getting 'News' instance from the database by its 'pk' field."""
         stmt = select(News).where(News.pk == pk)
-        with self.session as s:
-            data = s.execute(stmt).scalar_one_or_none()
+        async with self.sessions() as s:
+            data = (await s.execute(stmt)).scalar_one_or_none()
             if data:
                 return data
 
-    async def get_many_news_data(self, age: float = 1, has_summary: bool =False, has_summaries: bool = False) -> Any:
-        """Getting from the database fields 'pk', 'url', 'lang_pk', 'lang_pk.lang_code' as 'lang_pk', 'day'
+    async def get_many_news_data(self, age: float = 1, has_summary: bool =False, has_summaries: bool = False) -> list:
+        """Getting from the database fields 'pk', 'url', 'lang_pk', 'lang_pk.lang_code' as 'lang_pk', 'day', 'date'
         for an 'News' instance by its age, fields 'has_summary' and 'has_summaries'."""
         target_date = datetime.datetime.now() - datetime.timedelta(days=age)
-        stmt = select(News.pk.label('pk'),
-                      News.url.label('url'),
-                      News.lang_pk.label('lang_pk'),
-                      Language.code.label('lang_code'),
-                      News.day.label('day')).\
-            join(Language). \
+        stmt = self._news_data_stmt(). \
             where(News.date >= target_date). \
             where(News.has_summary == has_summary,
                   News.has_summaries == has_summaries). \
             order_by(News.pk)
-        with self.session as s:
-            data = s.execute(stmt)
-            if data:
-                return data
+        async with self.sessions() as s:
+            return (await s.execute(stmt)).all()
+
+    async def get_news_by_pks(self, pks: list) -> dict:
+        """Getting from the database fields 'pk', 'url', 'lang_pk', 'lang_pk.lang_code' as 'lang_pk', 'day', 'date'
+        for 'News' instances by their 'pk' field. Returns a dictionary by 'pk'."""
+        stmt = self._news_data_stmt().where(News.pk.in_(pks))
+        async with self.sessions() as s:
+            return {row.pk: row for row in await s.execute(stmt)}
+
+    @staticmethod
+    def _news_data_stmt() -> Select:
+        return select(News.pk.label('pk'),
+                      News.url.label('url'),
+                      News.lang_pk.label('lang_pk'),
+                      Language.code.label('lang_code'),
+                      News.day.label('day'),
+                      News.date.label('date')).\
+            join(Language)
 
 
 if __name__ == '__main__':
@@ -114,9 +145,10 @@ if __name__ == '__main__':
     #     print(res.pk, res.day, news_day)
     # datas = [{'url': 'test1', 'day': datetime.datetime.strptime('12:45:56+00:00', '%H:%M:%S%z'), 'content': '11'},
     #          {'url': 'test1', 'day': '', 'content': '22'},]
-    # ns.create_many(datas, 'ru', has_summary=True, has_summaries=True)
+    # asyncio.run(ns.create_many(datas, 'ru', has_summary=True, has_summaries=True))
     res = asyncio.run(ns.get_many_news_data(age=10, has_summary=False, has_summaries=False))
-    if any(res):
+    if res:
         for r in res:
             print(r.pk, r.lang_code, r.lang_pk, '\n', r.url)
             break
+    asyncio.run(close_db())
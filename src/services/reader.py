@@ -1,10 +1,9 @@
 import logging
-from typing import Any
-
-from sqlalchemy import select, insert, update
+from sqlalchemy import select, update
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.database import get_session, Reader, Session, Language  # , Language, ReaderSummary
+from src.database import AsyncSession, close_db, insert_or_ignore, Reader, Language  # , Language, ReaderSummary
 from src.services import LanguageService
 
 
@@ -12,59 +11,62 @@ logger = logging.getLogger(__name__)
 
 
 class ReaderService:
-    def __init__(self, session: Session = get_session().__next__()):
-        self.session = session
-        self.language_service = LanguageService(self.session)
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+        self.language_service = LanguageService(self.sessions)
 
     async def is_exists(self, tg_user_id: int) -> tuple:
         """The values of the 'pk', 'lang_pk', 'is_active' fields are returned for an 'Reader' instance
         by the 'tg_user_id' field"""
         stmt = select(Reader).where(Reader.tg_id == tg_user_id)
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                data = s.scalars(stmt).one_or_none()
+                data = (await s.scalars(stmt)).one_or_none()
             except Exception as e:
                 logger.exception(f'in <is_exists({tg_user_id})> for object <Reader>:')
                 raise e
             else:
                 if data:
-                    lang_pk = s.scalar(select(Language.code).where(Language.pk == data.lang_pk))
+                    lang_pk = await s.scalar(select(Language.code).where(Language.pk == data.lang_pk))
                     return data.pk, lang_pk, data.is_active
                 else:
                     return None, None, None
 
-    async def create(self, tg_user_id: int, lang_code: str = None) -> (Any, str):
-        """Writing 'Reader' instances to the database."""
+    async def create(self, tg_user_id: int, lang_code: str = None) -> tuple:
+        """Writing 'Reader' instances to the database. A reader written earlier, for example by another update
+        of the reader handled at the same time, is kept. The values of the 'pk', 'lang_code', 'is_active' fields
+        of the written or kept instance are returned as they are stored."""
         if lang_code:
             select_stmt = select(Language.pk).where(Language.code == lang_code.upper())
         else:
             select_stmt = None
-        insert_stmt = insert(Reader).values(tg_id=tg_user_id)
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                inst = s.execute(insert_stmt)
-                inst_pk = inst.inserted_primary_key[0]
+                await s.execute(insert_or_ignore(Reader, s, ['tg_id']).values(tg_id=tg_user_id))
+                inst = (await s.scalars(select(Reader).where(Reader.tg_id == tg_user_id))).one()
                 if lang_code:
-                    inst = s.get(Reader, inst_pk)
-                    inst.lang_pk = s.execute(select_stmt).scalar_one_or_none()
-                s.commit()
+                    inst.lang_pk = (await s.execute(select_stmt)).scalar_one_or_none()
+                inst_pk, is_active = inst.pk, inst.is_active
+                stored_code = await s.scalar(select(Language.code).where(Language.pk == inst.lang_pk)) \
+                    if inst.lang_pk else None
+                await s.commit()
             except SQLAlchemyError as e:
-                s.rollback()
+                await s.rollback()
                 logger.exception(f'in <create({tg_user_id}) for object <Reader>:')
                 raise e
             else:
                 logger.debug(f'Object <Reader> id {inst_pk} created successfully.')
-                return inst_pk, lang_code
+                return inst_pk, stored_code, is_active
 
     async def update(self, tg_user_id: int, is_active: bool) -> bool:
         """Updating 'Reader' instances in the database."""
         upd_stmt = update(Reader).where(Reader.tg_id == tg_user_id).values(is_active=is_active)
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                s.execute(upd_stmt)
-                s.commit()
+                await s.execute(upd_stmt)
+                await s.commit()
             except SQLAlchemyError as e:
-                s.rollback()
+                await s.rollback()
                 logger.exception(f'in <update({tg_user_id})> for object <Reader>:')
                 raise e
             else:
@@ -75,14 +77,14 @@ class ReaderService:
         """Assigning a language to an instance 'Reader'."""
         inst_stmt = select(Reader).where(Reader.tg_id == tg_user_id)
         select_stmt = select(Language.pk).where(Language.code == lang_code.upper())
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                inst = s.execute(inst_stmt).scalar_one_or_none()
+                inst = (await s.execute(inst_stmt)).scalar_one_or_none()
                 inst_pk = inst.pk
-                inst.lang_pk = s.execute(select_stmt).scalar_one_or_none()
-                s.commit()
+                inst.lang_pk = (await s.execute(select_stmt)).scalar_one_or_none()
+                await s.commit()
             except SQLAlchemyError as e:
-                s.rollback()
+                await s.rollback()
                 logger.exception(f'in <set_language({tg_user_id}, {lang_code})> for object <Reader>.')
                 raise e
             else:
@@ -102,3 +104,4 @@ if __name__ == '__main__':
     # asyncio.run(rs.set_language(12345, 'es'))
     pk, code = asyncio.run(rs.is_exists(BOT_ADMIN_ID))
     print(pk, code)
+    asyncio.run(close_db())
@@ -1,26 +1,32 @@
 import datetime
-from typing import Any
+import logging
+from typing import AsyncIterator
 
-from sqlalchemy import select, update
+from sqlalchemy import or_, select, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.database import Session, get_session, Summary, Reader, ReaderSummary, News
+from config import SENDER
+from src.database import AsyncSession, close_db, Summary, Reader, ReaderSummary, News
+
+
+logger = logging.getLogger(__name__)
 
 
 class ReaderSummaryService:
-    def __init__(self, session: Session = get_session().__next__()):
-        self.session = session
-
-    async def get_notsent_readersummary(self, amount: int, age: float) -> Any:
-        """Returns from database the 'pk' field of the 'ReaderSummary' instance, fields 'content', 'news_pk' of
-        the 'Summary' instance, field 'tg_id' of the 'Reader' instance, provided that the 'Summary.date' field
-        matches the age, fields 'Reader.is_active', 'News.has_summaries' have the value 'True',
-        field 'ReaderSummary.is_sent' have the value 'False'."""
-        target_date = datetime.datetime.now() - datetime.timedelta(days=age)
-        stmt = \
-            select(ReaderSummary.pk,
-                   Summary.content,
-                   Summary.news_pk,
-                   Reader.tg_id).\
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def claim(self, amount: int, age: float, lease: float) -> list:
+        """Taking for sending up to 'amount' 'ReaderSummary' instances with the field 'is_sent' of the value 'False',
+        provided that the 'Summary.date' field matches the age, fields 'Reader.is_active', 'News.has_summaries'
+        have the value 'True', skipping the instances leased by another sender. The taken instances are leased
+        for 'lease' seconds, so several senders never send the same message. Returns fields 'pk', 'summary_pk'
+        of the 'ReaderSummary' instance and field 'tg_id' of the 'Reader' instance, ordered by 'summary_pk'
+        and 'pk' as the index of not-sent rows, so no sorting is needed."""
+        now = datetime.datetime.now()
+        target_date = now - datetime.timedelta(days=age)
+        pks = select(ReaderSummary.pk).\
             join(Summary).\
             join(Reader).\
             join(News).\
@@ -28,24 +34,54 @@ class ReaderSummaryService:
             where(Reader.is_active == True).\
             where(News.has_summaries == True).\
             where(ReaderSummary.is_sent == False).\
-            order_by(Summary.news_pk).\
-            limit(amount)
-        with self.session as s:
+            where(or_(ReaderSummary.lease_until.is_(None), ReaderSummary.lease_until < now)).\
+            order_by(ReaderSummary.summary_pk, ReaderSummary.pk).\
+            limit(amount).\
+            with_for_update(skip_locked=True, of=ReaderSummary).\
+            scalar_subquery()
+        stmt = update(ReaderSummary).where(ReaderSummary.pk.in_(pks)).\
+            values(lease_until=now + datetime.timedelta(seconds=lease)).\
+            returning(ReaderSummary.pk).\
+            execution_options(synchronize_session=False)
+        async with self.sessions() as s:
             try:
-                data = s.execute(stmt)
-            except Exception as e:
+                claimed = (await s.scalars(stmt)).all()
+                rows = (await s.execute(
+                    select(ReaderSummary.pk, ReaderSummary.summary_pk, Reader.tg_id).
+                    join(Reader).
+                    where(ReaderSummary.pk.in_(claimed)).
+                    order_by(ReaderSummary.summary_pk, ReaderSummary.pk))).fetchall() if claimed else list()
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <claim({amount})> for objects <ReaderSummary>:')
                 raise e
-            else:
-                return data.fetchall()
+        return rows
+
+    async def iter_pending(self, chunk: int, age: float, lease: float = SENDER['lease']) -> AsyncIterator[list]:
+        """Not-sent messages in chunks of 'chunk' rows, each chunk is taken after the previous one is handled.
+        Taken rows are leased, so the rows already handled and the rows of other senders are not read again.
+        Rows not marked sent are taken again when their lease expires."""
+        while True:
+            rows = await self.claim(chunk, age, lease)
+            if rows:
+                yield rows
+            if len(rows) < chunk:
+                return
+
+    async def mark_sent(self, rows: list, failed: list = ()) -> bool:
+        """Marking the 'ReaderSummary' instances of the sent messages as sent. The instances of the 'failed'
+        messages stay leased and are taken again when the lease expires."""
+        return await self.update_many([{'pk': row.pk, 'is_sent': True} for row in rows])
 
     async def update_many(self, update_list: list) -> bool:
         """Updating multiple 'ReaderSummary' instances in the database."""
-        with self.session as s:
+        async with self.sessions() as s:
             try:
-                s.execute(update(ReaderSummary), update_list)
-                s.commit()
+                await s.execute(update(ReaderSummary), update_list)
+                await s.commit()
             except Exception as e:
-                s.rollback()
+                await s.rollback()
                 raise e
             else:
                 return True
@@ -53,10 +89,10 @@ class ReaderSummaryService:
 
 if __name__ == '__main__':
     import asyncio
-    res = asyncio.run(ReaderSummaryService().get_notsent_readersummary(1000, 1))
+    res = asyncio.run(ReaderSummaryService().claim(1000, 1, lease=0))
     print('len(res)=', len(res))
     for r in res:
-        print(f'\nnews_pk:', r.news_pk)
         print('ReaderSummary_pk:', r.pk)
-        print(f'Summary.content:\n', r.content)
+        print('Summary_pk:', r.summary_pk)
         break
+    asyncio.run(close_db())
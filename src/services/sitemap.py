@@ -0,0 +1,46 @@
+import logging
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import AsyncSession, Sitemap
+
+
+logger = logging.getLogger(__name__)
+
+
+class SitemapService:
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def get(self, url: str) -> Any:
+        """Getting fields 'etag', 'last_modified', 'content_hash', 'is_index' from the database
+        for an 'Sitemap' instance by its 'url' field."""
+        stmt = select(Sitemap.etag.label('etag'),
+                      Sitemap.last_modified.label('last_modified'),
+                      Sitemap.content_hash.label('content_hash'),
+                      Sitemap.is_index.label('is_index')).where(Sitemap.url == url)
+        async with self.sessions() as s:
+            data = (await s.execute(stmt)).first()
+        return data
+
+    async def save_many(self, data_list: list) -> None:
+        """Writing or updating multiple 'Sitemap' instances in the database."""
+        async with self.sessions() as s:
+            try:
+                for data in data_list:
+                    sitemap = await s.scalar(select(Sitemap).where(Sitemap.url == data['url']))
+                    if not sitemap:
+                        sitemap = Sitemap(url=data['url'])
+                        s.add(sitemap)
+                    sitemap.etag = data.get('etag')
+                    sitemap.last_modified = data.get('last_modified')
+                    sitemap.content_hash = data.get('content_hash')
+                    sitemap.is_index = data.get('is_index', False)
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <save_many()> for {len(data_list)} objects <Sitemap>:')
+                raise e
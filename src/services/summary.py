@@ -1,9 +1,10 @@
 import logging
 
-from sqlalchemy import insert, select
+from sqlalchemy import literal, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from src.database import Session, get_session, Summary, News, Reader
+from src.database import AsyncSession, close_db, Summary, News, Reader, ReaderSummary, insert_or_ignore
 from src.services import LanguageService
 from src.services.news import NewsService
 
@@ -12,33 +13,70 @@ logger = logging.getLogger(__name__)
 
 
 class SummaryService:
-    def __init__(self, session: Session = get_session().__next__()):
-        self.session = session
-        self.language_service = LanguageService(self.session)
-        self.news_service = NewsService(self.session)
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+        self.language_service = LanguageService(self.sessions)
+        self.news_service = NewsService(self.sessions)
 
     async def create(self, news_pk: int, lang_pk: int, content: str or None) -> int:
-        """Writing 'Summary' instances to the database."""
-        insert_stmt = insert(Summary).values(news_pk=news_pk, lang_pk=lang_pk, content=content)
-        select_stmt = select(Reader).where(Reader.is_active == True, Reader.lang_pk == lang_pk)
-        with self.session as s:
+        """Writing 'Summary' instances to the database. The summary of the news in the language written
+        earlier is kept, so a repeated job does not fail."""
+        select_stmt = select(Summary.pk).where(Summary.news_pk == news_pk, Summary.lang_pk == lang_pk)
+        async with self.sessions() as s:
+            insert_stmt = insert_or_ignore(Summary, s, ['lang_pk', 'news_pk']).\
+                values(news_pk=news_pk, lang_pk=lang_pk, content=content)
             try:
-                new_summary = s.execute(insert_stmt)
-                summary_pk = new_summary.inserted_primary_key[0]
-                new_summary = s.get(Summary, summary_pk)
-                new_summary.readers = s.scalars(select_stmt).all()
-                s.commit()
+                await s.execute(insert_stmt)
+                summary_pk = await s.scalar(select_stmt)
+                await s.commit()
             except SQLAlchemyError as e:
-                s.rollback()
+                await s.rollback()
                 logger.exception(f'in <def create({news_pk}, {lang_pk})>:')
                 raise e
             else:
                 logger.debug(f'Object <Summary> id {summary_pk} created successfully.')
                 return summary_pk
 
+    async def fanout(self, news_pk: int) -> int:
+        """Writing 'ReaderSummary' instances for all summaries of the news and active readers of their languages
+        with one statement 'INSERT ... SELECT' inside the database, without loading readers.
+        Returns the amount of written instances."""
+        recipients = select(Summary.pk, Reader.pk, literal(False)).\
+            join(Reader, Reader.lang_pk == Summary.lang_pk).\
+            where(Summary.news_pk == news_pk, Reader.is_active == True)
+        async with self.sessions() as s:
+            stmt = insert_or_ignore(ReaderSummary, s, ['summary_pk', 'reader_pk']).\
+                from_select(['summary_pk', 'reader_pk', 'is_sent'], recipients)
+            try:
+                count = (await s.execute(stmt)).rowcount
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def fanout({news_pk})>:')
+                raise e
+            else:
+                logger.debug(f'{count} objects <ReaderSummary> for <News> id {news_pk} created successfully.')
+                return count
+
+    async def get_news_languages(self, news_pks: list) -> set:
+        """Getting from the database pairs of fields 'news_pk', 'lang_pk' of 'Summary' instances of the news."""
+        stmt = select(Summary.news_pk, Summary.lang_pk).where(Summary.news_pk.in_(news_pks))
+        async with self.sessions() as s:
+            return {(news_pk, lang_pk) for news_pk, lang_pk in await s.execute(stmt)}
+
+    async def get_for_sending(self, pks: list) -> dict:
+        """Getting from the database fields 'pk', 'content' of 'Summary' instances by their 'pk' field
+        with fields 'url', 'day', 'date' of their 'News' instances. Returns a dictionary by 'pk'."""
+        stmt = select(Summary.pk, Summary.content, News.url, News.day, News.date).\
+            join(News).\
+            where(Summary.pk.in_(pks))
+        async with self.sessions() as s:
+            return {row.pk: row for row in await s.execute(stmt)}
+
 
 if __name__ == '__main__':
     import asyncio
     ss = SummaryService()
     summary = asyncio.run(ss.create(1, 7, None))
     print(summary)
+    asyncio.run(close_db())
@@ -0,0 +1,67 @@
+import datetime
+import logging
+
+from sqlalchemy import delete, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import AsyncSession, SummaryCache, insert_or_update
+
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCacheService:
+    def __init__(self, sessions: async_sessionmaker = AsyncSession):
+        self.sessions = sessions
+
+    async def get(self, key: dict, ttl: float) -> str or None:
+        """Getting from the database the content of an 'SummaryCache' instance by its key fields
+        'url', 'language', 'engine', 'summary_type' if it is not older than 'ttl' days. Its use time is refreshed."""
+        now = datetime.datetime.now()
+        stmt = select(SummaryCache).filter_by(**key).where(SummaryCache.date >= now - datetime.timedelta(days=ttl))
+        async with self.sessions() as s:
+            try:
+                cached = await s.scalar(stmt)
+                if cached is None:
+                    return None
+                cached.used = now
+                cached.hits += 1
+                content = cached.content
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def get({key["url"]})>:')
+                raise e
+            return content
+
+    async def put(self, key: dict, content: str) -> None:
+        """Writing an 'SummaryCache' instance to the database. An existing one with the same key,
+        expired one included, gets the new content and its creation and use times are refreshed."""
+        now = datetime.datetime.now()
+        async with self.sessions() as s:
+            stmt = insert_or_update(SummaryCache, s, ['url', 'language', 'engine', 'summary_type'],
+                                    ['content', 'date', 'used'])
+            try:
+                await s.execute(stmt.values(content=content, date=now, used=now, **key))
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception(f'in <def put({key["url"]})>:')
+                raise e
+
+    async def evict(self, ttl: float, size: int) -> int:
+        """Deleting 'SummaryCache' instances older than 'ttl' days and the least recently used ones
+        above the 'size' amount. Returns the amount of deleted instances."""
+        target_date = datetime.datetime.now() - datetime.timedelta(days=ttl)
+        surplus = select(SummaryCache.pk).order_by(SummaryCache.used.desc()).offset(size).scalar_subquery()
+        async with self.sessions() as s:
+            try:
+                expired = (await s.execute(delete(SummaryCache).where(SummaryCache.date < target_date))).rowcount
+                unused = (await s.execute(delete(SummaryCache).where(SummaryCache.pk.in_(surplus)))).rowcount
+                await s.commit()
+            except SQLAlchemyError as e:
+                await s.rollback()
+                logger.exception('in <def evict()>:')
+                raise e
+            return expired + unused
@@ -1 +1,2 @@
-from .app import main as summary
\ No newline at end of file
+from .app import Summary, summarize
+from .cache import SummaryCache
@@ -2,88 +2,124 @@ import asyncio
 import logging
 import os
 
-import requests
+import aiohttp
 from dotenv import load_dotenv
 
 from config import KAGI, MY_DEBUG
-from src.deepl import deepl
+from src.ratelimit import TokenBucket, backoff
 from src.services import NewsService, SummaryService
+from src.summary.cache import SummaryCache
 
 
 load_dotenv()
 logger = logging.getLogger(__name__)
 
+RETRY_STATUSES: tuple = (429, 500, 502, 503, 504)  # KAGI API responses after which the request is repeated
+
 
 class Summary:
-    def __init__(self):
+    """Asynchronous KAGI API client. Requests go through one session with a keep-alive connection pool,
+    the number of simultaneous requests is limited and their rate is smoothed by a token bucket.
+    Failed requests are repeated after a random growing delay."""
+    def __init__(self,
+                 url: str = KAGI['url'],
+                 concurrency: int = KAGI['concurrency'],
+                 rate: float = KAGI['rate'],
+                 timeout: int = KAGI['timeout'],
+                 retries: int = KAGI['retries']):
         self.auth_key = os.getenv('KAGI_TOKEN')
-        self.url = KAGI['url']
+        self.url = url
+        self.concurrency = concurrency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.bucket = TokenBucket(rate, capacity=concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.retries = retries
+        self.session = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency, keepalive_timeout=60)
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             headers={'Authorization': f'Bot {self.auth_key}'},
+                                             timeout=self.timeout)
+        return self
+
+    async def __aexit__(self, *args) -> None:
+        await self.session.close()
 
-    async def get_summary(self, link: str, language: str, wait_summary: int) -> str:
+    async def get_summary(self, link: str, language: str) -> str or None:
         """Creating summary text using KAGI API."""
-        await asyncio.sleep(wait_summary)
         url = self.url + KAGI['summary_endpoint']
         params = {'url': link,
                   'summary_type': KAGI['summary_type'],
                   'engine': KAGI['engine'],
                   'target_language': language}
-        headers = {'Authorization': f'Bot {self.auth_key}'}
-        try:
-            response = requests.get(url, headers=headers, params=params)
-        except Exception as e:
-            logger.exception(f'Error in <def get_summary({link})>:')
-            raise e
-        else:
-            length = response.headers.get('Content-Length', 'not_exist')
-            if response.status_code == 200\
-                    and response.headers['Content-Type'] == 'application/json'\
-                    and length != '0':
-                res = response.json()
-                meta = res.get('meta')
-                api_balance = meta.get('api_balance')
-                data = res.get('data')
-                content = data.get('output')
-                if api_balance < 1:
-                    logger.warning(f'Attention: the need to top up your API credits is approaching!'
-                                   f' Currently on account {api_balance} credits.')
-                return content
-
-
-async def main(age: float, wait_searching: int, wait_create: int, wait_translate: int) -> None:
-    """The main loop of searching news without summaries in the database and creating summaries for them."""
-    while True:
-        await asyncio.sleep(wait_searching)
-        logger.debug('Trying to create a first summary for newses...')
-        try:
-            newses = await NewsService().get_many_news_data(age=age, has_summary=False, has_summaries=False)
-        except Exception:
-            logger.exception('Unable to retrieve data for objects <News> from db.')
-            continue
-        if not any(newses):
-            continue
-        for news in newses:
-            logger.debug(f'Detected new object <News> id {news.pk} without first summary.')
+        for attempt in range(self.retries + 1):
             try:
-                if MY_DEBUG:
-                    content = f'Dummy {news.lang_code} summary from {news.url}.'
-                else:
-                    content = await Summary().get_summary(news.url, news.lang_code, wait_create)
-                if not content:
-                    logger.warning(f'Summary for <News> id {news.pk} was not getting.'
-                                   f' There may not be enough credits in your KAGI account.')
-                    continue
-                summary_pk = await SummaryService().create(news.pk, news.lang_pk, content)
-                await NewsService().update_news(news.pk, content=None, has_summary=True, has_summaries=False)
-            except Exception:
-                logger.exception(f'No summary was get or create for <News> id {news.pk}')
-                continue
-            else:
-                logger.info(f'The first summary for <News> id {news.pk} on {news.lang_code} has been created.')
-                data = {'news_pk': news.pk, 'summary_pk': summary_pk, 'summary_lang': news.lang_pk, 'content': content}
-                asyncio.create_task(deepl(wait_translate, data))
+                async with self.semaphore:
+                    await self.bucket.acquire()
+                    async with self.session.get(url, params=params) as response:
+                        if response.status == 200 and response.content_type == 'application/json':
+                            res = await response.json()
+                            return self._read_output(res)
+                        if response.status not in RETRY_STATUSES:
+                            logger.warning(f'KAGI API answered {response.status} for <{link}>.')
+                            return None
+                        logger.warning(f'KAGI API answered {response.status} for <{link}>, attempt {attempt + 1}.')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    logger.exception(f'Error in <def get_summary({link})>:')
+                    raise e
+                logger.warning(f'Error in <def get_summary({link})>, attempt {attempt + 1}: {e!r}')
+            if attempt < self.retries:
+                await asyncio.sleep(backoff(attempt))
+        return None
+
+    @staticmethod
+    def _read_output(res: dict) -> str or None:
+        meta = res.get('meta') or dict()
+        api_balance = meta.get('api_balance')
+        data = res.get('data') or dict()
+        content = data.get('output')
+        if api_balance is not None and api_balance < 1:
+            logger.warning(f'Attention: the need to top up your API credits is approaching!'
+                           f' Currently on account {api_balance} credits.')
+        return content
+
+
+async def create_summary(kagi: SummaryCache, news) -> dict:
+    """Creating the first summary for one news. Returns the summary data for translation."""
+    logger.debug(f'Creating the first summary for <News> id {news.pk}.')
+    if MY_DEBUG:
+        content = f'Dummy {news.lang_code} summary from {news.url}.'
+    else:
+        content = await kagi.get_summary(news.url, news.lang_code)
+    if not content:
+        raise ValueError(f'Summary for <News> id {news.pk} was not getting.'
+                         f' There may not be enough credits in your KAGI account.')
+    summary_pk = await SummaryService().create(news.pk, news.lang_pk, content)
+    await NewsService().update_news(news.pk, content=None, has_summary=True, has_summaries=False)
+    logger.info(f'The first summary for <News> id {news.pk} on {news.lang_code} has been created.')
+    return {'news_pk': news.pk, 'summary_pk': summary_pk, 'summary_lang': news.lang_pk, 'content': content}
+
+
+async def summarize(kagi: SummaryCache, jobs: list) -> list:
+    """Handler of the summarize stage: creating the first summaries for the news of the jobs concurrently.
+    Returns for each job the payload of its translate job or the error."""
+    newses = await NewsService().get_news_by_pks([job.news_pk for job in jobs])
+
+    async def create(job) -> dict:
+        if job.news_pk not in newses:
+            raise LookupError(f'Object <News> id {job.news_pk} does not exist.')
+        return await create_summary(kagi, newses[job.news_pk])
+
+    return await asyncio.gather(*map(create, jobs), return_exceptions=True)
 
 
 if __name__ == '__main__':
-    # asyncio.run(main(age=10, wait_searching=5, wait_create=1, wait_translate=1))
     li = 'https://bits.media/birzha-coinbase-i-coinbase-asset-management-zapustili-platformu-dolgovykh-instrumentov/'
-    print(asyncio.run(Summary().get_summary(li, 'RU', 1)))
+
+    async def print_summary() -> None:
+        async with Summary() as kagi:
+            print(await kagi.get_summary(li, 'RU'))
+
+    asyncio.run(print_summary())
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit
+
+from config import KAGI
+from src.services import SummaryCacheService
+
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_url(url: str) -> str:
+    """The URL form used as the cache key: lowercase like the stored news URLs, without fragment
+    and trailing slash, so variants of one link get one summary."""
+    scheme, netloc, path, query, _ = urlsplit(url.strip().lower())
+    return urlunsplit((scheme, netloc, path.rstrip('/'), query, ''))
+
+
+class SummaryCache:
+    """Summaries received from KAGI API, stored in the database by the normalized URL, target language,
+    engine and summary type. Every request goes to the cache first, so a repeated link or a restart after
+    a failure does not spend credits again. Concurrent requests with the same key wait for one KAGI request."""
+    def __init__(self, client,
+                 service: SummaryCacheService = None,
+                 ttl: float = KAGI['cache_ttl'],
+                 size: int = KAGI['cache_size']):
+        self.client = client
+        self.service = service or SummaryCacheService()
+        self.ttl = ttl
+        self.size = size
+        self.in_flight = dict()
+        self.stats = Counter(hits=0, joined=0, misses=0)
+
+    async def get_summary(self, link: str, language: str) -> str or None:
+        """Getting the summary text from the cache or, if it is missing, from KAGI API."""
+        key = {'url': normalize_url(link),
+               'language': language,
+               'engine': KAGI['engine'],
+               'summary_type': KAGI['summary_type']}
+        in_flight_key = tuple(key.values())
+        if in_flight_key in self.in_flight:
+            self.stats['joined'] += 1
+            return await asyncio.shield(self.in_flight[in_flight_key])
+        task = asyncio.create_task(self._get(key, link, language))
+        self.in_flight[in_flight_key] = task
+        try:
+            return await asyncio.shield(task)
+        finally:
+            self.in_flight.pop(in_flight_key, None)
+
+    async def _get(self, key: dict, link: str, language: str) -> str or None:
+        """The cache lookup and the KAGI request of the key, awaited by all concurrent requests with the key."""
+        content = await self.service.get(key, self.ttl)
+        if content:
+            self.stats['hits'] += 1
+            logger.debug(f'Summary for <{link}> on {language} is taken from the cache.')
+            return content
+        self.stats['misses'] += 1
+        content = await self.client.get_summary(link, language)
+        if content:
+            await self.service.put(key, content)
+        return content
+
+    async def evict(self) -> None:
+        """Deleting expired and least recently used summaries from the cache."""
+        deleted = await self.service.evict(self.ttl, self.size)
+        if deleted:
+            logger.debug(f'{deleted} summaries deleted from the cache.')
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = sum(self.stats.values())
+        return (self.stats['hits'] + self.stats['joined']) / requests if requests else 0
+
+    def log_stats(self) -> None:
+        saved = self.stats['hits'] + self.stats['joined']
+        logger.info(f'Summary cache: {self.stats["hits"]} hits, {self.stats["joined"]} joined in flight,'
+                    f' {self.stats["misses"]} requests to KAGI API, hit ratio {self.hit_ratio:.0%},'
+                    f' saved about {saved * KAGI["summary_cost"]:.2f} credits.')
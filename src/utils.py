@@ -1,5 +1,5 @@
+import asyncio
 import logging
-from time import sleep
 
 from config import NEWS_SITES_LIST
 from src.database import create_db
@@ -11,15 +11,16 @@ from src.services import LanguageService, NewsService
 logger = logging.getLogger(__name__)
 
 
-def first_launch_prepare() -> None:
+async def first_launch_prepare() -> None:
     """Creating a database and populating it when you first launch the application."""
     try:
-        if not LanguageService().exist_lang('en'):
-            create_db()
-            sleep(1)
-            Deepl().create_languages()
-        sleep(1)
-        if not any(NewsService().get_all_url()):
-            pull_urls(NEWS_SITES_LIST, check_date=False)
+        create_db()
+        if not await LanguageService().exist_lang('en'):
+            await asyncio.sleep(1)
+            async with Deepl() as client:
+                await client.create_languages()
+        await asyncio.sleep(1)
+        if not await NewsService().has_any():
+            await pull_urls(NEWS_SITES_LIST, check_date=False)
     except Exception as e:
         logger.exception('on prepare to launch the application:\n', e)
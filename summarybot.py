@@ -1,22 +1,56 @@
+import argparse
 import asyncio
+import logging
+import os
 
-from config import MY_DEBUG, NEWS_SITES_LIST, WAIT_FOR, LEN_MAILING_LIST, SUMMARY_AGE, NEWS_AGE
-from src.bot import bot
+from config import BOT_MODE, MY_DEBUG, NEWS_SITES_LIST, WAIT_FOR, LEN_MAILING_LIST, SUMMARY_AGE, NEWS_AGE
+from src.bot import bot, sending
+from src.database import close_db, create_db
+from src.jobs import jobs
+from src.jobs.app import ROLES
 from src.news import news
-from src.summary import summary
 from src.utils import first_launch_prepare
 
 
+async def main(mode: str, role: str = 'all') -> None:
+    """Running the application in one process with the role 'all', or one of its parts in a process of the role.
+    Processes of the roles work with the shared database, several summarizers, translators and senders
+    may run at the same time."""
+    logging.basicConfig(level=os.getenv('LOG_LEVEL'), )
+    if role in ('all', 'crawler'):
+        await first_launch_prepare()
+    else:
+        create_db()
+    if role in ('all', 'bot'):
+        tasks = [jobs(age=NEWS_AGE),
+                 news(sites_list=NEWS_SITES_LIST,
+                      wait_pull_url=WAIT_FOR['pull_url'])] if role == 'all' else []
+        await bot(tasks=tasks,
+                  wait_sending=WAIT_FOR['sending'],
+                  amount=LEN_MAILING_LIST,
+                  age=SUMMARY_AGE,
+                  mode=mode,
+                  with_sending=role == 'all')
+        return
+    try:
+        if role == 'crawler':
+            await news(sites_list=NEWS_SITES_LIST,
+                       wait_pull_url=WAIT_FOR['pull_url'])
+        elif role == 'sender':
+            await sending(wait_sending=WAIT_FOR['sending'],
+                          amount=LEN_MAILING_LIST,
+                          age=SUMMARY_AGE)
+        else:
+            await jobs(age=NEWS_AGE, stages=ROLES[role])
+    finally:
+        await close_db()
+
+
 if __name__ == '__main__':
-    first_launch_prepare()
-    tasks = [summary(age=NEWS_AGE,
-                     wait_searching=WAIT_FOR['searching'],
-                     wait_create=WAIT_FOR['create'],
-                     wait_translate=WAIT_FOR['translate']),
-             news(sites_list=NEWS_SITES_LIST,
-                  wait_pull_url=WAIT_FOR['pull_url'])]
-    asyncio.run(bot(tasks=tasks,
-                    wait_sending=WAIT_FOR['sending'],
-                    amount=LEN_MAILING_LIST,
-                    age=SUMMARY_AGE),
-                debug=MY_DEBUG)
+    arg_parser = argparse.ArgumentParser(description='Bot sending summaries of news to readers.')
+    arg_parser.add_argument('--mode', choices=['polling', 'webhook'], default=BOT_MODE,
+                            help='receiving updates of the bot by long polling or by the webhook server')
+    arg_parser.add_argument('--role', choices=['all', 'crawler', *ROLES, 'sender', 'bot'], default='all',
+                            help='the part of the application run by the process, all parts by default')
+    args = arg_parser.parse_args()
+    asyncio.run(main(args.mode, args.role), debug=MY_DEBUG)
@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
+
+from src.database import async_url
+from src.database.tables import Base
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """A new SQLite database with all tables."""
+    engine = create_engine(f'sqlite+pysqlite:///{tmp_path / "test.sqlite3"}')
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sessions(engine) -> async_sessionmaker:
+    """Factory of asynchronous sessions of the services on the database. Connections are not pooled,
+    so the sessions can be used by several event loops one after another."""
+    return async_sessionmaker(create_async_engine(async_url(engine.url), poolclass=NullPool), expire_on_commit=False)
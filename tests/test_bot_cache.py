@@ -0,0 +1,29 @@
+import asyncio
+
+from src.bot.cache import LanguageCache, ReaderCache
+from src.services import LanguageService, ReaderService
+
+
+def test_created_reader_keeps_the_stored_language(sessions):
+    asyncio.run(LanguageService(sessions).create_many([{'language': 'EN', 'name': 'English'},
+                                                       {'language': 'RU', 'name': 'Russian'}]))
+    cache = ReaderCache(ReaderService(sessions))
+    pk, lang_code = asyncio.run(cache.create(1, 'ru'))
+    assert lang_code == 'RU'
+    assert asyncio.run(cache.create(1)) == (pk, 'RU')
+    assert cache.readers[1] == (pk, 'RU', True)
+    assert asyncio.run(ReaderService(sessions).is_exists(1)) == (pk, 'RU', True)
+
+
+def test_concurrent_first_loads_read_the_languages_once(sessions):
+    service = LanguageService(sessions)
+    asyncio.run(service.create_many([{'language': 'EN', 'name': 'English'}, {'language': 'DE', 'name': 'German'}]))
+    cache = LanguageCache(service)
+
+    async def run() -> list:
+        return await asyncio.gather(*(cache.get_all_code() for _ in range(20)))
+
+    results = asyncio.run(run())
+    assert all(codes == ['DE', 'EN'] for codes in results)
+    assert cache.stats['misses'] == 1
+    assert cache.stats['hits'] == 19
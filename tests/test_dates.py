@@ -0,0 +1,20 @@
+import datetime
+
+import pytest
+
+from src.news.dates import PART_SIZE, DateExtractor, make_extractor
+
+
+def test_extractor_without_search_is_not_created():
+    class NoSearch(DateExtractor):
+        pass
+
+    with pytest.raises(TypeError):
+        NoSearch()
+
+
+def test_chain_takes_the_date_of_the_first_strategy_finding_it():
+    extractor = make_extractor([{'strategy': 'meta'}, {'strategy': 'jsonld', 'tz': 'Europe/Moscow'}])
+    html = '<html>' + ' ' * PART_SIZE + '"datePublished": "2024-05-01T10:00:00"</html>'
+    day = extractor.extract(html)
+    assert day == datetime.datetime(2024, 5, 1, 7, tzinfo=datetime.timezone.utc)
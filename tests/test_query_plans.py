@@ -0,0 +1,91 @@
+"""Query plans of the polling queries: every query of the services below is run on a seeded SQLite database
+with 'EXPLAIN QUERY PLAN', a table read by a full scan or an automatic index fails the test."""
+import asyncio
+import re
+
+import pytest
+from sqlalchemy import create_engine, event, insert, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from src.database import Job, Language, News, Reader, ReaderSummary, Summary, async_url
+from src.database.tables import Base
+from src.services import DeliveryCursorService, JobService, LanguageService, ReaderSummaryService, SummaryService
+
+
+READERS, NEWS, LANGUAGES = 2000, 10, 8  # size of the seeded database
+SMALL_TABLES: set = {'languages'}  # tables bounded by the amount of languages, their scans are allowed
+FULL_SCAN = re.compile(r'SCAN (\w+)\b(?! USING (COVERING )?INDEX)|AUTOMATIC')
+
+QUERIES: dict = {  # polling queries by name
+    'ReaderSummaryService.claim': lambda sessions: ReaderSummaryService(sessions).claim(amount=1000, age=1, lease=60),
+    'LanguageService.get_readers_languages': lambda sessions: LanguageService(sessions).get_readers_languages(),
+    'SummaryService.fanout': lambda sessions: SummaryService(sessions).fanout(1),
+    'DeliveryCursorService.claim': lambda sessions: DeliveryCursorService(sessions).claim(amount=1000, age=1, lease=60),
+    'JobService.claim': lambda sessions: JobService(sessions).claim('translate', limit=8, lease=60),
+    'JobService.recover': lambda sessions: JobService(sessions).recover(age=1),
+}
+
+
+class PlanRecorder:
+    """Explaining every query executed on the engines while it is recording."""
+    def __init__(self, *engines):
+        self.plans = list()
+        self.recording = False
+        for engine in engines:
+            event.listen(engine, 'before_cursor_execute', self.explain)
+
+    def explain(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        if self.recording and not executemany and \
+                statement.lstrip().upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'WITH')):
+            cursor.execute(f'EXPLAIN QUERY PLAN {statement}', parameters)
+            self.plans.append([row[3] for row in cursor.fetchall()])
+
+    def record(self, coroutine) -> list:
+        self.plans = list()
+        self.recording = True
+        try:
+            asyncio.run(coroutine)
+        finally:
+            self.recording = False
+        return [detail for plan in self.plans for detail in plan]
+
+
+@pytest.fixture(scope='module')
+def seeded(tmp_path_factory) -> (async_sessionmaker, PlanRecorder):
+    """Languages, active readers spread over them, news with a summary in every language, their messages
+    in both delivery modes, two thirds of the rows sent, and done jobs of all news but the last one."""
+    engine = create_engine(f'sqlite+pysqlite:///{tmp_path_factory.mktemp("plans") / "plans.sqlite3"}')
+    Base.metadata.create_all(engine)
+    with sessionmaker(engine)() as s:
+        s.execute(insert(Language), [{'code': f'L{num}'} for num in range(LANGUAGES)])
+        s.execute(insert(Reader), [{'tg_id': num, 'lang_pk': num % LANGUAGES + 1, 'is_active': True}
+                                   for num in range(READERS)])
+        s.execute(insert(News), [{'url': f'https://example.com/news/{num}', 'lang_pk': 1, 'has_summary': True,
+                                  'has_summaries': True} for num in range(NEWS)])
+        s.execute(insert(Summary), [{'news_pk': news_pk, 'lang_pk': lang_pk, 'content': 'summary text'}
+                                    for news_pk in range(1, NEWS + 1) for lang_pk in range(1, LANGUAGES + 1)])
+        s.commit()
+    sessions = async_sessionmaker(create_async_engine(async_url(engine.url), poolclass=NullPool),
+                                  expire_on_commit=False)
+    for news_pk in range(1, NEWS + 1):
+        asyncio.run(SummaryService(sessions).fanout(news_pk))
+        asyncio.run(DeliveryCursorService(sessions).enqueue(news_pk))
+    with sessionmaker(engine)() as s:
+        s.execute(update(ReaderSummary).where(ReaderSummary.pk % 3 != 0).values(is_sent=True))
+        s.add_all(Job(stage=stage, news_pk=news_pk, state='done' if news_pk < NEWS else 'pending')
+                  for stage in ('summarize', 'translate') for news_pk in range(1, NEWS + 1))
+        s.commit()
+    yield sessions, PlanRecorder(engine, sessions.kw['bind'].sync_engine)
+    engine.dispose()
+
+
+@pytest.mark.parametrize('name', QUERIES)
+def test_query_reads_tables_by_indexes(seeded, name):
+    sessions, recorder = seeded
+    details = recorder.record(QUERIES[name](sessions))
+    scans = [detail for detail in details
+             if FULL_SCAN.search(detail) and FULL_SCAN.search(detail).group(1) not in SMALL_TABLES]
+    assert details, f'{name} executed no queries'
+    assert not scans, f'full scans in {name}:\n' + '\n'.join(details)
@@ -0,0 +1,41 @@
+import asyncio
+
+from src.services import SummaryCacheService
+from src.summary.cache import SummaryCache
+
+
+class StubClient:
+    """KAGI client answering after a pause, requests are counted."""
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.requests = 0
+
+    async def get_summary(self, link: str, language: str) -> str:
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+        return f'summary of {link} on {language}'
+
+
+def test_concurrent_requests_of_one_key_make_one_request(sessions):
+    client = StubClient()
+    cache = SummaryCache(client, service=SummaryCacheService(sessions))
+
+    async def run() -> list:
+        return await asyncio.gather(*(cache.get_summary('https://example.com/news/1/', 'EN') for _ in range(8)))
+
+    results = asyncio.run(run())
+    assert client.requests == 1
+    assert set(results) == {'summary of https://example.com/news/1/ on EN'}
+    assert cache.stats['misses'] == 1
+    assert cache.stats['joined'] == 7
+    assert not cache.in_flight
+
+
+def test_stored_summary_is_taken_from_the_cache(sessions):
+    client = StubClient()
+    cache = SummaryCache(client, service=SummaryCacheService(sessions))
+    asyncio.run(cache.get_summary('https://example.com/news/1', 'EN'))
+    content = asyncio.run(cache.get_summary('https://EXAMPLE.com/news/1/', 'EN'))
+    assert client.requests == 1
+    assert content == 'summary of https://example.com/news/1 on EN'
+    assert cache.stats['hits'] == 1